@@ -18,6 +18,7 @@ from models.appointments import Appointments
 from models.blog_model import BlogModel
 from dashboard_psi.models import Paciente, Evolucao
 import config
+from commands import register_commands
 from models.slots import Slots
 
 
@@ -28,6 +29,7 @@ app = Flask(__name__)
 app.config.from_object('config')
 db.init_app(app)
 migrate.init_app(app, db)
+register_commands(app)
 sitemap = Sitemap(app=app)
 app.config['SERVER_NAME'] = 'peccicuidadointegrado.com.br'
 app.config["SITEMAP_URL_SCHEME"] = "https" 
@@ -59,13 +61,15 @@ if app.config['DEBUG'] == True:
 
 @app.route('/', methods=['GET'])
 def index():
-    doctors = DoctorsController().get_all_doctors()
+    doctors_controller = DoctorsController()
+    doctors = doctors_controller.get_all_doctors()
+    availability = doctors_controller.get_availability_summary()
     
     # Buscar os últimos 3 posts do blog para a seção de notícias
     blog_controller = BlogController()
     recent_blog_posts = blog_controller.get_recent_posts(3)
     
-    return render_template('index.html', doctors=doctors, recent_blog_posts=recent_blog_posts)
+    return render_template('index.html', doctors=doctors, availability=availability, recent_blog_posts=recent_blog_posts)
 
 # Rotas removidas: /register, /login (para usuários comuns)
 # Agora apenas psicólogos fazem login através de /p/login
@@ -202,40 +206,39 @@ def create_schedule():
             return redirect(url_for('dashboard_psi.dashboard'))
         
         slots_controller = SlotsController()
-        created_slots = 0
         
-        # Criar horários para cada semana se for recorrente
         from datetime import datetime, timedelta
         base_date = datetime.strptime(schedule_date, '%Y-%m-%d').date()
+        start_times = [datetime.strptime(time_slot, '%H:%M').time() for time_slot in time_slots]
         
-        for week in range(recurring_weeks):
-            current_date = base_date + timedelta(weeks=week)
-            
-            # Criar horário para cada time slot selecionado
-            for time_slot in time_slots:
-                start_time = datetime.strptime(time_slot, '%H:%M').time()
-                
-                # Calcular end_time baseado na duração
-                start_datetime = datetime.combine(current_date, start_time)
-                end_datetime = start_datetime + timedelta(minutes=duration)
-                end_time = end_datetime.time()
-                
-                # Verificar se já existe um horário no mesmo período
-                existing_slot = slots_controller.get_slot_by_doctor_date_time(
-                    doctor_id, current_date, start_time
-                )
-                
-                if not existing_slot:
-                    new_slot = slots_controller.create_slot(
-                        doctor_id=doctor_id,
-                        appointment_date=current_date,
-                        start_time=start_time,
-                        end_time=end_time,
-                        appointment_type=schedule_type,
-                        price=int(price) if price else None,
-                        notes=notes
-                    )
-                    created_slots += 1
+        if recurring_weeks > 1:
+            # Horários recorrentes viram uma única regra semanal, expandida sob demanda;
+            # horários com sobreposição à ocupação existente são ignorados
+            report = slots_controller.create_recurring_slots(
+                doctor_id=doctor_id,
+                first_date=base_date,
+                start_times=start_times,
+                weeks=recurring_weeks,
+                duration=duration,
+                appointment_type=schedule_type,
+                price=int(price) if price else None,
+                notes=notes
+            )
+            created_slots = len(report['created'])
+            if report['skipped']:
+                flash(f'{len(report["skipped"])} horário(s) com conflito foram excluídos da recorrência.', 'warning')
+        else:
+            # Horários já existentes no mesmo período são ignorados
+            report = slots_controller.create_slots_bulk(
+                doctor_id=doctor_id,
+                dates=[base_date],
+                start_times=start_times,
+                duration=duration,
+                appointment_type=schedule_type,
+                price=int(price) if price else None,
+                notes=notes
+            )
+            created_slots = len(report['created'])
         
         if created_slots > 0:
             flash(f'{created_slots} horário(s) cadastrado(s) com sucesso!', 'success')
@@ -283,129 +286,120 @@ def create_appointment():
             flash('Paciente não encontrado', 'error')
             return redirect(url_for('dashboard_psi.dashboard'))
         
-        # Verificar se o horário está disponível
-        slController = SlotsController()
-        # Aqui seria verificado se o slot está realmente disponível
-        
-        # Criar a consulta
-        appointmentsController = AppointmentsController()
-        
-        # Converter dados para formato adequado
+        # Montar a série (a consulta principal e, se recorrente, as próximas)
         import datetime
+        from dateutil.relativedelta import relativedelta
         appointment_datetime = datetime.datetime.strptime(f"{appointment_date} {appointment_time}", "%Y-%m-%d %H:%M")
+        occurrences = 1
+        if recurring_appointment and recurrence_count:
+            try:
+                occurrences = max(1, int(recurrence_count))
+            except ValueError:
+                flash('Número de recorrências inválido; apenas a consulta principal será agendada.', 'warning')
+        steps = {
+            'weekly': relativedelta(weeks=1),
+            'biweekly': relativedelta(weeks=2),
+            'monthly': relativedelta(months=1)
+        }
+        step = steps.get(recurrence_frequency, steps['weekly'])
+        appointment_dates = [appointment_datetime + step * i for i in range(occurrences)]
         
-        # Criar consulta principal
-        new_appointment = appointmentsController.create_appointment(
+        # Validar e criar a série inteira em uma única transação
+        appointmentsController = AppointmentsController()
+        results = appointmentsController.create_appointments_batch(
             user_id=patient_id,
             doctor_id=doctor_id,
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            appointment_type=appointment_type,
-            notes=appointment_notes,
-            price=float(appointment_price) if appointment_price else None,
+            appointment_dates=appointment_dates,
             duration=int(appointment_duration)
         )
+        appointments_created = sum(1 for result in results if result['status'] == 'created')
+        conflicts = [result['appointment_date'] for result in results if result['status'] == 'conflict']
         
-        if new_appointment:
-            # Incrementar contador de consultas do paciente
-            userController.increment_appointment_count(patient_id)
-            
-            appointments_created = 1
-            
-            # Se for consulta recorrente, criar as próximas
-            if recurring_appointment and recurrence_count:
-                try:
-                    recurrence_count = int(recurrence_count)
-                    base_date = datetime.datetime.strptime(appointment_date, "%Y-%m-%d")
-                    
-                    for i in range(1, recurrence_count):
-                        if recurrence_frequency == 'weekly':
-                            next_date = base_date + datetime.timedelta(weeks=i)
-                        elif recurrence_frequency == 'biweekly':
-                            next_date = base_date + datetime.timedelta(weeks=i*2)
-                        elif recurrence_frequency == 'monthly':
-                            # Aproximação para mensal (30 dias)
-                            next_date = base_date + datetime.timedelta(days=i*30)
-                        
-                        next_appointment = appointmentsController.create_appointment(
-                            user_id=patient_id,
-                            doctor_id=doctor_id,
-                            appointment_date=next_date.strftime("%Y-%m-%d"),
-                            appointment_time=appointment_time,
-                            appointment_type=appointment_type,
-                            notes=f"{appointment_notes} (Consulta recorrente {i+1}/{recurrence_count})",
-                            price=float(appointment_price) if appointment_price else None,
-                            duration=int(appointment_duration)
-                        )
-                        
-                        if next_appointment:
-                            appointments_created += 1
-                            userController.increment_appointment_count(patient_id)
-                
-                except Exception as e:
-                    flash(f'Consulta principal criada, mas houve erro ao criar consultas recorrentes: {str(e)}', 'warning')
-            
-            # Mensagem de sucesso
-            if appointments_created == 1:
-                flash(f'Consulta agendada com sucesso para {patient.name}!', 'success')
-            else:
-                flash(f'{appointments_created} consultas agendadas com sucesso para {patient.name}!', 'success')
-            
-            # Aqui você poderia adicionar lógica para:
-            # - Enviar email de confirmação se send_confirmation for True
-            # - Configurar lembrete se send_reminder for True
-            # - Marcar o slot como ocupado
-            
+        if appointments_created == 1:
+            flash(f'Consulta agendada com sucesso para {patient.name}!', 'success')
+        elif appointments_created > 1:
+            flash(f'{appointments_created} consultas agendadas com sucesso para {patient.name}!', 'success')
         else:
-            flash('Erro ao criar a consulta. Tente novamente.', 'error')
+            flash('Nenhuma consulta foi agendada: os horários escolhidos já estão ocupados.', 'error')
+        
+        if conflicts and appointments_created:
+            dates = ', '.join(conflict.strftime('%d/%m/%Y') for conflict in conflicts)
+            flash(f'As ocorrências de {dates} não foram agendadas por conflito de horário.', 'warning')
+        
+        # Aqui você poderia adicionar lógica para:
+        # - Enviar email de confirmação se send_confirmation for True
+        # - Configurar lembrete se send_reminder for True
             
     except Exception as e:
         flash(f'Erro ao agendar consulta: {str(e)}', 'error')
     
     return redirect(url_for('dashboard_psi.dashboard'))
 
-@app.route('/get_available_times', methods=['POST'])
+@app.route('/available_times', methods=['GET'])
 @login_required
-def get_available_times():
+def available_times():
     if not hasattr(current_user, 'user_type') or current_user.user_type != 'doctor':
         return jsonify({'error': 'Não autenticado'}), 401
-    
+
+    from datetime import datetime, timedelta
+    import hashlib
+
     try:
-        data = request.get_json()
-        selected_date = data.get('date')
-        doctor_id = current_user.id
-        
-        if not selected_date:
-            return jsonify({'error': 'Data não fornecida'}), 400
-        
-        # Buscar slots disponíveis para a data
-        slController = SlotsController()
-        available_slots = slController.get_available_slots_by_date(doctor_id, selected_date)
-        
-        # Se não houver slots específicos, retornar horários padrão
-        if not available_slots:
-            default_times = [
-                {'value': '08:00', 'text': '08:00 - Disponível'},
-                {'value': '09:00', 'text': '09:00 - Disponível'},
-                {'value': '10:00', 'text': '10:00 - Disponível'},
-                {'value': '14:00', 'text': '14:00 - Disponível'},
-                {'value': '15:00', 'text': '15:00 - Disponível'},
-                {'value': '16:00', 'text': '16:00 - Disponível'},
-            ]
-            return jsonify({'times': default_times})
-        
-        # Formatar slots para o select
-        times = []
-        for slot in available_slots:
-            times.append({
-                'value': slot.start_time.strftime('%H:%M'),
-                'text': f"{slot.start_time.strftime('%H:%M')} - Disponível"
-            })
-        
-        return jsonify({'times': times})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        date_from = datetime.strptime(request.args.get('date_from', ''), '%Y-%m-%d').date()
+        date_to = datetime.strptime(request.args.get('date_to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Período inválido (use date_from e date_to no formato AAAA-MM-DD)'}), 400
+    if date_to < date_from or date_to - date_from > timedelta(days=62):
+        return jsonify({'error': 'O período deve ter no máximo 62 dias'}), 400
+
+    doctor_id = current_user.id
+    slController = SlotsController()
+
+    # O ETag muda sempre que um slot ou regra do médico é criado, alterado ou removido
+    version = slController.get_availability_version(doctor_id)
+    etag = hashlib.sha1(f'{doctor_id}|{date_from}|{date_to}|{version}'.encode('utf-8')).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        available_slots = slController.get_available_slots_range(doctor_id, date_from, date_to)
+
+        # Dias sem horários cadastrados usam os horários padrão no formulário
+        default_times = [
+            {'value': start, 'text': f'{start} - Disponível'}
+            for start in ('08:00', '09:00', '10:00', '14:00', '15:00', '16:00')
+        ]
+        response = jsonify({
+            'date_from': date_from.strftime('%Y-%m-%d'),
+            'date_to': date_to.strftime('%Y-%m-%d'),
+            'default_times': default_times,
+            'days': {
+                day.strftime('%Y-%m-%d'): [{
+                    'slot_id': slot.slot_id,
+                    'value': slot.start_time.strftime('%H:%M'),
+                    'text': f"{slot.start_time.strftime('%H:%M')} - Disponível"
+                } for slot in slots]
+                for day, slots in available_slots.items()
+            }
+        })
+    response.set_etag(etag)
+    # O navegador revalida a cada navegação e recebe 304 enquanto nada mudar
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/earliest_available_slots', methods=['GET'])
+def earliest_available_slots():
+    # Endpoint público: próximos horários livres entre todos os psicólogos de uma especialidade
+    specialty = request.args.get('specialty')
+    if not specialty:
+        return jsonify({'error': 'Especialidade não fornecida'}), 400
+
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({'error': 'Limite inválido'}), 400
+
+    slots = SlotsController().get_earliest_free_slots(specialty, limit=limit)
+    return jsonify({'specialty': specialty, 'slots': slots})
 
 @app.route('/get_patient_info', methods=['POST'])
 @login_required
@@ -427,16 +421,20 @@ def get_patient_info():
         if not patient:
             return jsonify({'error': 'Paciente não encontrado'}), 404
         
-        # Buscar número de consultas
-        appointmentsController = AppointmentsController()
-        appointments = appointmentsController.get_appointments_by_user(patient_id)
-        appointment_count = len(appointments) if appointments else 0
+        # Resumo agregado (contagem e datas), sem carregar o histórico de consultas
+        summary = userController.get_patient_summary(patient_id, current_user.id)
+        
+        def isoformat(value):
+            return value.isoformat() if value else None
         
         return jsonify({
             'name': patient.name,
             'email': patient.email,
             'phone': patient.phone_number or 'Não informado',
-            'appointment_count': appointment_count
+            'appointment_count': summary['appointment_count'],
+            'next_appointment': isoformat(summary['next_appointment']),
+            'last_appointment': isoformat(summary['last_appointment']),
+            'last_evolution': isoformat(summary['last_evolution'])
         })
         
     except Exception as e:
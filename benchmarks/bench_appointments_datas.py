@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos filtros de data do AppointmentsController
+
+Compara os filtros antigos com func.date(appointment_date) (que impedem o uso
+de índices) com os intervalos semiabertos de controllers/date_ranges.py, com e
+sem os índices (doctor_id, appointment_date) e (user_id, appointment_date).
+Também confere que ambas as versões retornam exatamente as mesmas linhas.
+
+Uso:
+    python benchmarks/bench_appointments_datas.py [--appointments 100000] [--doctors 40]
+
+Por padrão usa um SQLite temporário; defina DATABASE_URL para medir no PostgreSQL.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time as timer
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_datas.db')
+os.environ.setdefault('DEBUG', 'False')
+
+from sqlalchemy import func, text
+from app import app
+from db import db
+from models.appointments import Appointments
+from controllers.appointments_controller import AppointmentsController
+from controllers.date_ranges import between, on_day
+from bench_monthly_stats import popular
+
+
+def filtros(doctor_id, user_id):
+    """Pares (filtro antigo, filtro novo) das consultas do controller"""
+    hoje = date.today()
+    ontem = hoje - timedelta(days=1)
+    inicio = hoje - timedelta(days=90)
+    coluna = Appointments.appointment_date
+    return {
+        'consultas de hoje (doctor)': (
+            (Appointments.doctor_id == doctor_id, func.date(coluna) == hoje),
+            (Appointments.doctor_id == doctor_id, on_day(coluna, hoje)),
+        ),
+        'consultas de ontem (doctor)': (
+            (Appointments.doctor_id == doctor_id, func.date(coluna) == ontem),
+            (Appointments.doctor_id == doctor_id, on_day(coluna, ontem)),
+        ),
+        'últimos 90 dias (user)': (
+            (Appointments.user_id == user_id, func.date(coluna) >= inicio, func.date(coluna) <= hoje),
+            (Appointments.user_id == user_id, between(coluna, inicio, hoje)),
+        ),
+        'dia inteiro (todos)': (
+            (func.date(coluna) == ontem,),
+            (on_day(coluna, ontem),),
+        ),
+    }
+
+
+def executar(condicoes):
+    return sorted(db.session.query(Appointments.appointment_id).filter(*condicoes).all())
+
+
+def medir(funcao, repeticoes):
+    funcao()
+    inicio = timer.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (timer.perf_counter() - inicio) / repeticoes * 1000
+
+
+def indices(criar):
+    with db.engine.begin() as conn:
+        for indice in Appointments.__table__.indexes:
+            if criar:
+                indice.create(conn, checkfirst=True)
+            else:
+                indice.drop(conn, checkfirst=True)
+        conn.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--appointments', type=int, default=100000)
+    parser.add_argument('--doctors', type=int, default=40)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f"🌱 Populando {args.appointments} consultas para {args.doctors} psicólogos...")
+        popular(args.appointments, args.doctors, args.patients)
+        doctor_id = f'bench-{args.doctors // 2}'
+        user_id = f'pac-{args.patients // 2}'
+
+        for nome, (antigo, novo) in filtros(doctor_id, user_id).items():
+            assert executar(antigo) == executar(novo), nome
+        controller = AppointmentsController()
+        controller.get_todays_appointments(doctor_id)
+        controller.get_yesterdays_appointments_count(doctor_id)
+        print("   ✅ filtros antigos e novos retornam as mesmas linhas")
+
+        resultados = {}
+        for criar in (False, True):
+            indices(criar)
+            db.session.remove()
+            for nome, (antigo, novo) in filtros(doctor_id, user_id).items():
+                resultados.setdefault(nome, []).extend([
+                    medir(lambda: executar(antigo), args.repeat),
+                    medir(lambda: executar(novo), args.repeat),
+                ])
+
+        print("\n⏱️  Tempo médio (ms): func.date sem índice | intervalo sem índice | func.date com índice | intervalo com índice")
+        for nome, (a, b, c, d) in resultados.items():
+            print(f"   {nome}: {a:.3f} | {b:.3f} | {c:.3f} | {d:.3f}  → ganho {a / d:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência da reserva de horários (SlotsController.book_slot)
+
+Várias threads tentam reservar os mesmos horários ao mesmo tempo; ao final o
+script confere que cada slot teve exatamente um vencedor e uma única consulta.
+
+Uso:
+    python benchmarks/bench_book_slot_concorrencia.py [--threads 16] [--slots 200]
+
+Por padrão usa um SQLite temporário; defina DATABASE_URL para medir no PostgreSQL.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time as timer
+from collections import Counter
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_book_slot.db')
+os.environ.setdefault('DEBUG', 'False')
+
+from sqlalchemy import func
+from app import app
+from db import db
+from models.doctors import Doctors
+from models.user import User
+from models.slots import Slots
+from models.appointments import Appointments
+from controllers.slot_controller import SlotsController
+
+
+def popular(total_slots):
+    db.session.add(Doctors(id='bench-doc', email='bench-doc@bench.local', name='Bench',
+                           password='x', specialty='Psicologia'))
+    db.session.add(User(id='bench-user', email='bench-user@bench.local', name='Bench', password='x'))
+    db.session.commit()
+    dias = [date.today() + timedelta(days=d) for d in range((total_slots + 9) // 10)]
+    horarios = [time(h) for h in range(8, 18)]
+    SlotsController().create_slots_bulk('bench-doc', dias, horarios, 50)
+    return [slot_id for (slot_id,) in db.session.query(Slots.slot_id).limit(total_slots)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--slots', type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        slot_ids = popular(args.slots)
+        db.session.remove()
+
+    vitorias = Counter()
+    erros = Counter()
+    lock = threading.Lock()
+    barreira = threading.Barrier(args.threads)
+
+    def worker(seed):
+        ordem = list(slot_ids)
+        random.Random(seed).shuffle(ordem)
+        with app.app_context():
+            barreira.wait()
+            for slot_id in ordem:
+                try:
+                    _, appointment = SlotsController().book_slot(slot_id, 'bench-user')
+                except Exception as e:
+                    with lock:
+                        erros[type(e).__name__] += 1
+                    continue
+                if appointment:
+                    with lock:
+                        vitorias[slot_id] += 1
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    inicio = timer.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = timer.perf_counter() - inicio
+
+    with app.app_context():
+        consultas = db.session.query(func.count(Appointments.appointment_id)).scalar()
+        livres = Slots.query.filter_by(is_booked=False).count()
+        dialeto = db.engine.dialect.name
+
+    tentativas = args.threads * len(slot_ids)
+    print(f"🏁 {dialeto}: {args.threads} threads × {len(slot_ids)} slots "
+          f"= {tentativas} tentativas em {duracao:.2f}s ({tentativas / duracao:.0f} tentativas/s)")
+    print(f"   vencedores por slot: {sorted(set(vitorias.values()))}")
+    print(f"   consultas criadas: {consultas} | slots livres restantes: {livres}")
+    if erros:
+        print(f"   erros: {dict(erros)}")
+
+    if all(vitorias[s] == 1 for s in slot_ids) and consultas == len(slot_ids):
+        print("✅ Exatamente um vencedor por slot")
+    else:
+        print("❌ Reserva duplicada ou perdida detectada")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
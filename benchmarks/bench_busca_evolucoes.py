@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark da busca no conteúdo das evoluções
+
+Popula um banco com 50 mil evoluções criptografadas (por padrão) e compara, para
+a busca de um paciente e para a base inteira:
+- a implementação anterior (contains() sobre o texto cifrado, que nunca encontra nada);
+- a única alternativa correta sem índice: decifrar cada nota e procurar as palavras;
+- a consulta ao índice cego (evolucao_tokens), que só toca os tokens das palavras.
+
+Uso:
+    python benchmarks/bench_busca_evolucoes.py [--evolucoes 50000] [--pacientes 500]
+
+Por padrão usa um SQLite temporário; defina DATABASE_URL para medir no PostgreSQL.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time as timer
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_evolucoes.db')
+os.environ.setdefault('DEBUG', 'False')
+if not os.environ.get('ENCRYPTION_KEY'):
+    from cryptography.fernet import Fernet
+    os.environ['ENCRYPTION_KEY'] = Fernet.generate_key().decode('utf-8')
+
+from sqlalchemy import insert, select, text
+from app import app
+from db import db
+from models.doctors import Doctors
+from dashboard_psi.models import Paciente, Evolucao, EvolucaoToken
+from dashboard_psi.utils import decrypt_data, encrypt_data, get_search_index_key, normalizar_busca, tokens_busca
+from controllers.evolucao_search_controller import EvolucaoSearchController
+
+VOCABULARIO = (
+    'paciente relatou sentiu ansiedade tristeza raiva medo culpa sono insônia trabalho família mãe pai irmão '
+    'filho escola faculdade namoro casamento separação luto perda mudança cidade viagem férias dinheiro dívida '
+    'emprego chefe colegas amigos rotina alimentação exercício corpo dor cabeça crise pânico respiração choro '
+    'memória infância sonho pesadelo conflito discussão decisão objetivo planejamento tarefa semana próxima sessão '
+    'sessões anterior evolução melhora piora estável humor energia motivação isolamento ansiosa preocupação futuro'
+).split()
+TERMO_RARO = 'hipervigilância'
+
+
+def popular(total, pacientes):
+    random.seed(42)
+    key = get_search_index_key()
+    db.session.execute(insert(Doctors), [{'id': 'bench-psi', 'email': 'bench-psi@bench.local', 'name': 'bench-psi',
+                                          'password': 'x', 'specialty': 'Psicologia'}])
+    db.session.execute(insert(Paciente), [
+        {'id': f'pac-{p}', 'nome_completo': f'Paciente {p}', 'nome_busca': f'paciente {p}', 'psicologo_id': 'bench-psi'}
+        for p in range(pacientes)
+    ])
+    inicio = datetime(2024, 1, 1, 8)
+    evolucoes, tokens = [], []
+    for i in range(total):
+        palavras = random.choices(VOCABULARIO, k=random.randint(40, 120))
+        if i % 97 == 0:
+            palavras.append(TERMO_RARO)
+        conteudo = ' '.join(palavras).capitalize() + '.'
+        evolucao_id = f'evo-{i}'
+        evolucoes.append({
+            'id': evolucao_id,
+            'paciente_id': f'pac-{i % pacientes}',
+            'data_sessao': inicio + timedelta(days=i // pacientes * 7, hours=i % 10),
+            'conteudo_criptografado': encrypt_data(conteudo),
+            'duracao_minutos': 50,
+        })
+        tokens.extend({'token': token, 'evolucao_id': evolucao_id} for token in tokens_busca(conteudo, key=key))
+        if len(evolucoes) == 5000:
+            db.session.execute(insert(Evolucao), evolucoes)
+            db.session.execute(insert(EvolucaoToken), tokens)
+            evolucoes, tokens = [], []
+    if evolucoes:
+        db.session.execute(insert(Evolucao), evolucoes)
+        db.session.execute(insert(EvolucaoToken), tokens)
+    db.session.commit()
+
+
+def busca_anterior(paciente_id, termo):
+    """Implementação anterior: substring sobre o texto cifrado.
+
+    Com o termo em str o SQLite nem aceita o parâmetro (LargeBinary); em bytes a
+    consulta roda, mas o texto em claro nunca aparece no Fernet.
+    """
+    return Evolucao.query.filter_by(paciente_id=paciente_id).filter(
+        Evolucao.conteudo_criptografado.contains(termo.encode('utf-8'))
+    ).all()
+
+
+def busca_decifrando(termo, paciente_id=None):
+    """Sem índice: decifra cada nota e verifica se contém todas as palavras do termo"""
+    palavras = set(normalizar_busca(termo).split())
+    query = select(Evolucao.id, Evolucao.conteudo_criptografado).order_by(Evolucao.data_sessao.desc())
+    if paciente_id:
+        query = query.where(Evolucao.paciente_id == paciente_id)
+    encontradas = []
+    for evolucao_id, conteudo in db.session.execute(query):
+        if palavras <= set(re.findall(r'\w+', normalizar_busca(decrypt_data(conteudo)))):
+            encontradas.append(evolucao_id)
+    return encontradas
+
+
+def busca_indice(termo, paciente_id=None):
+    """Índice cego: consulta pontual por token, sem decifrar"""
+    controller = EvolucaoSearchController()
+    if paciente_id:
+        return [evolucao.id for evolucao in controller.search(paciente_id, termo)]
+    return list(db.session.execute(
+        select(Evolucao.id).where(controller.search_criteria(termo)).order_by(Evolucao.data_sessao.desc())
+    ).scalars())
+
+
+def medir(nome, funcao, repeticoes):
+    funcao()
+    inicio = timer.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    media = (timer.perf_counter() - inicio) / repeticoes * 1000
+    print(f"   {nome}: {media:.3f} ms")
+    return media
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--evolucoes', type=int, default=50000)
+    parser.add_argument('--pacientes', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f"🌱 Populando {args.evolucoes} evoluções para {args.pacientes} pacientes...")
+        popular(args.evolucoes, args.pacientes)
+        with db.engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        total_tokens = db.session.query(EvolucaoToken).count()
+        print(f"   {total_tokens} tokens ({total_tokens / args.evolucoes:.1f} por evolução)")
+
+        paciente_id = 'pac-0'
+        for termo in ('ansiedade trabalho', TERMO_RARO):
+            assert busca_decifrando(termo, paciente_id) == busca_indice(termo, paciente_id)
+            assert sorted(busca_decifrando(termo)) == sorted(busca_indice(termo))
+            print(f"\n🔎 \"{termo}\": {len(busca_indice(termo, paciente_id))} evolução(ões) do paciente, "
+                  f"{len(busca_indice(termo))} na base; anterior encontrou {len(busca_anterior(paciente_id, termo))}")
+
+            print("⏱️  Busca nas evoluções de um paciente (tempo médio)")
+            medir('anterior: contains() no texto cifrado', lambda: busca_anterior(paciente_id, termo), args.repeat)
+            antes = medir('decifrando cada nota', lambda: busca_decifrando(termo, paciente_id), args.repeat)
+            depois = medir('índice cego', lambda: busca_indice(termo, paciente_id), args.repeat)
+            print(f"   ganho: {antes / depois:.1f}x")
+
+            print(f"⏱️  Busca nas {args.evolucoes} evoluções (tempo médio)")
+            antes = medir('decifrando cada nota', lambda: busca_decifrando(termo), max(1, args.repeat // 10))
+            depois = medir('índice cego', lambda: busca_indice(termo), args.repeat)
+            print(f"   ganho: {antes / depois:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
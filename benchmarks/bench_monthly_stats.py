@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark de AppointmentsController.get_monthly_stats
+
+Popula um banco com 100 mil consultas (por padrão) distribuídas entre vários
+psicólogos e compara a implementação anterior (três consultas com
+func.date(appointment_date), que impede o uso de índices) com a consulta
+agregada única sobre intervalos semiabertos.
+
+A consulta agregada depende dos índices (doctor_id, appointment_date) e
+(user_id, appointment_date) de appointments: sem eles (--sem-indices, o esquema
+anterior à migração desses índices) ela é mais lenta que uma consulta por métrica.
+
+Uso:
+    python benchmarks/bench_monthly_stats.py [--appointments 100000] [--doctors 40] [--sem-indices]
+
+Por padrão usa um SQLite temporário; defina DATABASE_URL para medir no PostgreSQL.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time as timer
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_stats.db')
+os.environ.setdefault('DEBUG', 'False')
+
+from sqlalchemy import func, insert, text
+from app import app
+from db import db
+from models.doctors import Doctors
+from models.user import User
+from models.appointments import Appointments
+from controllers.appointments_controller import AppointmentsController
+
+STATUS = ['completed'] * 8 + ['no_show', 'scheduled']
+
+
+def popular(total, doctors, patients):
+    random.seed(42)
+    db.session.execute(insert(Doctors), [
+        {'id': f'bench-{d}', 'email': f'bench-{d}@bench.local', 'name': f'bench-{d}',
+         'password': 'x', 'specialty': 'Psicologia'} for d in range(doctors)
+    ])
+    db.session.execute(insert(User), [
+        {'id': f'pac-{p}', 'email': f'pac-{p}@bench.local', 'name': f'pac-{p}', 'password': 'x'}
+        for p in range(patients)
+    ])
+    inicio = datetime.combine(date.today() - timedelta(days=730), time(8))
+    rows = []
+    for i in range(total):
+        rows.append({
+            'appointment_id': f'apt-{i}',
+            'user_id': f'pac-{random.randrange(patients)}',
+            'doctor_id': f'bench-{random.randrange(doctors)}',
+            'appointment_date': inicio + timedelta(days=random.randrange(760), hours=random.randrange(12)),
+            'status': random.choice(STATUS),
+        })
+        if len(rows) == 10000:
+            db.session.execute(insert(Appointments), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Appointments), rows)
+    db.session.commit()
+
+
+def stats_anterior(doctor_id):
+    """Implementação anterior: três consultas com func.date() sobre a coluna"""
+    today = date.today()
+    month_start = today.replace(day=1)
+    month_end = today.replace(day=monthrange(today.year, today.month)[1])
+    query = db.session.query(Appointments)
+    total = query.filter(
+        Appointments.doctor_id == doctor_id,
+        func.date(Appointments.appointment_date) >= month_start,
+        func.date(Appointments.appointment_date) <= month_end
+    ).count()
+    hoje = query.filter(
+        Appointments.doctor_id == doctor_id,
+        func.date(Appointments.appointment_date) == today
+    ).count()
+    ativos = db.session.query(func.count(func.distinct(Appointments.user_id))).filter(
+        Appointments.doctor_id == doctor_id,
+        func.date(Appointments.appointment_date) >= month_start,
+        func.date(Appointments.appointment_date) <= month_end
+    ).scalar()
+    return total, hoje, ativos
+
+
+def stats_anterior_completo(doctor_id):
+    """Mesmas métricas da versão atual, uma consulta por métrica com func.date()"""
+    from models.slots import Slots
+
+    today = date.today()
+    month_start = today.replace(day=1)
+    month_end = today.replace(day=monthrange(today.year, today.month)[1])
+    no_mes = (
+        Appointments.doctor_id == doctor_id,
+        func.date(Appointments.appointment_date) >= month_start,
+        func.date(Appointments.appointment_date) <= month_end
+    )
+    resultado = list(stats_anterior(doctor_id))
+    primeiras = db.session.query(func.min(Appointments.appointment_date)).filter(
+        Appointments.doctor_id == doctor_id
+    ).group_by(Appointments.user_id).all()
+    resultado.append(sum(1 for (primeira,) in primeiras if month_start <= primeira.date() <= month_end))
+    for status in (AppointmentsController.ATTENDED_STATUS, AppointmentsController.MISSED_STATUS):
+        resultado.append(db.session.query(Appointments).filter(*no_mes, Appointments.status.in_(status)).count())
+    resultado.append(db.session.query(Slots).filter(
+        Slots.doctor_id == doctor_id, Slots.is_booked == False,
+        Slots.appointment_date >= today, Slots.appointment_date <= month_end
+    ).count())
+    resultado.append(db.session.query(func.sum(Slots.price)).filter(
+        Slots.doctor_id == doctor_id, Slots.is_booked == True,
+        Slots.appointment_date >= month_start, Slots.appointment_date <= month_end
+    ).scalar() or 0)
+    return resultado
+
+
+def medir(nome, funcao, repeticoes):
+    funcao()
+    inicio = timer.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    media = (timer.perf_counter() - inicio) / repeticoes * 1000
+    print(f"   {nome}: {media:.3f} ms")
+    return media
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--appointments', type=int, default=100000)
+    parser.add_argument('--doctors', type=int, default=40)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--sem-indices', action='store_true',
+                        help='Remove os índices compostos de appointments antes de medir.')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f"🌱 Populando {args.appointments} consultas para {args.doctors} psicólogos...")
+        popular(args.appointments, args.doctors, args.patients)
+        with db.engine.begin() as conn:
+            if args.sem_indices:
+                for index in Appointments.__table__.indexes:
+                    index.drop(conn)
+            conn.execute(text("ANALYZE"))
+        doctor_id = f'bench-{args.doctors // 2}'
+        controller = AppointmentsController()
+
+        anterior = stats_anterior(doctor_id)
+        atual = controller.get_monthly_stats(doctor_id)
+        assert anterior == (atual['total_appointments_month'], atual['appointments_today'], atual['active_patients'])
+        print(f"   estatísticas: {atual}")
+
+        print("\n⏱️  Tempo médio por chamada")
+        medir('anterior: três métricas, três consultas com func.date()', lambda: stats_anterior(doctor_id), args.repeat)
+        antes = medir('anterior: mesmas métricas, uma consulta por métrica', lambda: stats_anterior_completo(doctor_id), args.repeat)
+        depois = medir('atual: consulta agregada única', lambda: controller.get_monthly_stats(doctor_id), args.repeat)
+        print(f"   ganho para as mesmas métricas: {antes / depois:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
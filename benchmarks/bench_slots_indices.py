@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices da tabela slots
+
+Popula um banco com o histórico de horários de vários psicólogos e mede as
+consultas quentes do SlotsController com e sem os índices compostos,
+mostrando o plano de execução de cada uma.
+
+Uso:
+    python benchmarks/bench_slots_indices.py [--doctors 50] [--weeks 104]
+
+Por padrão usa um SQLite temporário; defina DATABASE_URL para medir no PostgreSQL.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time as timer
+import uuid
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if 'DATABASE_URL' not in os.environ:
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_slots.db')
+os.environ.setdefault('DEBUG', 'False')
+
+from sqlalchemy import bindparam, insert, text
+from app import app
+from db import db
+from models.doctors import Doctors
+from models.slots import Slots
+from controllers.slot_controller import SlotsController
+
+HORARIOS = [time(h) for h in (8, 9, 10, 11, 14, 15, 16, 17, 18, 19)]
+
+
+def popular(doctors, weeks):
+    """Cria os psicólogos e o histórico de horários (um dia por semana)"""
+    inicio = date.today() - timedelta(weeks=weeks // 2)
+    for d in range(doctors):
+        doctor_id = f'bench-{d}'
+        db.session.add(Doctors(id=doctor_id, email=f'{doctor_id}@bench.local', name=doctor_id,
+                               password='x', specialty='Psicologia'))
+        rows = []
+        for w in range(weeks):
+            dia = inicio + timedelta(weeks=w, days=d % 5)
+            for h in HORARIOS:
+                rows.append({
+                    'slot_id': str(uuid.uuid4())[:20],
+                    'doctor_id': doctor_id,
+                    'appointment_date': dia,
+                    'start_time': h,
+                    'end_time': time(h.hour, 50),
+                    'is_booked': dia < date.today() or w % 3 == 0,
+                })
+        db.session.execute(insert(Slots), rows)
+    db.session.commit()
+
+
+def consultas(doctor_id):
+    controller = SlotsController()
+    dia = date.today() + timedelta(weeks=1)
+    return {
+        'get_available_slots_by_date': lambda: controller.get_available_slots_by_date(doctor_id, dia),
+        'get_free_slots_by_doctor': lambda: controller.get_free_slots_by_doctor(doctor_id),
+        'get_slot_by_doctor_date_time': lambda: controller.get_slot_by_doctor_date_time(doctor_id, dia, HORARIOS[0]),
+    }
+
+
+def mostrar_planos(doctor_id):
+    dialeto = db.engine.dialect.name
+    prefixo = 'EXPLAIN QUERY PLAN ' if dialeto == 'sqlite' else 'EXPLAIN '
+    sql = {
+        'disponiveis por data': "SELECT * FROM slots WHERE doctor_id = :d AND appointment_date = :dia AND is_booked = :f ORDER BY start_time",
+        'livres por medico': "SELECT * FROM slots WHERE doctor_id = :d AND is_booked = :f",
+        'por medico/data/horario': "SELECT * FROM slots WHERE doctor_id = :d AND appointment_date = :dia AND start_time = :h",
+    }
+    params = {'d': doctor_id, 'dia': date.today() + timedelta(weeks=1), 'f': False, 'h': HORARIOS[0]}
+    for nome, consulta in sql.items():
+        tipos = {'dia': db.Date, 'h': db.Time, 'f': db.Boolean}
+        usados = [k for k in params if ':' + k in consulta]
+        instrucao = text(prefixo + consulta).bindparams(
+            *[bindparam(k, type_=tipos[k]) for k in usados if k in tipos]
+        )
+        plano = db.session.execute(instrucao, {k: params[k] for k in usados}).all()
+        print(f"   {nome}: " + ' | '.join(str(linha[-1]) for linha in plano))
+
+
+def medir(doctor_id, repeticoes):
+    for nome, consulta in consultas(doctor_id).items():
+        consulta()
+        inicio = timer.perf_counter()
+        for _ in range(repeticoes):
+            consulta()
+        media = (timer.perf_counter() - inicio) / repeticoes * 1000
+        print(f"   {nome}: {media:.3f} ms")
+
+
+def remover_indices():
+    """Recria a tabela slots sem os índices (SQLite não remove constraints in-place)"""
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_slots_doctor_booked_date_start"))
+        if db.engine.dialect.name == 'sqlite':
+            conn.execute(text("CREATE TABLE slots_sem_indices AS SELECT * FROM slots"))
+            conn.execute(text("DROP TABLE slots"))
+            conn.execute(text("ALTER TABLE slots_sem_indices RENAME TO slots"))
+        else:
+            conn.execute(text("ALTER TABLE slots DROP CONSTRAINT IF EXISTS uq_slots_doctor_date_start"))
+
+
+def criar_indices():
+    with db.engine.begin() as conn:
+        for indice in Slots.__table__.indexes:
+            indice.create(conn, checkfirst=True)
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_slots_doctor_date_start "
+            "ON slots (doctor_id, appointment_date, start_time)"
+        ))
+        if db.engine.dialect.name != 'sqlite':
+            conn.execute(text("ANALYZE slots"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--weeks', type=int, default=104)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f"🌱 Populando {args.doctors} psicólogos × {args.weeks} semanas × {len(HORARIOS)} horários...")
+        popular(args.doctors, args.weeks)
+        print(f"   {Slots.query.count()} slots em {db.engine.url.render_as_string(hide_password=True)}")
+        doctor_id = f'bench-{args.doctors // 2}'
+
+        remover_indices()
+        db.session.remove()
+        print("\n🐢 Sem índices")
+        mostrar_planos(doctor_id)
+        medir(doctor_id, args.repeat)
+
+        criar_indices()
+        db.session.remove()
+        print("\n🚀 Com índices")
+        mostrar_planos(doctor_id)
+        medir(doctor_id, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Comandos de manutenção executados pelo Flask CLI (`flask <grupo> <comando>`)
+
+Todos podem ser agendados (cron, systemd timer, scheduler da hospedagem), pois
+processam em lotes e são seguros para reexecução.
+"""
+
+import time
+
+import click
+from flask.cli import AppGroup
+
+from db import db
+from controllers.closing_controller import AGENDA_CLOSED_STATUS, APPOINTMENT_CLOSED_STATUS, ClosingController
+from controllers.counters import reconcile_counters
+from controllers.evolucao_preview_controller import EvolucaoPreviewController
+from controllers.evolucao_search_controller import EvolucaoSearchController
+from controllers.paciente_summary_controller import PacienteSummaryController
+from controllers.slot_controller import SlotsController
+from controllers.stats_controller import StatsController
+
+slots_cli = AppGroup('slots', help='Manutenção dos horários (slots) dos médicos.')
+stats_cli = AppGroup('stats', help='Manutenção do resumo diário de estatísticas (doctor_daily_stats).')
+counters_cli = AppGroup('counters', help='Manutenção dos contadores de consultas de pacientes e médicos.')
+agenda_cli = AppGroup('agenda', help='Manutenção dos agendamentos (agenda) e consultas (appointments).')
+pacientes_cli = AppGroup('pacientes', help='Manutenção dos dados de pacientes do dashboard de psicologia.')
+evolucoes_cli = AppGroup('evolucoes', help='Manutenção das evoluções (notas de sessão) do dashboard de psicologia.')
+
+
+@slots_cli.command('archive-expired')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Processa horários com data anterior a esta (padrão: hoje).')
+@click.option('--batch-size', type=click.IntRange(min=1), default=1000, show_default=True,
+              help='Quantidade de linhas por transação.')
+@click.option('--archive/--delete', default=True, show_default=True,
+              help='Copia para slots_archive antes de remover, ou apenas remove.')
+def archive_expired_slots(before, batch_size, archive):
+    """Arquiva ou remove horários vencidos que não foram reservados."""
+    report = SlotsController().archive_expired_slots(
+        before=before.date() if before else None,
+        batch_size=batch_size,
+        archive=archive
+    )
+    action = 'arquivado(s)' if archive else 'removido(s)'
+    click.echo(
+        f"{report['processed']} horário(s) {action} em {report['batches']} lote(s) "
+        f"({report['elapsed']:.2f}s, {report['rows_per_second']:.0f} linhas/s)"
+    )
+
+
+@stats_cli.command('rebuild')
+@click.option('--doctor', 'doctor_id', default=None, help='Reconstrói apenas o resumo deste médico.')
+def rebuild_daily_stats(doctor_id):
+    """Recalcula doctor_daily_stats a partir de evoluções, agenda, consultas e slots."""
+    started = time.perf_counter()
+    rows = StatsController().rebuild(doctor_id=doctor_id)
+    click.echo(f"{rows} linha(s) de resumo diário gravada(s) em {time.perf_counter() - started:.2f}s")
+
+
+@counters_cli.command('reconcile')
+def reconcile_appointment_counters():
+    """Recalcula users/doctors.appointment_count a partir da tabela appointments."""
+    started = time.perf_counter()
+    corrected = reconcile_counters(db.session)
+    summary = ', '.join(f'{table}: {rows}' for table, rows in corrected.items())
+    click.echo(f"Contadores corrigidos ({summary}) em {time.perf_counter() - started:.2f}s")
+
+
+@agenda_cli.command('close-past')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%d %H:%M']), default=None,
+              help='Fecha entradas com início anterior a este momento (padrão: hoje, 00:00).')
+@click.option('--agenda-status', type=click.Choice(AGENDA_CLOSED_STATUS), default='concluida', show_default=True,
+              help='Status final das entradas da agenda.')
+@click.option('--appointment-status', type=click.Choice(APPOINTMENT_CLOSED_STATUS), default='completed',
+              show_default=True, help='Status final das consultas.')
+@click.option('--batch-size', type=click.IntRange(min=1), default=1000, show_default=True,
+              help='Quantidade de linhas por transação.')
+def close_past_entries(before, agenda_status, appointment_status, batch_size):
+    """Aplica um status final a agendamentos e consultas que já passaram."""
+    report = ClosingController().close_past_due(
+        before=before,
+        agenda_status=agenda_status,
+        appointment_status=appointment_status,
+        batch_size=batch_size
+    )
+    click.echo(
+        f"{report['agenda']} agendamento(s) -> {agenda_status}, "
+        f"{report['appointments']} consulta(s) -> {appointment_status} em {report['batches']} lote(s) "
+        f"({report['elapsed']:.2f}s, {report['rows_per_second']:.0f} linhas/s)"
+    )
+
+
+@pacientes_cli.command('rebuild-summary')
+@click.option('--psicologo', 'psicologo_id', default=None, help='Recalcula apenas os pacientes deste psicólogo.')
+def rebuild_paciente_summary(psicologo_id):
+    """Recalcula as colunas de resumo de pacientes a partir de evoluções e agenda."""
+    started = time.perf_counter()
+    rows = PacienteSummaryController().rebuild(psicologo_id=psicologo_id)
+    click.echo(f"Resumo de {rows} paciente(s) recalculado em {time.perf_counter() - started:.2f}s")
+
+
+@evolucoes_cli.command('rebuild-index')
+@click.option('--batch-size', type=click.IntRange(min=1), default=500, show_default=True,
+              help='Quantidade de evoluções por transação.')
+def rebuild_evolucao_index(batch_size):
+    """Recalcula o índice cego de busca (evolucao_tokens) a partir das evoluções."""
+    report = EvolucaoSearchController().rebuild(batch_size=batch_size)
+    click.echo(
+        f"{report['tokens']} token(s) de {report['evolucoes']} evolução(ões) em {report['batches']} lote(s) "
+        f"({report['elapsed']:.2f}s, {report['rows_per_second']:.0f} evoluções/s)"
+    )
+
+
+@evolucoes_cli.command('rebuild-previews')
+@click.option('--batch-size', type=click.IntRange(min=1), default=500, show_default=True,
+              help='Quantidade de evoluções por transação.')
+@click.option('--all', 'rebuild_all', is_flag=True, default=False,
+              help='Regrava as prévias de todas as evoluções, não só das que não têm prévia.')
+def rebuild_evolucao_previews(batch_size, rebuild_all):
+    """Grava a prévia criptografada e a contagem de palavras das evoluções."""
+    report = EvolucaoPreviewController().rebuild(batch_size=batch_size, missing_only=not rebuild_all)
+    click.echo(
+        f"Prévia de {report['evolucoes']} evolução(ões) gravada em {report['batches']} lote(s) "
+        f"({report['elapsed']:.2f}s, {report['rows_per_second']:.0f} evoluções/s)"
+    )
+
+
+def register_commands(app):
+    app.cli.add_command(slots_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(agenda_cli)
+    app.cli.add_command(pacientes_cli)
+    app.cli.add_command(evolucoes_cli)
@@ -24,4 +24,5 @@ ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'change-me')
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'admin@sistema.com')
 
 # Configurações de Criptografia
-ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
\ No newline at end of file
+ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
+SEARCH_INDEX_KEY = os.getenv('SEARCH_INDEX_KEY')
\ No newline at end of file
@@ -3,10 +3,21 @@ from models.appointments import Appointments
 from models.user import User
 from models.doctors import Doctors
 from sqlalchemy import func, distinct
+from controllers.date_ranges import between, day_range, in_range, month_range, on_day
+from controllers.freebusy_controller import FreeBusyController, DEFAULT_DURATION
+from controllers.counters import increment_counter
 import uuid
 import datetime
 
 class AppointmentsController:
+    # Colunas aceitas em build_appointments_query(order_by=...)
+    ORDER_COLUMNS = ('appointment_date', 'created_at')
+    # Ordenações aceitas em get_doctors_patients_page(sort=...)
+    ROSTER_SORTS = ('name', 'last_appointment', 'total_sessions')
+    # Status contados como comparecimento e falta em get_monthly_stats
+    ATTENDED_STATUS = ('completed', 'attended', 'concluida')
+    MISSED_STATUS = ('no_show', 'missed', 'faltou')
+
     def __init__(self):
         self.db = db
     
@@ -33,6 +44,56 @@ class AppointmentsController:
         self.db.session.add(new_appointment)
         self.db.session.commit()
         return new_appointment
+
+    def create_appointments_batch(self, user_id, doctor_id, appointment_dates, duration=DEFAULT_DURATION):
+        """Cria uma série de consultas (ex.: recorrentes) em uma única transação.
+
+        A série inteira é validada antes de qualquer escrita, contra a agenda do médico
+        e contra ela mesma; ocorrências em conflito são puladas. Os contadores de paciente
+        e médico são atualizados com um único UPDATE cada. Em caso de erro nada é gravado.
+
+        Retorna um resultado por ocorrência, na ordem recebida:
+        {'appointment_date', 'appointment_id' (None se não criada), 'status': 'created' | 'conflict'}
+        """
+        if not appointment_dates:
+            return []
+
+        free_busy = FreeBusyController().build(
+            doctor_id, min(appointment_dates).date(), max(appointment_dates).date()
+        )
+        results = []
+        new_appointments = []
+        for appointment_date, is_free in free_busy.validate_series(appointment_dates, duration):
+            appointment_id = None
+            if is_free:
+                appointment_id = str(uuid.uuid4())[:15]
+                new_appointments.append(Appointments(
+                    appointment_id=appointment_id,
+                    user_id=user_id,
+                    doctor_id=doctor_id,
+                    appointment_date=appointment_date
+                ))
+            results.append({
+                'appointment_date': appointment_date,
+                'appointment_id': appointment_id,
+                'status': 'created' if is_free else 'conflict'
+            })
+
+        if not new_appointments:
+            return results
+
+        created = len(new_appointments)
+        try:
+            # Um único flush: o INSERT sai em lote (executemany) e o resumo diário é mantido
+            self.db.session.add_all(new_appointments)
+            increment_counter(self.db.session, User, user_id, created)
+            increment_counter(self.db.session, Doctors, doctor_id, created)
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        return results
+
     def update_appointment(self, appointment_id, **kwargs):
         appointment = self.get_appointment_by_id(appointment_id)
         if appointment:
@@ -48,14 +109,109 @@ class AppointmentsController:
             self.db.session.commit()
             return True
         return False
+    def build_appointments_query(self, user_id=None, doctor_id=None, status=None, date_from=None, date_to=None,
+                                 day=None, columns=None, order_by='appointment_date', descending=False,
+                                 cursor=None, conditions=()):
+        """Monta o SELECT de consultas com filtros opcionais combináveis.
+
+        - status: um valor ou uma lista de valores
+        - date_from/date_to: limites inclusivos; datas valem como 00:00 (ver date_ranges.between)
+        - day: um dia inteiro (ou um instante exato, se datetime)
+        - columns: projeção (colunas de Appointments/User/...); None = objetos Appointments
+        - order_by/descending: coluna de ordenação, sempre desempatada por appointment_id
+        - cursor: continua depois do cursor retornado por get_appointments_page (keyset)
+        - conditions: critérios SQLAlchemy adicionais
+        """
+        from sqlalchemy import and_, or_, select
+
+        if order_by not in self.ORDER_COLUMNS:
+            raise ValueError(f'Ordenação inválida: {order_by}')
+        order_column = getattr(Appointments, order_by)
+
+        query = select(*columns) if columns else select(Appointments)
+        if columns:
+            query = query.select_from(Appointments)
+        filters = list(conditions)
+        if user_id is not None:
+            filters.append(Appointments.user_id == user_id)
+        if doctor_id is not None:
+            filters.append(Appointments.doctor_id == doctor_id)
+        if status is not None:
+            filters.append(Appointments.status.in_(status) if isinstance(status, (list, tuple, set)) else Appointments.status == status)
+        if day is not None:
+            filters.append(on_day(Appointments.appointment_date, day))
+        if date_from is not None or date_to is not None:
+            filters.append(between(Appointments.appointment_date, date_from, date_to))
+        if cursor:
+            value, appointment_id = self._decode_cursor(cursor)
+            compare = (lambda column, other: column < other) if descending else (lambda column, other: column > other)
+            filters.append(or_(
+                compare(order_column, value),
+                and_(order_column == value, compare(Appointments.appointment_id, appointment_id))
+            ))
+
+        ordering = (order_column, Appointments.appointment_id)
+        if descending:
+            ordering = tuple(column.desc() for column in ordering)
+        return query.where(*filters).order_by(*ordering)
+
+    def query_appointments(self, limit=None, yield_per=500, **filters):
+        """Executa build_appointments_query e entrega os resultados em fluxo.
+
+        As linhas são buscadas em lotes de `yield_per` (cursor do servidor quando o
+        banco suporta), sem materializar o histórico inteiro na memória do worker.
+        Gera objetos Appointments, ou Rows quando há projeção em `columns`.
+        """
+        query = self.build_appointments_query(**filters)
+        if limit is not None:
+            query = query.limit(limit)
+        result = self.db.session.execute(query.execution_options(yield_per=yield_per))
+        rows = result if filters.get('columns') else result.scalars()
+        for row in rows:
+            yield row
+
+    def get_appointments_page(self, page_size=50, cursor=None, **filters):
+        """Uma página de consultas com paginação por cursor (keyset).
+
+        Retorna {'items': [...], 'next_cursor': str ou None}; passe next_cursor
+        na próxima chamada (com os mesmos filtros) para continuar.
+        """
+        order_by = filters.get('order_by', 'appointment_date')
+        columns = filters.get('columns')
+        if columns:
+            # A chave do cursor precisa estar na projeção
+            keys = {getattr(column, 'key', None) for column in columns}
+            filters['columns'] = list(columns) + [
+                getattr(Appointments, key) for key in (order_by, 'appointment_id') if key not in keys
+            ]
+
+        items = list(self.query_appointments(limit=page_size + 1, cursor=cursor, **filters))
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            last = items[-1]
+            next_cursor = self._encode_cursor(getattr(last, order_by), last.appointment_id)
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def _encode_cursor(self, value, appointment_id):
+        return f"{value.isoformat()}|{appointment_id}"
+
+    def _decode_cursor(self, cursor):
+        try:
+            value, appointment_id = cursor.split('|', 1)
+            return datetime.datetime.fromisoformat(value), appointment_id
+        except ValueError:
+            raise ValueError('Cursor de paginação inválido')
+
+    # Atalhos mantidos por compatibilidade; todos delegam para query_appointments
     def get_all_appointments(self):
-        return self.db.session.query(Appointments).all()
+        return list(self.query_appointments())
     def get_appointments_by_user(self, user_id):
-        return self.db.session.query(Appointments).filter_by(user_id=user_id).all()
+        return list(self.query_appointments(user_id=user_id))
     def get_appointments_by_doctor(self, doctor_id):
-        return self.db.session.query(Appointments).filter_by(doctor_id=doctor_id).all()
+        return list(self.query_appointments(doctor_id=doctor_id))
     def get_appointments_by_date(self, appointment_date):
-        return self.db.session.query(Appointments).filter(Appointments.appointment_date == appointment_date).all()
+        return list(self.query_appointments(day=appointment_date))
     def change_appointment_status(self, appointment_id, status):
         appointment = self.get_appointment_by_id(appointment_id)
         if appointment:
@@ -63,95 +219,155 @@ class AppointmentsController:
             self.db.session.commit()
             return appointment
         return None
-    def increment_user_appointment_count(self, user_id):
-        user = self.db.session.query(User).filter_by(id=user_id).first()
-        if user:
-            user.appointment_count += 1
-            self.db.session.commit()
-            return user.appointment_count
-        return None
+    def increment_user_appointment_count(self, user_id, amount=1):
+        count = increment_counter(self.db.session, User, user_id, amount)
+        self.db.session.commit()
+        return count
     
-    def increment_doctor_appointment_count(self, doctor_id):
-        doctor = self.db.session.query(Doctors).filter_by(id=doctor_id).first()
-        if doctor:
-            doctor.appointment_count += 1
-            self.db.session.commit()
-            return doctor.appointment_count
-        return None
+    def increment_doctor_appointment_count(self, doctor_id, amount=1):
+        count = increment_counter(self.db.session, Doctors, doctor_id, amount)
+        self.db.session.commit()
+        return count
     def authenticate_appointment(self, user_id, doctor_id, appointment_date):
-        appointment = self.db.session.query(Appointments).filter_by(user_id=user_id, doctor_id=doctor_id, appointment_date=appointment_date).first()
-        return appointment if appointment else None
+        appointments = list(self.query_appointments(user_id=user_id, doctor_id=doctor_id, limit=1,
+                                                    conditions=[Appointments.appointment_date == appointment_date]))
+        return appointments[0] if appointments else None
     def get_appointments_by_status(self, status):
-        return self.db.session.query(Appointments).filter_by(status=status).all()
+        return list(self.query_appointments(status=status))
     def get_upcoming_appointments(self, user_id):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.appointment_date > db.func.now()).all()
+        return list(self.query_appointments(user_id=user_id, conditions=[Appointments.appointment_date > db.func.now()]))
     def get_past_appointments(self, user_id):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.appointment_date <= db.func.now()).all()
+        return list(self.query_appointments(user_id=user_id, conditions=[Appointments.appointment_date <= db.func.now()]))
     def get_appointments_by_user_and_date(self, user_id, appointment_date):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.appointment_date == appointment_date).all()
+        return list(self.query_appointments(user_id=user_id, day=appointment_date))
     def get_appointments_by_doctor_and_date(self, doctor_id, appointment_date):
-        return self.db.session.query(Appointments).filter(Appointments.doctor_id == doctor_id, Appointments.appointment_date == appointment_date).all()
+        return list(self.query_appointments(doctor_id=doctor_id, day=appointment_date))
     def get_appointments_by_user_and_doctor(self, user_id, doctor_id):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.doctor_id == doctor_id).all()
+        return list(self.query_appointments(user_id=user_id, doctor_id=doctor_id))
     def get_appointments_by_user_and_status(self, user_id, status):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.status == status).all()
+        return list(self.query_appointments(user_id=user_id, status=status))
     def get_appointments_by_doctor_and_status(self, doctor_id, status):
-        return self.db.session.query(Appointments).filter(Appointments.doctor_id == doctor_id, Appointments.status == status).all()
+        return list(self.query_appointments(doctor_id=doctor_id, status=status))
     def get_appointments_by_date_range(self, start_date, end_date):
-        return self.db.session.query(Appointments).filter(Appointments.appointment_date >= start_date, Appointments.appointment_date <= end_date).all()
+        return list(self.query_appointments(date_from=start_date, date_to=end_date))
     def get_appointments_by_user_and_date_range(self, user_id, start_date, end_date):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.appointment_date >= start_date, Appointments.appointment_date <= end_date).all()
+        return list(self.query_appointments(user_id=user_id, date_from=start_date, date_to=end_date))
     def get_appointments_by_doctor_and_date_range(self, doctor_id, start_date, end_date):
-        return self.db.session.query(Appointments).filter(Appointments.doctor_id == doctor_id, Appointments.appointment_date >= start_date, Appointments.appointment_date <= end_date).all()
+        return list(self.query_appointments(doctor_id=doctor_id, date_from=start_date, date_to=end_date))
     def get_appointments_by_user_doctor_and_date(self, user_id, doctor_id, appointment_date):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.doctor_id == doctor_id, Appointments.appointment_date == appointment_date).all()
+        return list(self.query_appointments(user_id=user_id, doctor_id=doctor_id, day=appointment_date))
     def get_appointments_by_user_doctor_and_status(self, user_id, doctor_id, status):
-        return self.db.session.query(Appointments).filter(Appointments.user_id == user_id, Appointments.doctor_id == doctor_id, Appointments.status == status).all()
+        return list(self.query_appointments(user_id=user_id, doctor_id=doctor_id, status=status))
     def get_doctors_patients(self, doctor_id):
         """Retorna uma lista de pacientes únicos do doutor com informações adicionais"""
-        from sqlalchemy import func, distinct
-        from datetime import datetime
-        
-        # Buscar pacientes únicos que têm consultas com este doutor
-        patients_data = self.db.session.query(
+        patients, cursor = [], None
+        while True:
+            page = self.get_doctors_patients_page(doctor_id, page_size=500, cursor=cursor)
+            patients.extend(page['patients'])
+            cursor = page['next_cursor']
+            if not cursor:
+                return patients
+
+    def get_doctors_patients_page(self, doctor_id, sort='name', descending=False, page_size=50, cursor=None):
+        """Página do rol de pacientes do doutor, ordenada e paginada por cursor (keyset).
+
+        Contagem de sessões e última consulta vêm de um agrupamento por paciente sobre
+        o índice (doctor_id, appointment_date); idade, telefone e data formatada são
+        calculados no próprio SELECT. total_estimate é o total de pacientes do rol
+        (count(*) over ()), disponível sem uma segunda consulta.
+        Retorna {'patients': [...], 'next_cursor': str ou None, 'total_estimate': int ou None}.
+        """
+        from datetime import date
+        from sqlalchemy import and_, case, extract, literal, or_, select
+
+        if sort not in self.ROSTER_SORTS:
+            raise ValueError(f'Ordenação inválida: {sort}')
+
+        roster = select(
+            Appointments.user_id,
+            func.count(Appointments.appointment_id).label('total_sessions'),
+            func.max(Appointments.appointment_date).label('last_appointment'),
+            func.count().over().label('total_estimate')
+        ).where(Appointments.doctor_id == doctor_id).group_by(Appointments.user_id).subquery()
+
+        today = date.today()
+        birthday_pending = case(
+            (extract('month', User.birth_date) * 100 + extract('day', User.birth_date) > today.month * 100 + today.day, 1),
+            else_=0
+        )
+        age = (literal(today.year) - extract('year', User.birth_date) - birthday_pending).label('age')
+        sort_column = {'name': User.name, 'last_appointment': roster.c.last_appointment,
+                       'total_sessions': roster.c.total_sessions}[sort]
+
+        query = select(
             User.id,
             User.name,
             User.email,
-            User.phone_number,
-            User.birth_date,
-            func.count(Appointments.appointment_id).label('total_sessions'),
-            func.max(Appointments.appointment_date).label('last_appointment')
-        ).join(
-            Appointments, User.id == Appointments.user_id
-        ).filter(
-            Appointments.doctor_id == doctor_id
-        ).group_by(
-            User.id, User.name, User.email, User.phone_number, User.birth_date
-        ).all()
-        
-        # Formatar dados para o template
-        patients = []
-        for patient_data in patients_data:
-            age = None
-            if patient_data.birth_date:
-                today = datetime.now().date()
-                age = today.year - patient_data.birth_date.year
-                if today.month < patient_data.birth_date.month or (today.month == patient_data.birth_date.month and today.day < patient_data.birth_date.day):
-                    age -= 1
-            
-            patients.append({
-                'id': patient_data.id,
-                'name': patient_data.name,
-                'email': patient_data.email,
-                'phone': patient_data.phone_number or 'Não informado',
-                'age': age or 'Não informado',
-                'total_sessions': patient_data.total_sessions,
-                'last_appointment': patient_data.last_appointment.strftime('%d/%m/%Y') if patient_data.last_appointment else 'Nunca',
+            func.coalesce(User.phone_number, 'Não informado').label('phone'),
+            age,
+            roster.c.total_sessions,
+            roster.c.last_appointment,
+            func.coalesce(self._format_date_sql(roster.c.last_appointment), 'Nunca').label('last_appointment_display'),
+            roster.c.total_estimate
+        ).join(roster, roster.c.user_id == User.id)
+
+        if cursor:
+            value, user_id = self._decode_roster_cursor(cursor, sort)
+            compare = (lambda column, other: column < other) if descending else (lambda column, other: column > other)
+            query = query.where(or_(compare(sort_column, value), and_(sort_column == value, compare(User.id, user_id))))
+        ordering = (sort_column.desc(), User.id.desc()) if descending else (sort_column, User.id)
+        rows = self.db.session.execute(query.order_by(*ordering).limit(page_size + 1)).all()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = self._encode_roster_cursor(getattr(last, sort), last.id)
+
+        return {
+            'patients': [{
+                'id': row.id,
+                'name': row.name,
+                'email': row.email,
+                'phone': row.phone,
+                'age': row.age if row.age is not None else 'Não informado',
+                'total_sessions': row.total_sessions,
+                'last_appointment': row.last_appointment_display,
                 'status': 'active'  # Por padrão, consideramos ativo
-            })
-        
-        return patients
-    
+            } for row in rows],
+            'next_cursor': next_cursor,
+            'total_estimate': rows[0].total_estimate if rows else None
+        }
+
+    def _format_date_sql(self, column):
+        """Data no formato DD/MM/AAAA calculada pelo banco"""
+        dialect = self.db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return func.to_char(column, 'DD/MM/YYYY')
+        if dialect in ('mysql', 'mariadb'):
+            return func.date_format(column, '%d/%m/%Y')
+        return func.strftime('%d/%m/%Y', column)
+
+    def _encode_roster_cursor(self, value, user_id):
+        import base64
+        import json
+
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, user_id]).encode('utf-8')).decode('ascii')
+
+    def _decode_roster_cursor(self, cursor, sort):
+        import base64
+        import json
+
+        try:
+            value, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if sort == 'last_appointment':
+                value = datetime.datetime.fromisoformat(value)
+            return value, user_id
+        except (ValueError, TypeError):
+            raise ValueError('Cursor de paginação inválido')
+
     def get_todays_appointments(self, doctor_id):
         """Retorna as consultas de hoje para o doutor"""
         from datetime import datetime, date
@@ -168,7 +384,7 @@ class AppointmentsController:
             User, Appointments.user_id == User.id
         ).filter(
             Appointments.doctor_id == doctor_id,
-            func.date(Appointments.appointment_date) == today
+            on_day(Appointments.appointment_date, today)
         ).order_by(Appointments.appointment_date).all()
         
         # Formatar dados para o template
@@ -186,49 +402,100 @@ class AppointmentsController:
         return formatted_appointments
     
     def get_monthly_stats(self, doctor_id):
-        """Retorna estatísticas mensais do doutor"""
+        """Retorna estatísticas mensais do doutor em uma única consulta agregada.
+
+        Todos os filtros de data são intervalos semiabertos (>= início AND < fim)
+        sobre appointment_date, para que o banco possa usar índices na coluna.
+        - new_patients_month: pacientes cuja primeira consulta com o doutor foi neste mês
+        - available_slots: slots livres de hoje até o fim do mês (inclui regras de disponibilidade)
+        - attendance_rate: % de consultas realizadas entre realizadas e faltas do mês
+        - earnings_month: soma dos preços (em centavos) dos slots reservados do mês, em reais
+        """
         from datetime import datetime, date, timedelta
-        from calendar import monthrange
-        
+        from sqlalchemy import case, select
+        from sqlalchemy.orm import aliased
+        from models.slots import Slots
+
         today = date.today()
-        month_start = today.replace(day=1)
-        # Encontrar o último dia do mês
-        _, last_day = monthrange(today.year, today.month)
-        month_end = today.replace(day=last_day)
-        
-        # Consultas do mês
-        total_appointments_month = self.db.session.query(Appointments).filter(
-            Appointments.doctor_id == doctor_id,
-            func.date(Appointments.appointment_date) >= month_start,
-            func.date(Appointments.appointment_date) <= month_end
-        ).count()
-        
-        # Consultas de hoje
-        appointments_today = self.db.session.query(Appointments).filter(
+        month_start, next_month_start = month_range(today)
+        in_this_month = in_range(Appointments.appointment_date, month_start, next_month_start)
+        in_today = in_range(Appointments.appointment_date, *day_range(today))
+        month = select(
+            func.count(Appointments.appointment_id).label('total_appointments_month'),
+            func.coalesce(func.sum(case((in_today, 1), else_=0)), 0).label('appointments_today'),
+            func.count(distinct(Appointments.user_id)).label('active_patients'),
+            func.coalesce(func.sum(case((Appointments.status.in_(self.ATTENDED_STATUS), 1), else_=0)), 0).label('attended'),
+            func.coalesce(func.sum(case((Appointments.status.in_(self.MISSED_STATUS), 1), else_=0)), 0).label('missed')
+        ).where(
             Appointments.doctor_id == doctor_id,
-            func.date(Appointments.appointment_date) == today
-        ).count()
-        
-        # Pacientes ativos (únicos do mês)
-        active_patients = self.db.session.query(func.count(func.distinct(Appointments.user_id))).filter(
+            in_this_month
+        ).subquery()
+
+        # Pacientes do mês sem nenhuma consulta anterior com o doutor
+        earlier = aliased(Appointments)
+        new_patients = select(func.count(distinct(Appointments.user_id))).where(
             Appointments.doctor_id == doctor_id,
-            func.date(Appointments.appointment_date) >= month_start,
-            func.date(Appointments.appointment_date) <= month_end
-        ).scalar() or 0
-        
-        # Novos pacientes do mês (primeira consulta no mês)
-        # Por simplicidade, vamos contar todos os pacientes únicos do mês
-        new_patients_month = max(0, active_patients - 5)  # Estimativa simples
-        
+            in_this_month,
+            ~select(earlier.appointment_id).where(
+                earlier.user_id == Appointments.user_id,
+                earlier.doctor_id == doctor_id,
+                earlier.appointment_date < month_start
+            ).exists()
+        ).scalar_subquery()
+
+        open_slots = select(func.count(Slots.slot_id)).where(
+            Slots.doctor_id == doctor_id,
+            Slots.is_booked == False,
+            Slots.appointment_date >= today,
+            Slots.appointment_date < next_month_start.date()
+        ).scalar_subquery()
+
+        earnings = select(func.coalesce(func.sum(Slots.price), 0)).where(
+            Slots.doctor_id == doctor_id,
+            Slots.is_booked == True,
+            Slots.appointment_date >= month_start.date(),
+            Slots.appointment_date < next_month_start.date()
+        ).scalar_subquery()
+
+        row = self.db.session.execute(select(
+            month,
+            new_patients.label('new_patients_month'),
+            open_slots.label('open_slots'),
+            earnings.label('earnings_cents')
+        )).one()
+
+        attendance_total = row.attended + row.missed
         return {
-            'appointments_today': appointments_today,
-            'active_patients': active_patients,
-            'total_appointments_month': total_appointments_month,
-            'new_patients_month': new_patients_month,
-            'available_slots': 12,  # Será calculado depois
-            'attendance_rate': 95,  # Será calculado depois
-            'earnings_month': 0.0   # Será calculado depois
+            'appointments_today': row.appointments_today,
+            'active_patients': row.active_patients,
+            'total_appointments_month': row.total_appointments_month,
+            'new_patients_month': row.new_patients_month,
+            'available_slots': row.open_slots + self._count_rule_slots(
+                doctor_id, today, next_month_start.date() - timedelta(days=1)
+            ),
+            'attendance_rate': round(100 * row.attended / attendance_total) if attendance_total else 0,
+            'earnings_month': row.earnings_cents / 100
         }
+
+    def _count_rule_slots(self, doctor_id, date_from, date_to):
+        """Ocorrências de regras de disponibilidade sem slot persistido no mesmo horário"""
+        from controllers.availability_controller import AvailabilityController
+        from models.slots import Slots
+
+        availability = AvailabilityController()
+        rules = availability.get_active_rules(doctor_id, date_from, date_to)
+        if not rules:
+            return 0
+        taken = set(self.db.session.query(Slots.appointment_date, Slots.start_time).filter(
+            Slots.doctor_id == doctor_id,
+            Slots.appointment_date >= date_from,
+            Slots.appointment_date <= date_to
+        ).all())
+        return sum(
+            1 for slot in availability.expand_rules(rules, date_from, date_to)
+            if (slot.appointment_date, slot.start_time) not in taken
+        )
+
     def get_yesterdays_appointments(self, doctor_id):
         """Retorna as consultas de ontem para o doutor"""
         from datetime import datetime, timedelta
@@ -245,7 +512,7 @@ class AppointmentsController:
             User, Appointments.user_id == User.id
         ).filter(
             Appointments.doctor_id == doctor_id,
-            func.date(Appointments.appointment_date) == yesterday.date()
+            on_day(Appointments.appointment_date, yesterday.date())
         ).order_by(Appointments.appointment_date).all()
         
         # Formatar dados para o template
@@ -270,7 +537,7 @@ class AppointmentsController:
         
         count = self.db.session.query(Appointments).filter(
             Appointments.doctor_id == doctor_id,
-            func.date(Appointments.appointment_date) == yesterday.date()
+            on_day(Appointments.appointment_date, yesterday.date())
         ).count()
         
         return count
\ No newline at end of file
@@ -0,0 +1,117 @@
+from db import db
+from models.availability_rules import AvailabilityRules
+from models.slots import Slots
+from sqlalchemy import or_
+import uuid
+
+class AvailabilityController:
+    # Janela máxima de expansão para regras sem data de término
+    RULE_HORIZON_DAYS = 90
+
+    def __init__(self):
+        self.db = db
+
+    def get_rule_by_id(self, rule_id):
+        return self.db.session.query(AvailabilityRules).filter_by(rule_id=rule_id).first()
+
+    def get_rules_by_doctor(self, doctor_id):
+        return self.db.session.query(AvailabilityRules).filter_by(doctor_id=doctor_id).order_by(AvailabilityRules.valid_from).all()
+
+    def create_rule(self, doctor_id, weekdays, start_times, valid_from, valid_until=None, duration=50,
+                    appointment_type=None, price=None, notes=None, exception_dates=None):
+        new_rule = AvailabilityRules(
+            rule_id=str(uuid.uuid4())[:20],
+            doctor_id=doctor_id,
+            weekdays=','.join(str(day) for day in sorted(set(weekdays))),
+            start_times=','.join(sorted({start_time.strftime('%H:%M') for start_time in start_times})),
+            duration=duration,
+            appointment_type=appointment_type,
+            price=price,
+            notes=notes,
+            valid_from=valid_from,
+            valid_until=valid_until,
+            exception_dates=','.join(day.strftime('%Y-%m-%d') for day in sorted(exception_dates or []))
+        )
+        self.db.session.add(new_rule)
+        self.db.session.commit()
+        return new_rule
+
+    def update_rule(self, rule_id, **kwargs):
+        rule = self.get_rule_by_id(rule_id)
+        if rule:
+            for key, value in kwargs.items():
+                setattr(rule, key, value)
+            self.db.session.commit()
+            return rule
+        return None
+
+    def delete_rule(self, rule_id):
+        rule = self.get_rule_by_id(rule_id)
+        if rule:
+            self.db.session.delete(rule)
+            self.db.session.commit()
+            return True
+        return False
+
+    def add_exception_date(self, rule_id, day):
+        """Remove uma data específica da regra (feriado, folga) sem tocar nas demais"""
+        rule = self.get_rule_by_id(rule_id)
+        if rule:
+            exceptions = rule.exception_set | {day}
+            rule.exception_dates = ','.join(d.strftime('%Y-%m-%d') for d in sorted(exceptions))
+            self.db.session.commit()
+            return rule
+        return None
+
+    def get_active_rules(self, doctor_ids, date_from, date_to):
+        """Regras dos médicos com vigência dentro da janela [date_from, date_to]"""
+        if isinstance(doctor_ids, str):
+            doctor_ids = [doctor_ids]
+        return self.db.session.query(AvailabilityRules).filter(
+            AvailabilityRules.doctor_id.in_(doctor_ids),
+            AvailabilityRules.valid_from <= date_to,
+            or_(AvailabilityRules.valid_until.is_(None), AvailabilityRules.valid_until >= date_from)
+        ).all()
+
+    def expand_rules(self, rules, date_from, date_to):
+        """Gera os horários virtuais (Slots transitórios, não persistidos) das regras na janela"""
+        from datetime import datetime, timedelta
+
+        virtual_slots = {}
+        for rule in rules:
+            times = rule.time_list
+            for day in rule.days(date_from, date_to):
+                for start_time in times:
+                    key = (rule.doctor_id, day, start_time)
+                    if key in virtual_slots:
+                        continue
+                    end_time = (datetime.combine(day, start_time) + timedelta(minutes=rule.duration)).time()
+                    virtual_slots[key] = Slots(
+                        slot_id=rule.virtual_slot_id(day, start_time),
+                        doctor_id=rule.doctor_id,
+                        appointment_date=day,
+                        start_time=start_time,
+                        end_time=end_time,
+                        appointment_type=rule.appointment_type,
+                        price=rule.price,
+                        notes=rule.notes,
+                        is_booked=False
+                    )
+        return [virtual_slots[key] for key in sorted(virtual_slots)]
+
+    def parse_virtual_slot_id(self, slot_id):
+        """Decompõe 'rule-<rule_id>-<AAAAMMDD>-<HHMM>' em (regra, data, horário)"""
+        from datetime import datetime
+
+        if not slot_id or not slot_id.startswith('rule-'):
+            return None
+        try:
+            rule_id, day, start = slot_id[len('rule-'):].rsplit('-', 2)
+            day = datetime.strptime(day, '%Y%m%d').date()
+            start_time = datetime.strptime(start, '%H%M').time()
+        except ValueError:
+            return None
+        rule = self.get_rule_by_id(rule_id)
+        if not rule or not rule.occurs_at(day, start_time):
+            return None
+        return rule, day, start_time
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+Versão da disponibilidade por médico (doctors.availability_version)
+
+Contador monotônico incrementado na mesma transação de qualquer alteração nos
+slots ou nas regras de disponibilidade do médico. Entra no ETag de
+/available_times: o updated_at sozinho não basta, porque no SQLite func.now()
+tem resolução de um segundo e uma reserva no mesmo segundo passaria despercebida.
+"""
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from models.doctors import Doctors
+from models.slots import Slots
+from models.availability_rules import AvailabilityRules
+
+
+def bump_availability_version(session, doctor_ids):
+    """Incrementa a versão da disponibilidade dos médicos informados"""
+    doctor_ids = sorted({doctor_id for doctor_id in doctor_ids if doctor_id})
+    if doctor_ids:
+        session.execute(
+            update(Doctors).where(Doctors.id.in_(doctor_ids))
+            .values(availability_version=Doctors.availability_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, 'after_flush')
+def maintain_availability_version(session, flush_context):
+    """Incrementa, na mesma transação, a versão dos médicos cujos slots ou regras o flush alterou.
+
+    INSERT/UPDATE/DELETE em lote executados fora da unidade de trabalho não passam
+    por aqui; quem os executa deve chamar bump_availability_version.
+    """
+    doctor_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Slots, AvailabilityRules)):
+            history = get_history(obj, 'doctor_id')
+            doctor_ids.update((*history.added, *history.unchanged, *history.deleted))
+    bump_availability_version(session, doctor_ids)
@@ -0,0 +1,142 @@
+"""
+Cache em memória por processo para leituras agregadas
+
+Os valores expiram após `ttl` segundos (None = sem expiração) ou quando
+invalidados explicitamente pelos eventos de escrita que os afetam. A invalidação
+só alcança o processo que fez a escrita: com vários workers, os demais servem o
+valor antigo até o `ttl`, que deve ser escolhido com isso em mente.
+"""
+
+import threading
+import time
+
+
+class TTLCache:
+    def __init__(self, ttl=None, max_size=1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._values = {}
+        self._tags = {}
+        self._key_tags = {}
+        self._next_sweep = None
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._discard(key)
+                return default
+            return value
+
+    def set(self, key, value, tags=()):
+        """Guarda `value`; `tags` permitem invalidar a chave junto com outras (ver invalidate_tags)"""
+        now = time.monotonic()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._discard(key)
+            self._prune(now)
+            self._values[key] = (value, expires_at)
+            if tags:
+                self._key_tags[key] = set(tags)
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+        return value
+
+    def invalidate(self, key=None):
+        """Remove uma chave, ou todas quando `key` é None"""
+        with self._lock:
+            if key is None:
+                self._values.clear()
+                self._tags.clear()
+                self._key_tags.clear()
+            else:
+                self._discard(key)
+
+    def invalidate_tags(self, tags):
+        """Remove todas as chaves guardadas com alguma das `tags`"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._discard(key)
+
+    def __len__(self):
+        return len(self._values)
+
+    def _discard(self, key):
+        # Remove a chave e suas referências nas tags (chamado com o lock adquirido)
+        self._values.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _prune(self, now):
+        # Varre as chaves expiradas no máximo uma vez por ttl, ou quando o cache enche;
+        # se ainda estiver cheio, descarta as chaves mais antigas
+        full = self.max_size is not None and len(self._values) >= self.max_size
+        if self.ttl is not None and (full or self._next_sweep is None or now >= self._next_sweep):
+            self._next_sweep = now + self.ttl
+            for key in [key for key, (_, expires_at) in self._values.items() if expires_at <= now]:
+                self._discard(key)
+        if self.max_size is not None:
+            while len(self._values) >= self.max_size:
+                self._discard(next(iter(self._values)))
+
+
+def invalidate_on_commit(cache, *models, tags=None):
+    """Invalida `cache` ao final de toda transação que alterou algum dos `models`.
+
+    Captura tanto alterações via unidade de trabalho (add/delete/atributos) quanto
+    INSERT/UPDATE/DELETE em lote executados pela sessão. A invalidação só ocorre
+    no commit, para que leitores concorrentes não recoloquem no cache dados ainda
+    não confirmados.
+
+    Com `tags`, uma função objeto -> tags afetadas, objetos alterados pela unidade
+    de trabalho invalidam só as chaves com essas tags; operações em lote, que não
+    expõem os objetos, continuam invalidando o cache inteiro.
+    """
+    from itertools import chain
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    def mark(session, affected=None):
+        pending = session.info.setdefault('invalidate_caches', {})
+        if affected is None or pending.get(cache, set()) is None:
+            pending[cache] = None
+        else:
+            pending.setdefault(cache, set()).update(affected)
+
+    @event.listens_for(Session, 'after_flush')
+    def after_flush(session, flush_context):
+        changed = [obj for obj in chain(session.new, session.dirty, session.deleted) if isinstance(obj, models)]
+        if not changed:
+            return
+        if tags is None:
+            mark(session)
+        else:
+            mark(session, {tag for obj in changed for tag in tags(obj)})
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def do_orm_execute(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            mapper = orm_execute_state.bind_mapper
+            if mapper is not None and issubclass(mapper.class_, models):
+                mark(orm_execute_state.session)
+
+    @event.listens_for(Session, 'after_commit')
+    def after_commit(session):
+        for pending, affected in session.info.pop('invalidate_caches', {}).items():
+            if affected is None:
+                pending.invalidate()
+            else:
+                pending.invalidate_tags(affected)
+
+    @event.listens_for(Session, 'after_rollback')
+    def after_rollback(session):
+        session.info.pop('invalidate_caches', None)
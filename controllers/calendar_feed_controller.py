@@ -0,0 +1,173 @@
+from db import db
+from models.doctors import Doctors
+from models.appointments import Appointments
+from dashboard_psi.models import Paciente, Agenda
+from controllers.freebusy_controller import DEFAULT_DURATION
+from sqlalchemy import func, literal, null, select, union_all
+from datetime import datetime, timedelta
+import secrets
+
+FEED_PAST_DAYS = 30
+FEED_DAYS = 180
+FEED_MAX_DAYS = 366
+
+
+class CalendarFeedController:
+    """Feed iCalendar (.ics) da agenda do psicólogo, acessado por um token secreto.
+
+    O token fica em doctors.calendar_token e pode ser regenerado para revogar
+    URLs antigas. Os eventos vêm de Agenda e Appointments, lidos em lotes
+    (yield_per) e emitidos um a um, sem materializar o calendário.
+    """
+    AGENDA_STATUS = {'confirmada': 'CONFIRMED', 'cancelada': 'CANCELLED'}
+    APPOINTMENT_STATUS = {'cancelled': 'CANCELLED', 'canceled': 'CANCELLED', 'cancelada': 'CANCELLED'}
+
+    def __init__(self):
+        self.db = db
+
+    def get_or_create_token(self, doctor_id):
+        doctor = self.db.session.get(Doctors, doctor_id)
+        if doctor is None:
+            return None
+        if not doctor.calendar_token:
+            return self.regenerate_token(doctor_id)
+        return doctor.calendar_token
+
+    def regenerate_token(self, doctor_id):
+        """Gera um novo token; a URL anterior deixa de funcionar"""
+        doctor = self.db.session.get(Doctors, doctor_id)
+        if doctor is None:
+            return None
+        doctor.calendar_token = secrets.token_urlsafe(32)
+        self.db.session.commit()
+        return doctor.calendar_token
+
+    def get_doctor_id_by_token(self, token):
+        if not token:
+            return None
+        return self.db.session.execute(
+            select(Doctors.id).where(Doctors.calendar_token == token)
+        ).scalar_one_or_none()
+
+    def feed_window(self, past_days=FEED_PAST_DAYS, days=FEED_DAYS, now=None):
+        """Intervalo [início, fim) do feed, limitado a FEED_MAX_DAYS em cada direção"""
+        today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        past_days = min(max(past_days, 0), FEED_MAX_DAYS)
+        days = min(max(days, 1), FEED_MAX_DAYS)
+        return today - timedelta(days=past_days), today + timedelta(days=days)
+
+    def get_feed_version(self, doctor_id, start, end):
+        """(última alteração, assinatura) dos eventos da janela, para ETag e Last-Modified.
+
+        A contagem entra na assinatura para que remoções também mudem a versão.
+        """
+        def stats(model, doctor_column, date_column):
+            window = select(model).where(doctor_column == doctor_id, date_column >= start, date_column < end).subquery()
+            return (select(func.max(window.c.updated_at)).scalar_subquery(),
+                    select(func.count()).select_from(window).scalar_subquery())
+
+        agenda_updated, agenda_count = stats(Agenda, Agenda.psicologo_id, Agenda.data_hora)
+        appointments_updated, appointments_count = stats(Appointments, Appointments.doctor_id, Appointments.appointment_date)
+        # O resumo do evento usa as iniciais do paciente
+        pacientes_updated = select(func.max(Paciente.updated_at)).where(Paciente.psicologo_id == doctor_id).scalar_subquery()
+        row = self.db.session.execute(select(
+            agenda_updated, agenda_count, appointments_updated, appointments_count, pacientes_updated
+        )).one()
+
+        updated = [value for value in (row[0], row[2], row[4]) if value is not None]
+        last_modified = max(updated) if updated else None
+        signature = f'{doctor_id}|{start:%Y%m%d}|{end:%Y%m%d}|{row[0]}|{row[1]}|{row[2]}|{row[3]}|{row[4]}'
+        return last_modified, signature
+
+    def iter_events(self, doctor_id, start, end, yield_per=500):
+        """Eventos da janela em ordem de início, como dicts, lidos em lotes de `yield_per`.
+
+        Agenda e Appointments vêm de um único UNION ALL ordenado, para que um só
+        cursor seja percorrido (alguns drivers não intercalam dois cursores em fluxo).
+        """
+        agenda = (select(
+            literal('agenda').label('kind'), Agenda.id.label('id'), Agenda.data_hora.label('start'),
+            Agenda.status.label('status'), Agenda.local.label('location'), Agenda.updated_at.label('updated_at'),
+            Paciente.nome_completo.label('name')
+        ).join(Paciente, Agenda.paciente_id == Paciente.id)
+         .where(Agenda.psicologo_id == doctor_id, Agenda.data_hora >= start, Agenda.data_hora < end))
+        appointments = select(
+            literal('appointment'), Appointments.appointment_id, Appointments.appointment_date,
+            Appointments.status, null(), Appointments.updated_at, null()
+        ).where(Appointments.doctor_id == doctor_id,
+                Appointments.appointment_date >= start, Appointments.appointment_date < end)
+        events = union_all(agenda, appointments).subquery()
+        rows = self.db.session.execute(
+            select(events).order_by(events.c.start, events.c.id).execution_options(yield_per=yield_per)
+        )
+
+        for row in rows:
+            if row.kind == 'agenda':
+                summary = f'Sessão - {self._initials(row.name)}'
+                status = self.AGENDA_STATUS.get(row.status)
+            else:
+                summary = 'Consulta agendada pela plataforma'
+                status = self.APPOINTMENT_STATUS.get(row.status)
+            yield {
+                'uid': f'{row.kind}-{row.id}',
+                'start': row.start,
+                'summary': summary,
+                'location': row.location,
+                'status': status,
+                'updated_at': row.updated_at
+            }
+
+    def iter_ics(self, doctor_id, start, end, yield_per=500):
+        """Gera o documento iCalendar em pedaços (um por evento)"""
+        yield self._lines(
+            'BEGIN:VCALENDAR',
+            'VERSION:2.0',
+            'PRODID:-//Pecci Cuidado Integrado//Agenda//PT-BR',
+            'CALSCALE:GREGORIAN',
+            'METHOD:PUBLISH',
+            'X-WR-CALNAME:Agenda - Pecci Cuidado Integrado',
+            'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+        )
+        stamp = datetime.utcnow()
+        for event in self.iter_events(doctor_id, start, end, yield_per):
+            lines = [
+                'BEGIN:VEVENT',
+                f"UID:{event['uid']}@pecci-cuidado-integrado",
+                f"DTSTAMP:{(event['updated_at'] or stamp):%Y%m%dT%H%M%S}Z",
+                # Horários sem fuso ("floating"): exibidos no fuso do calendário do psicólogo
+                f"DTSTART:{event['start']:%Y%m%dT%H%M%S}",
+                f"DTEND:{event['start'] + timedelta(minutes=DEFAULT_DURATION):%Y%m%dT%H%M%S}",
+                f"SUMMARY:{self._escape(event['summary'])}",
+            ]
+            if event['location']:
+                lines.append(f"LOCATION:{self._escape(event['location'])}")
+            if event['status']:
+                lines.append(f"STATUS:{event['status']}")
+            lines.append('END:VEVENT')
+            yield self._lines(*lines)
+        yield self._lines('END:VCALENDAR')
+
+    @staticmethod
+    def _initials(name):
+        # O feed é sincronizado com serviços externos: sem nome completo nem observações
+        return ''.join(f'{part[0].upper()}.' for part in (name or '').split() if part[0].isalpha()) or '-'
+
+    @staticmethod
+    def _escape(text):
+        return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+                .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+    @staticmethod
+    def _lines(*lines):
+        """Linhas terminadas em CRLF e dobradas em 75 octetos (RFC 5545, 3.1)"""
+        folded = []
+        for line in lines:
+            data = line.encode('utf-8')
+            while len(data) > 75:
+                cut = 75
+                while (data[cut] & 0xC0) == 0x80:  # não quebrar um caractere UTF-8 ao meio
+                    cut -= 1
+                folded.append(data[:cut])
+                data = b' ' + data[cut:]
+            folded.append(data)
+        return b'\r\n'.join(folded) + b'\r\n'
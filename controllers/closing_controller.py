@@ -0,0 +1,89 @@
+from db import db
+from models.appointments import Appointments
+from dashboard_psi.models import Agenda
+from controllers.stats_controller import StatsController
+from controllers.paciente_summary_controller import PacienteSummaryController
+from sqlalchemy import select, update
+from datetime import datetime
+import time
+
+AGENDA_OPEN_STATUS = ('agendada', 'confirmada')
+AGENDA_CLOSED_STATUS = ('concluida', 'faltou')
+APPOINTMENT_OPEN_STATUS = ('scheduled', 'confirmed')
+APPOINTMENT_CLOSED_STATUS = ('completed', 'no_show')
+
+
+class ClosingController:
+    """Fechamento de agendamentos e consultas que já passaram.
+
+    Entradas de Agenda ainda 'agendada'/'confirmada' e Appointments ainda
+    'scheduled'/'confirmed' com início anterior ao corte recebem um status final
+    (realizada ou falta), para que as métricas de comparecimento possam ser
+    calculadas direto pelo status.
+    """
+
+    def __init__(self):
+        self.db = db
+
+    def close_past_due(self, before=None, agenda_status='concluida', appointment_status='completed', batch_size=1000):
+        """Aplica o status final às entradas com início anterior a `before` (padrão: hoje, 00:00).
+
+        Cada lote de até `batch_size` linhas é um UPDATE em conjunto na sua própria
+        transação. Como UPDATEs em lote não passam pelos listeners de resumo, as linhas
+        (médico, dia) do resumo diário e a próxima consulta dos pacientes tocados são
+        recalculadas na mesma transação.
+        Retorna um relatório com as linhas fechadas por tabela, lotes e tempo decorrido.
+        """
+        if agenda_status not in AGENDA_CLOSED_STATUS:
+            raise ValueError(f'Status final inválido para a agenda: {agenda_status}')
+        if appointment_status not in APPOINTMENT_CLOSED_STATUS:
+            raise ValueError(f'Status final inválido para consultas: {appointment_status}')
+
+        before = before or datetime.combine(datetime.now().date(), datetime.min.time())
+        report = {'agenda': 0, 'appointments': 0, 'batches': 0, 'elapsed': 0.0, 'rows_per_second': 0.0}
+        started = time.perf_counter()
+
+        sources = (
+            ('agenda', Agenda, Agenda.id, Agenda.psicologo_id, Agenda.data_hora, Agenda.paciente_id,
+             AGENDA_OPEN_STATUS, agenda_status),
+            ('appointments', Appointments, Appointments.appointment_id, Appointments.doctor_id,
+             Appointments.appointment_date, None, APPOINTMENT_OPEN_STATUS, appointment_status),
+        )
+        for name, model, id_column, doctor_column, date_column, paciente_column, open_status, closed_status in sources:
+            columns = [id_column, doctor_column, date_column]
+            if paciente_column is not None:
+                columns.append(paciente_column)
+            while True:
+                rows = self.db.session.execute(
+                    select(*columns).where(
+                        model.status.in_(open_status),
+                        date_column < before
+                    ).order_by(date_column).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                try:
+                    closed = self.db.session.execute(
+                        update(model)
+                        .where(id_column.in_([row[0] for row in rows]), model.status.in_(open_status))
+                        .values(status=closed_status)
+                        .execution_options(synchronize_session=False)
+                    ).rowcount
+                    StatsController().refresh({(row[1], row[2].date()) for row in rows})
+                    if paciente_column is not None:
+                        PacienteSummaryController().refresh({row[3] for row in rows})
+                    self.db.session.commit()
+                except Exception:
+                    self.db.session.rollback()
+                    raise
+
+                report[name] += closed
+                report['batches'] += 1
+                if len(rows) < batch_size:
+                    break
+
+        report['elapsed'] = time.perf_counter() - started
+        if report['elapsed'] > 0:
+            report['rows_per_second'] = (report['agenda'] + report['appointments']) / report['elapsed']
+        return report
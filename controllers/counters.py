@@ -0,0 +1,47 @@
+"""
+Contadores desnormalizados de consultas (users.appointment_count e doctors.appointment_count)
+
+Os incrementos são feitos no banco com `SET coluna = coluna + n`, sem ler a linha
+antes, para não perder atualizações entre workers concorrentes. `reconcile_counters`
+recalcula os valores a partir de Appointments caso algum caminho os tenha desviado.
+"""
+
+from sqlalchemy import func, select, update
+
+from models.appointments import Appointments
+from models.doctors import Doctors
+from models.user import User
+
+# Modelo -> coluna de Appointments que o referencia
+COUNTED_MODELS = {
+    User: Appointments.user_id,
+    Doctors: Appointments.doctor_id,
+}
+
+
+def increment_counter(session, model, object_id, amount=1):
+    """Soma `amount` ao appointment_count da linha. Retorna o novo valor, ou None se ela não existe"""
+    counter = model.appointment_count
+    statement = update(model).where(model.id == object_id).values({counter: counter + amount})
+    if session.get_bind().dialect.update_returning:
+        return session.execute(statement.returning(counter)).scalar_one_or_none()
+    # Sem RETURNING (MySQL): o valor lido depois do UPDATE já inclui o incremento
+    if not session.execute(statement).rowcount:
+        return None
+    return session.execute(select(counter).where(model.id == object_id)).scalar_one()
+
+
+def reconcile_counters(session):
+    """Recalcula os contadores em um UPDATE por tabela. Retorna {tabela: linhas corrigidas}"""
+    corrected = {}
+    for model, foreign_key in COUNTED_MODELS.items():
+        actual = (select(func.count()).select_from(Appointments)
+                  .where(foreign_key == model.id).scalar_subquery())
+        result = session.execute(
+            update(model).where(model.appointment_count != actual)
+            .values(appointment_count=actual)
+            .execution_options(synchronize_session=False)
+        )
+        corrected[model.__tablename__] = result.rowcount
+    session.commit()
+    return corrected
@@ -0,0 +1,61 @@
+"""
+Intervalos de datas semiabertos para filtros sobre colunas DateTime
+
+Filtrar com func.date(coluna) == dia impede o uso de índices na coluna; estes
+helpers convertem dias e períodos em predicados `coluna >= início AND coluna < fim`.
+"""
+
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_
+
+
+def start_of_day(day):
+    """Início (00:00) do dia; datetimes são truncados para o próprio dia"""
+    if isinstance(day, datetime):
+        day = day.date()
+    return datetime.combine(day, time.min)
+
+
+def day_range(day):
+    """Intervalo [00:00 do dia, 00:00 do dia seguinte)"""
+    start = start_of_day(day)
+    return start, start + timedelta(days=1)
+
+
+def period_range(date_from, date_to):
+    """Intervalo que cobre os dias date_from..date_to inteiros (ambos inclusive)"""
+    return start_of_day(date_from), start_of_day(date_to) + timedelta(days=1)
+
+
+def month_range(day):
+    """Intervalo [1º dia do mês, 1º dia do mês seguinte)"""
+    start = start_of_day(day).replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1)
+
+
+def in_range(column, start, end):
+    """Predicado sargável `column >= start AND column < end`"""
+    return and_(column >= start, column < end)
+
+
+def on_day(column, day):
+    """Filtro para um dia inteiro, ou igualdade exata quando `day` é um datetime"""
+    if isinstance(day, datetime):
+        return column == day
+    return in_range(column, *day_range(day))
+
+
+def between(column, start=None, end=None):
+    """Filtro para um período com limites inclusivos (`column >= start AND column <= end`).
+
+    Datas valem como 00:00 do dia, como nas comparações diretas com a coluna
+    DateTime que este filtro substitui; para cobrir o último dia inteiro, use
+    period_range. Qualquer um dos limites pode ser None (período aberto daquele lado).
+    """
+    conditions = []
+    if start is not None:
+        conditions.append(column >= (start if isinstance(start, datetime) else start_of_day(start)))
+    if end is not None:
+        conditions.append(column <= (end if isinstance(end, datetime) else start_of_day(end)))
+    return and_(*conditions)
@@ -3,10 +3,25 @@ from models.appointments import Appointments
 from models.user import User
 from models.doctors import Doctors
 from models.slots import Slots
+from models.availability_rules import AvailabilityRules
 from controllers.slot_controller import SlotsController
+from controllers.availability_controller import AvailabilityController
+from controllers.cache import TTLCache, invalidate_on_commit
+from controllers.counters import increment_counter
+from sqlalchemy import case, func, or_, select
 import uuid
 
+# Resumo de disponibilidade do diretório público: recalculado quando slots ou
+# regras mudam e a cada minuto, para que horários que já passaram saiam dele. A
+# invalidação vale só para o worker que gravou; os demais podem mostrar um horário
+# recém-reservado por até `ttl` segundos (a reserva em si é validada no banco)
+availability_summary_cache = TTLCache(ttl=60)
+invalidate_on_commit(availability_summary_cache, Slots, AvailabilityRules)
+
 class DoctorsController:
+    # Dias cobertos pelo resumo de disponibilidade (get_availability_summary)
+    SUMMARY_DAYS = 14
+
     def __init__(self):
         self.db = db
 
@@ -57,13 +72,10 @@ class DoctorsController:
     def get_doctor_appointments(self, doctor_id):
         return self.db.session.query(Appointments).filter_by(doctor_id=doctor_id).all()
     
-    def increment_appointment_count(self, doctor_id):
-        doctor = self.get_doctor_by_id(doctor_id)
-        if doctor:
-            doctor.appointment_count += 1
-            self.db.session.commit()
-            return doctor.appointment_count
-        return None
+    def increment_appointment_count(self, doctor_id, amount=1):
+        count = increment_counter(self.db.session, Doctors, doctor_id, amount)
+        self.db.session.commit()
+        return count
 
     def get_doctor_by_specialty(self, specialty):
         return self.db.session.query(Doctors).filter_by(specialty=specialty).all()
@@ -72,12 +84,84 @@ class DoctorsController:
         doctor = self.db.session.query(Doctors).filter_by(email=email, password=password).first()
         return doctor if doctor else None
     
-    def doctor_free_slots(self, doctor_id):
+    def doctor_free_slots(self, doctor_id, date_from=None, date_to=None, page_size=14, page=1):
         doctor = self.get_doctor_by_id(doctor_id)
         if doctor:
-            return SlotsController().get_free_slots_by_doctor(doctor_id)
+            return SlotsController().get_free_slots_window(
+                doctor_id, date_from=date_from, date_to=date_to, page_size=page_size, page=page
+            )
         return None
     
+    def get_availability_summary(self):
+        """Próximo horário livre e total de horários livres nos próximos 14 dias, por médico.
+
+        Os slots persistidos de todos os médicos são resumidos em uma única consulta
+        com funções de janela; as regras de disponibilidade são expandidas em memória.
+        O resultado fica em cache até que um slot ou regra seja criado, reservado,
+        alterado ou removido. Retorna {doctor_id: {'next_slot': ..., 'open_slots': n}}.
+        """
+        summary = availability_summary_cache.get('summary')
+        if summary is None:
+            summary = availability_summary_cache.set('summary', self._build_availability_summary())
+        return summary
+
+    def _build_availability_summary(self):
+        from datetime import datetime, timedelta
+
+        now = datetime.now()
+        today = now.date()
+        summary_until = today + timedelta(days=self.SUMMARY_DAYS - 1)
+
+        upcoming = select(
+            Slots.doctor_id,
+            Slots.appointment_date,
+            Slots.start_time,
+            func.row_number().over(
+                partition_by=Slots.doctor_id,
+                order_by=(Slots.appointment_date, Slots.start_time)
+            ).label('position'),
+            func.sum(case((Slots.appointment_date <= summary_until, 1), else_=0)).over(
+                partition_by=Slots.doctor_id
+            ).label('open_slots')
+        ).where(
+            Slots.is_booked == False,
+            Slots.appointment_date >= today,
+            or_(Slots.appointment_date > today, Slots.start_time > now.time())
+        ).subquery()
+        rows = self.db.session.execute(select(upcoming).where(upcoming.c.position == 1)).all()
+
+        summary = {
+            row.doctor_id: {
+                'next_slot': datetime.combine(row.appointment_date, row.start_time),
+                'open_slots': row.open_slots
+            }
+            for row in rows
+        }
+
+        # Regras de disponibilidade: ocorrências sem slot persistido no mesmo horário
+        availability = AvailabilityController()
+        rules_until = today + timedelta(days=AvailabilityController.RULE_HORIZON_DAYS)
+        rules = self.db.session.query(AvailabilityRules).filter(
+            AvailabilityRules.valid_from <= rules_until,
+            or_(AvailabilityRules.valid_until.is_(None), AvailabilityRules.valid_until >= today)
+        ).all()
+        if rules:
+            taken = set(self.db.session.query(Slots.doctor_id, Slots.appointment_date, Slots.start_time).filter(
+                Slots.doctor_id.in_({rule.doctor_id for rule in rules}),
+                Slots.appointment_date >= today,
+                Slots.appointment_date <= rules_until
+            ).all())
+            for slot in availability.expand_rules(rules, today, rules_until):
+                start = datetime.combine(slot.appointment_date, slot.start_time)
+                if (slot.doctor_id, slot.appointment_date, slot.start_time) in taken or start <= now:
+                    continue
+                entry = summary.setdefault(slot.doctor_id, {'next_slot': start, 'open_slots': 0})
+                entry['next_slot'] = min(entry['next_slot'], start)
+                if slot.appointment_date <= summary_until:
+                    entry['open_slots'] += 1
+
+        return summary
+
     def get_doctor_data(self, doctor_id):
         doctor = self.get_doctor_by_id(doctor_id)
         if doctor:
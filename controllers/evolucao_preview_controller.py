@@ -0,0 +1,71 @@
+from db import db
+from dashboard_psi.models import Evolucao
+from dashboard_psi.utils import decrypt_data
+from sqlalchemy import bindparam, select, update
+import time
+
+
+class EvolucaoPreviewController:
+    """Preenchimento da prévia criptografada e da contagem de palavras das evoluções.
+
+    Evolucao.set_conteudo grava as duas ao salvar; este controlador preenche as
+    evoluções gravadas antes delas (ou todas, para regravar as prévias).
+    """
+
+    def __init__(self):
+        self.db = db
+
+    def rebuild(self, batch_size=500, missing_only=True):
+        """Decifra o conteúdo e grava prévia e contagem de palavras, em lotes.
+
+        Cada lote de até `batch_size` evoluções (pela chave primária) é um UPDATE
+        em conjunto na sua própria transação, sem alterar updated_at.
+        Retorna um relatório com evoluções, lotes e tempo decorrido.
+        """
+        evolucoes = Evolucao.__table__
+        report = {'evolucoes': 0, 'batches': 0, 'elapsed': 0.0, 'rows_per_second': 0.0}
+        started = time.perf_counter()
+        last_id = None
+
+        while True:
+            query = select(evolucoes.c.id, evolucoes.c.conteudo_criptografado).order_by(evolucoes.c.id).limit(batch_size)
+            if missing_only:
+                query = query.where(evolucoes.c.previa_criptografada.is_(None))
+            if last_id is not None:
+                query = query.where(evolucoes.c.id > last_id)
+            rows = self.db.session.execute(query).all()
+            if not rows:
+                break
+
+            values = []
+            for row in rows:
+                previa = Evolucao.calcular_previa(decrypt_data(row.conteudo_criptografado))
+                values.append({
+                    'b_id': row.id,
+                    'b_previa': previa['previa_criptografada'],
+                    'b_palavras': previa['total_palavras'],
+                })
+            try:
+                self.db.session.execute(
+                    update(evolucoes).where(evolucoes.c.id == bindparam('b_id')).values(
+                        previa_criptografada=bindparam('b_previa'),
+                        total_palavras=bindparam('b_palavras'),
+                        updated_at=evolucoes.c.updated_at
+                    ),
+                    values
+                )
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+
+            report['evolucoes'] += len(rows)
+            report['batches'] += 1
+            last_id = rows[-1].id
+            if len(rows) < batch_size:
+                break
+
+        report['elapsed'] = time.perf_counter() - started
+        if report['elapsed'] > 0:
+            report['rows_per_second'] = report['evolucoes'] / report['elapsed']
+        return report
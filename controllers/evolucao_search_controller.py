@@ -0,0 +1,85 @@
+from db import db
+from dashboard_psi.models import Evolucao, EvolucaoToken
+from dashboard_psi.utils import decrypt_data, get_search_index_key, tokens_busca
+from sqlalchemy import and_, delete, exists, false, insert, select
+import time
+
+
+class EvolucaoSearchController:
+    """Busca no conteúdo criptografado das evoluções pelo índice cego (evolucao_tokens).
+
+    O termo é reduzido aos mesmos tokens HMAC gravados por Evolucao.set_conteudo;
+    uma evolução casa quando contém todas as palavras do termo (palavras inteiras,
+    sem diferenciar acentos e maiúsculas). Cada palavra é uma consulta pontual na
+    chave primária (token, evolucao_id), sem decifrar nenhuma nota.
+    """
+
+    def __init__(self):
+        self.db = db
+
+    def search_criteria(self, termo):
+        """Critério SQLAlchemy para filtrar consultas de Evolucao pelo termo"""
+        tokens = tokens_busca(termo)
+        if not tokens:
+            # Só palavras curtas demais para o índice: nada a encontrar
+            return false()
+        return and_(*[
+            exists().where(EvolucaoToken.evolucao_id == Evolucao.id, EvolucaoToken.token == token)
+            for token in tokens
+        ])
+
+    def search(self, paciente_id, termo):
+        """Evoluções do paciente que contêm todas as palavras do termo, da mais recente à mais antiga"""
+        return list(self.db.session.execute(
+            select(Evolucao)
+            .where(Evolucao.paciente_id == paciente_id, self.search_criteria(termo))
+            .order_by(Evolucao.data_sessao.desc())
+        ).scalars())
+
+    def rebuild(self, batch_size=500):
+        """Recalcula os tokens de todas as evoluções (após a migração ou troca de chave).
+
+        As evoluções são lidas em lotes de `batch_size` pela chave primária; cada lote
+        é decifrado, tem seus tokens substituídos e é gravado na sua própria transação.
+        Retorna um relatório com evoluções, tokens, lotes e tempo decorrido.
+        """
+        key = get_search_index_key()
+        report = {'evolucoes': 0, 'tokens': 0, 'batches': 0, 'elapsed': 0.0, 'rows_per_second': 0.0}
+        started = time.perf_counter()
+        last_id = None
+
+        while True:
+            query = select(Evolucao.id, Evolucao.conteudo_criptografado).order_by(Evolucao.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(Evolucao.id > last_id)
+            rows = self.db.session.execute(query).all()
+            if not rows:
+                break
+
+            tokens = [
+                {'token': token, 'evolucao_id': row.id}
+                for row in rows
+                for token in tokens_busca(decrypt_data(row.conteudo_criptografado), key=key)
+            ]
+            try:
+                self.db.session.execute(
+                    delete(EvolucaoToken).where(EvolucaoToken.evolucao_id.in_([row.id for row in rows]))
+                )
+                if tokens:
+                    self.db.session.execute(insert(EvolucaoToken), tokens)
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+
+            report['evolucoes'] += len(rows)
+            report['tokens'] += len(tokens)
+            report['batches'] += 1
+            last_id = rows[-1].id
+            if len(rows) < batch_size:
+                break
+
+        report['elapsed'] = time.perf_counter() - started
+        if report['elapsed'] > 0:
+            report['rows_per_second'] = report['evolucoes'] / report['elapsed']
+        return report
@@ -0,0 +1,183 @@
+from db import db
+from models.slots import Slots
+from models.appointments import Appointments
+from dashboard_psi.models import Agenda
+from controllers.availability_controller import AvailabilityController
+from sqlalchemy import select, union_all, literal, cast, null, Date, Time, DateTime, Boolean
+from datetime import datetime, date, time, timedelta
+
+QUANTUM_MINUTES = 5
+QUANTA_PER_DAY = 24 * 60 // QUANTUM_MINUTES
+DEFAULT_DURATION = 50  # Agenda e Appointments não guardam a duração da sessão
+
+
+def _quantum(value, round_up=False):
+    """Índice do quantum de um horário; com round_up, o primeiro quantum não coberto"""
+    minutes = value.hour * 60 + value.minute
+    if round_up and (value.second or value.microsecond):
+        minutes += 1
+    quantum, remainder = divmod(minutes, QUANTUM_MINUTES)
+    return quantum + 1 if round_up and remainder else quantum
+
+
+def _mask(first, last):
+    """Bits [first, last) de um dia"""
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+class FreeBusyMap:
+    """Ocupação de um médico em bitsets de quanta de 5 minutos por dia.
+
+    Mantém duas camadas: `busy` (consultas e agendamentos ativos, slots reservados)
+    e `offered` (todos os slots cadastrados, livres ou não, e as ocorrências das
+    regras de disponibilidade). Testes de sobreposição
+    são operações AND sobre inteiros, sem acesso ao banco.
+    """
+
+    def __init__(self, date_from, date_to):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.busy = {}
+        self.offered = {}
+
+    def _intervals(self, start, end):
+        """Divide [start, end) em (dia, máscara), tratando a virada de meia-noite"""
+        current = start
+        while current < end:
+            day = current.date()
+            next_day = datetime.combine(day + timedelta(days=1), time())
+            stop = min(end, next_day)
+            last = QUANTA_PER_DAY if stop == next_day else _quantum(stop.time(), round_up=True)
+            yield day, _mask(_quantum(current.time()), last)
+            current = stop
+
+    def mark(self, start, end, layer='busy'):
+        target = self.busy if layer == 'busy' else self.offered
+        for day, mask in self._intervals(start, end):
+            target[day] = target.get(day, 0) | mask
+
+    def overlaps(self, start, duration=DEFAULT_DURATION, include_offered=False):
+        end = start + timedelta(minutes=duration)
+        for day, mask in self._intervals(start, end):
+            occupied = self.busy.get(day, 0)
+            if include_offered:
+                occupied |= self.offered.get(day, 0)
+            if occupied & mask:
+                return True
+        return False
+
+    def is_free(self, start, duration=DEFAULT_DURATION, include_offered=False):
+        return not self.overlaps(start, duration, include_offered)
+
+    def validate_series(self, starts, duration=DEFAULT_DURATION, include_offered=False):
+        """Valida uma série inteira; ocorrências da própria série também não podem se sobrepor"""
+        results = []
+        for start in starts:
+            ok = self.is_free(start, duration, include_offered)
+            results.append((start, ok))
+            if ok:
+                self.mark(start, start + timedelta(minutes=duration))
+        return results
+
+    def free_windows(self, day, duration=DEFAULT_DURATION, day_start=time(7), day_end=time(22), include_offered=False):
+        """Intervalos livres do dia com pelo menos `duration` minutos, como pares (início, fim)"""
+        occupied = self.busy.get(day, 0)
+        if include_offered:
+            occupied |= self.offered.get(day, 0)
+        needed = -(-duration // QUANTUM_MINUTES)
+        first, last = _quantum(day_start), _quantum(day_end, round_up=True)
+
+        windows = []
+        run_start = None
+        for quantum in range(first, last + 1):
+            free = quantum < last and not (occupied >> quantum) & 1
+            if free and run_start is None:
+                run_start = quantum
+            elif not free and run_start is not None:
+                if quantum - run_start >= needed:
+                    windows.append((self._time(day, run_start), self._time(day, quantum)))
+                run_start = None
+        return windows
+
+    @staticmethod
+    def _time(day, quantum):
+        return datetime.combine(day, time()) + timedelta(minutes=quantum * QUANTUM_MINUTES)
+
+
+class FreeBusyController:
+    BUSY_AGENDA_STATUS = ('agendada', 'confirmada')
+    CANCELLED_APPOINTMENT_STATUS = ('cancelled', 'canceled', 'cancelada')
+
+    def __init__(self):
+        self.db = db
+
+    def build(self, doctor_id, date_from, date_to, exclude_agenda_ids=()):
+        """Monta o FreeBusyMap do médico para [date_from, date_to] com uma única consulta.
+
+        As ocorrências das regras de disponibilidade (sem as datas de exceção e os
+        horários já materializados em slots) entram na camada `offered`.
+        """
+        range_start = datetime.combine(date_from, time())
+        range_end = datetime.combine(date_to + timedelta(days=1), time())
+
+        slots_q = select(
+            literal('slot').label('kind'),
+            Slots.is_booked.label('busy'),
+            Slots.appointment_date.label('day'),
+            Slots.start_time.label('start_time'),
+            Slots.end_time.label('end_time'),
+            cast(null(), DateTime).label('starts_at')
+        ).where(
+            Slots.doctor_id == doctor_id,
+            Slots.appointment_date >= date_from,
+            Slots.appointment_date <= date_to
+        )
+        agenda_q = select(
+            literal('agenda'), literal(True, Boolean), cast(null(), Date), cast(null(), Time), cast(null(), Time),
+            Agenda.data_hora
+        ).where(
+            Agenda.psicologo_id == doctor_id,
+            Agenda.status.in_(self.BUSY_AGENDA_STATUS),
+            Agenda.data_hora >= range_start,
+            Agenda.data_hora < range_end
+        )
+        if exclude_agenda_ids:
+            agenda_q = agenda_q.where(Agenda.id.notin_(exclude_agenda_ids))
+        appointments_q = select(
+            literal('appointment'), literal(True, Boolean), cast(null(), Date), cast(null(), Time), cast(null(), Time),
+            Appointments.appointment_date
+        ).where(
+            Appointments.doctor_id == doctor_id,
+            Appointments.status.notin_(self.CANCELLED_APPOINTMENT_STATUS),
+            Appointments.appointment_date >= range_start,
+            Appointments.appointment_date < range_end
+        )
+
+        freebusy = FreeBusyMap(date_from, date_to)
+        materialized = set()
+        for row in self.db.session.execute(union_all(slots_q, agenda_q, appointments_q)):
+            if row.kind == 'slot':
+                materialized.add((row.day, row.start_time))
+                start = datetime.combine(row.day, row.start_time)
+                end = datetime.combine(row.day, row.end_time)
+                if end <= start:
+                    end += timedelta(days=1)
+                freebusy.mark(start, end, layer='offered')
+                if row.busy:
+                    freebusy.mark(start, end)
+            else:
+                freebusy.mark(row.starts_at, row.starts_at + timedelta(minutes=DEFAULT_DURATION))
+
+        availability = AvailabilityController()
+        rules = availability.get_active_rules(doctor_id, date_from, date_to)
+        for slot in availability.expand_rules(rules, date_from, date_to):
+            if (slot.appointment_date, slot.start_time) in materialized:
+                continue
+            start = datetime.combine(slot.appointment_date, slot.start_time)
+            end = datetime.combine(slot.appointment_date, slot.end_time)
+            if end <= start:
+                end += timedelta(days=1)
+            freebusy.mark(start, end, layer='offered')
+        return freebusy
\ No newline at end of file
@@ -0,0 +1,82 @@
+from db import db
+from dashboard_psi.models import Paciente
+from dashboard_psi.utils import normalizar_busca
+from sqlalchemy import and_, case, or_, select
+import re
+
+TYPEAHEAD_LIMIT = 10
+# Formato de Paciente.id (generate_id: token_urlsafe truncado em 20 caracteres)
+PACIENTE_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,20}')
+
+
+class PacienteSearchController:
+    """Busca de pacientes do psicólogo por nome, sem diferenciar acentos e maiúsculas.
+
+    A comparação é feita em Paciente.nome_busca (nome normalizado, ver
+    normalizar_busca): "joao" encontra "João". Cada palavra do termo precisa
+    aparecer no nome (LIKE '%palavra%'); no Postgres esse filtro usa o índice de
+    trigramas, nos demais bancos percorre só os pacientes do psicólogo pelo índice
+    (psicologo_id, nome_busca), que também serve a ordenação das páginas.
+    """
+
+    def __init__(self):
+        self.db = db
+
+    def build_search_query(self, psicologo_id, termo=None, cursor=None):
+        """SELECT dos pacientes do psicólogo que casam com `termo`, ordenados por nome"""
+        filters = [Paciente.psicologo_id == psicologo_id]
+        for palavra in normalizar_busca(termo).split():
+            filters.append(Paciente.nome_busca.contains(palavra, autoescape=True))
+        if cursor:
+            nome_busca, paciente_id = self._decode_cursor(cursor)
+            filters.append(or_(
+                Paciente.nome_busca > nome_busca,
+                and_(Paciente.nome_busca == nome_busca, Paciente.id > paciente_id)
+            ))
+        return select(Paciente).where(*filters).order_by(Paciente.nome_busca, Paciente.id)
+
+    def search_page(self, psicologo_id, termo=None, page_size=24, cursor=None):
+        """Uma página da busca com paginação por cursor (keyset).
+
+        Retorna {'items': [...], 'next_cursor': str ou None}; passe next_cursor
+        na próxima chamada (com o mesmo termo) para continuar.
+        """
+        query = self.build_search_query(psicologo_id, termo, cursor).limit(page_size + 1)
+        items = list(self.db.session.execute(query).scalars())
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            next_cursor = self._encode_cursor(items[-1].nome_busca, items[-1].id)
+        return {'items': items, 'next_cursor': next_cursor}
+
+    def typeahead(self, psicologo_id, termo, limit=TYPEAHEAD_LIMIT):
+        """Sugestões para a busca incremental: nomes que começam pelo termo vêm primeiro"""
+        termo = normalizar_busca(termo)
+        if not termo:
+            return []
+        query = self.build_search_query(psicologo_id, termo).order_by(None).order_by(
+            case((Paciente.nome_busca.startswith(termo, autoescape=True), 0), else_=1),
+            Paciente.nome_busca,
+            Paciente.id
+        ).limit(limit)
+        return list(self.db.session.execute(query).scalars())
+
+    def matching_ids(self, psicologo_id, termo):
+        """Ids de todos os pacientes que casam com o termo, sem limite (filtro da lista já renderizada)"""
+        if not normalizar_busca(termo):
+            return []
+        query = self.build_search_query(psicologo_id, termo).with_only_columns(Paciente.id)
+        return list(self.db.session.execute(query).scalars())
+
+    def _encode_cursor(self, nome_busca, paciente_id):
+        return f"{paciente_id}|{nome_busca}"
+
+    def _decode_cursor(self, cursor):
+        """(nome_busca, paciente_id) do cursor; qualquer cursor malformado gera ValueError"""
+        try:
+            paciente_id, nome_busca = cursor.split('|', 1)
+            if not PACIENTE_ID_PATTERN.fullmatch(paciente_id) or nome_busca != normalizar_busca(nome_busca):
+                raise ValueError(cursor)
+            return nome_busca, paciente_id
+        except (AttributeError, TypeError, ValueError):
+            raise ValueError('Cursor de paginação inválido')
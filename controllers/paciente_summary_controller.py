@@ -0,0 +1,89 @@
+from db import db
+from dashboard_psi.models import Paciente, Evolucao, Agenda
+from sqlalchemy import event, func, select, true, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from datetime import datetime
+
+# Agendamentos que ainda podem acontecer (ver ClosingController)
+OPEN_AGENDA_STATUS = ('agendada', 'confirmada')
+
+
+class PacienteSummaryController:
+    """Manutenção das colunas de resumo de Paciente.
+
+    total_sessoes, total_minutos, ultima_sessao (de Evolucao) e proxima_consulta
+    (o agendamento em aberto mais cedo a partir do momento do cálculo) são
+    recalculadas no after_flush da mesma transação que altera evoluções ou
+    agendamentos (ver maintain_paciente_summary); `rebuild` recalcula todos os pacientes.
+    Como proxima_consulta envelhece até o próximo recálculo (`flask agenda close-past`
+    recalcula os pacientes cujos agendamentos fecha), exiba Paciente.proxima_consulta_futura.
+    """
+
+    def __init__(self, session=None):
+        self.db = db
+        self.session = session or db.session
+
+    def refresh(self, paciente_ids):
+        """Recalcula o resumo dos pacientes informados. Retorna o número de linhas"""
+        paciente_ids = {paciente_id for paciente_id in paciente_ids if paciente_id}
+        if not paciente_ids:
+            return 0
+        return self._update(Paciente.__table__.c.id.in_(paciente_ids))
+
+    def rebuild(self, psicologo_id=None):
+        """Recalcula o resumo de todos os pacientes (ou dos de um psicólogo)"""
+        pacientes = Paciente.__table__
+        criteria = pacientes.c.psicologo_id == psicologo_id if psicologo_id else true()
+        rows = self._update(criteria)
+        self.session.commit()
+        return rows
+
+    def _update(self, criteria):
+        # UPDATE direto na tabela: não passa pela unidade de trabalho nem altera updated_at
+        pacientes = Paciente.__table__
+        evolucoes = Evolucao.__table__
+        agenda = Agenda.__table__
+        of_paciente = evolucoes.c.paciente_id == pacientes.c.id
+        return self.session.execute(
+            update(pacientes).where(criteria).values(
+                total_sessoes=select(func.count()).select_from(evolucoes).where(of_paciente).scalar_subquery(),
+                total_minutos=select(func.coalesce(func.sum(evolucoes.c.duracao_minutos), 0))
+                    .where(of_paciente).scalar_subquery(),
+                ultima_sessao=select(func.max(evolucoes.c.data_sessao)).where(of_paciente).scalar_subquery(),
+                proxima_consulta=select(func.min(agenda.c.data_hora)).where(
+                    agenda.c.paciente_id == pacientes.c.id,
+                    agenda.c.status.in_(OPEN_AGENDA_STATUS),
+                    agenda.c.data_hora >= datetime.now()
+                ).scalar_subquery(),
+                updated_at=pacientes.c.updated_at
+            )
+        ).rowcount
+
+
+def _paciente_ids(obj):
+    """paciente_id atual e anterior (para evoluções/agendamentos movidos de paciente)"""
+    history = get_history(obj, 'paciente_id')
+    return {value for value in (*history.added, *history.unchanged, *history.deleted) if value}
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+event.listen(Agenda.paciente_id, 'set', _load_previous_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def maintain_paciente_summary(session, flush_context):
+    """Recalcula, na mesma transação, o resumo dos pacientes tocados pelo flush.
+
+    UPDATE/DELETE em lote de Evolucao ou Agenda não passam por aqui; quem os
+    executa deve chamar PacienteSummaryController.refresh (ou `flask pacientes rebuild-summary`).
+    """
+    paciente_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (Evolucao, Agenda)):
+            paciente_ids.update(_paciente_ids(obj))
+    if paciente_ids:
+        PacienteSummaryController(session).refresh(paciente_ids)
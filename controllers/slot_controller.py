@@ -1,11 +1,23 @@
 from db import db
 from models.slots import Slots
+from models.slots_archive import SlotsArchive
+from models.availability_rules import AvailabilityRules
 from models.appointments import Appointments
 from models.user import User
 from models.doctors import Doctors
+from controllers.availability_controller import AvailabilityController
+from controllers.freebusy_controller import FreeBusyController
+from controllers.availability_version import bump_availability_version
+from sqlalchemy import delete, func, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from itertools import groupby, islice
+import heapq
 import uuid
 
 class SlotsController:
+    WEEKDAY_NAMES = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 'Sexta-feira', 'Sábado', 'Domingo']
+    EARLIEST_SLOTS_MAX_LIMIT = 50
+
     def __init__(self):
         self.db = db
 
@@ -30,6 +42,103 @@ class SlotsController:
         self.db.session.commit()
         return new_slot
 
+    def create_slots_bulk(self, doctor_id, dates, start_times, duration, appointment_type=None, price=None, notes=None):
+        """Cria em lote os horários de um médico para cada combinação de data e horário.
+
+        A ocupação do intervalo é carregada em uma única consulta e os horários que
+        se sobrepõem a slots, agendamentos ou consultas existentes (ou entre si) são
+        ignorados; os novos são inseridos em uma única transação.
+        Retorna um relatório com os pares (data, horário) criados e ignorados.
+        """
+        from datetime import datetime, timedelta
+
+        dates = sorted(set(dates))
+        start_times = sorted(set(start_times))
+        report = {'created': [], 'skipped': []}
+        if not dates or not start_times:
+            return report
+
+        # Ocupação do período inteiro (slots, agenda e consultas) em uma consulta
+        freebusy = FreeBusyController().build(doctor_id, dates[0], dates[-1])
+
+        new_rows = []
+        for current_date in dates:
+            for start_time in start_times:
+                start = datetime.combine(current_date, start_time)
+                if freebusy.overlaps(start, duration, include_offered=True):
+                    report['skipped'].append((current_date, start_time))
+                    continue
+                end = start + timedelta(minutes=duration)
+                freebusy.mark(start, end, layer='offered')
+                new_rows.append({
+                    'slot_id': str(uuid.uuid4())[:20],
+                    'doctor_id': doctor_id,
+                    'appointment_date': current_date,
+                    'start_time': start_time,
+                    'end_time': end.time(),
+                    'appointment_type': appointment_type,
+                    'price': price,
+                    'notes': notes
+                })
+                report['created'].append((current_date, start_time))
+
+        if new_rows:
+            try:
+                self.db.session.execute(insert(Slots), new_rows)
+                bump_availability_version(self.db.session, [doctor_id])
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+        return report
+
+    def create_recurring_slots(self, doctor_id, first_date, start_times, weeks, duration, appointment_type=None,
+                               price=None, notes=None):
+        """Cria os horários semanais de `weeks` semanas a partir de first_date como uma regra de disponibilidade.
+
+        Os pares (data, horário) que se sobrepõem à ocupação existente são ignorados.
+        Uma data com algum conflito vira exceção da regra e os demais horários dela são
+        criados como slots concretos (create_slots_bulk), então um conflito às 9h não
+        derruba a sessão das 14h do mesmo dia.
+        Retorna um relatório com a regra e os pares (data, horário) criados e ignorados.
+        """
+        from datetime import datetime, timedelta
+
+        start_times = sorted(set(start_times))
+        valid_until = first_date + timedelta(weeks=weeks - 1)
+        freebusy = FreeBusyController().build(doctor_id, first_date, valid_until)
+        skipped = {
+            (day, start_time)
+            for day in (first_date + timedelta(weeks=week) for week in range(weeks))
+            for start_time in start_times
+            if freebusy.overlaps(datetime.combine(day, start_time), duration, include_offered=True)
+        }
+        conflicting_dates = {day for day, _ in skipped}
+
+        availability = AvailabilityController()
+        rule = availability.create_rule(
+            doctor_id=doctor_id,
+            weekdays=[first_date.weekday()],
+            start_times=start_times,
+            valid_from=first_date,
+            valid_until=valid_until,
+            duration=duration,
+            appointment_type=appointment_type,
+            price=price,
+            notes=notes,
+            exception_dates=conflicting_dates
+        )
+        created = [(slot.appointment_date, slot.start_time)
+                   for slot in availability.expand_rules([rule], first_date, valid_until)]
+        for day in sorted(conflicting_dates):
+            report = self.create_slots_bulk(
+                doctor_id, [day], [start_time for start_time in start_times if (day, start_time) not in skipped],
+                duration, appointment_type=appointment_type, price=price, notes=notes
+            )
+            created.extend(report['created'])
+            skipped.update(report['skipped'])
+        return {'rule': rule, 'created': sorted(created), 'skipped': sorted(skipped)}
+
     def update_slot(self, slot_id, **kwargs):
         slot = self.get_slot_by_id(slot_id)
         if slot:
@@ -51,37 +160,294 @@ class SlotsController:
         return self.db.session.query(Slots).all()
     
     def get_free_slots_by_doctor(self, doctor_id):
-        slots = self.db.session.query(Slots).filter_by(doctor_id=doctor_id, is_booked=False).all()
-        slot_dict = {}
-        for slot in slots:
-            date_key = slot.appointment_date.strftime('%Y-%m-%d')
-            if date_key not in slot_dict:
-                slot_dict[date_key] = []
-            slot_dict[date_key].append({
-                'slot_id': slot.slot_id,
-                'start_time': slot.start_time.strftime('%H:%M'),
-                'end_time': slot.end_time.strftime('%H:%M'),
-                'appointment_type': slot.appointment_type,
-                'price': slot.price,
-                'notes': slot.notes
-            })
-        
-        # Converter para o formato esperado pelo template
+        from datetime import date, timedelta
+
+        rows = self.db.session.query(*self._free_slot_columns()).filter(
+            Slots.doctor_id == doctor_id,
+            Slots.is_booked == False
+        ).order_by(Slots.appointment_date, Slots.start_time).all()
+
+        today = date.today()
+        rows = self._merge_rule_slots(doctor_id, rows, today, today + timedelta(days=AvailabilityController.RULE_HORIZON_DAYS))
+        return self._group_slots_by_day(rows)
+
+    def get_free_slots_window(self, doctor_id, date_from=None, date_to=None, page_size=14, page=1):
+        """Horários livres do médico agrupados por dia dentro de uma janela de datas.
+
+        Datas passadas nunca entram na janela. A paginação é por dia: os `page_size`
+        dias com horários livres são agrupados e ordenados no banco, e só os slots
+        desses dias são carregados. Retorna a mesma estrutura de get_free_slots_by_doctor.
+        """
+        from datetime import date, timedelta
+
+        today = date.today()
+        date_from = max(date_from, today) if date_from else today
+        filters = [
+            Slots.doctor_id == doctor_id,
+            Slots.is_booked == False,
+            Slots.appointment_date >= date_from
+        ]
+        if date_to:
+            filters.append(Slots.appointment_date <= date_to)
+
+        rules_until = date_to or date_from + timedelta(days=AvailabilityController.RULE_HORIZON_DAYS)
+        rules = AvailabilityController().get_active_rules(doctor_id, date_from, rules_until)
+
+        days = select(Slots.appointment_date).where(*filters).group_by(
+            Slots.appointment_date
+        ).order_by(Slots.appointment_date)
+
+        if not rules:
+            days = days.limit(page_size).offset((page - 1) * page_size).subquery()
+            rows = self.db.session.query(*self._free_slot_columns()).join(
+                days, Slots.appointment_date == days.c.appointment_date
+            ).filter(*filters).order_by(Slots.appointment_date, Slots.start_time).all()
+            return self._group_slots_by_day(rows)
+
+        # Com regras ativas, a página de dias é a união dos dias com slots livres e
+        # dos dias em que sobra alguma ocorrência das regras depois de descontar os
+        # horários já persistidos (um dia cujas ocorrências estão todas tomadas não
+        # pode ocupar lugar na página)
+        concrete_days = self.db.session.execute(days.limit(page * page_size)).scalars().all()
+        virtual_rows = self._free_rule_occurrences(doctor_id, rules, date_from, rules_until)
+        rule_days = {slot.appointment_date for slot in virtual_rows}
+        page_days = sorted(set(concrete_days) | rule_days)[(page - 1) * page_size:page * page_size]
+        if not page_days:
+            return []
+
+        rows = self.db.session.query(*self._free_slot_columns()).filter(
+            *filters,
+            Slots.appointment_date >= page_days[0],
+            Slots.appointment_date <= page_days[-1]
+        ).all()
+        rows += [slot for slot in virtual_rows if page_days[0] <= slot.appointment_date <= page_days[-1]]
+        rows.sort(key=lambda row: (row.appointment_date, row.start_time))
+        return self._group_slots_by_day(rows)
+
+    def get_earliest_free_slots(self, specialty, limit=10, date_from=None, horizon_days=None):
+        """Próximos `limit` horários livres entre todos os médicos de uma especialidade.
+
+        Os slots persistidos vêm de uma única consulta por faixa de datas no índice
+        (doctor_id, is_booked, appointment_date, start_time), limitada a `limit` linhas
+        por médico com row_number(). Cada médico vira um fluxo ordenado (slots + regras
+        de disponibilidade) e os fluxos são combinados com heapq.merge, parando no
+        `limit`-ésimo horário. O resultado é uma lista de dicts ordenada por data/horário.
+        """
+        from datetime import date, datetime, timedelta
+
+        limit = max(1, min(int(limit), self.EARLIEST_SLOTS_MAX_LIMIT))
+        now = datetime.now()
+        date_from = max(date_from, now.date()) if date_from else now.date()
+        date_to = date_from + timedelta(days=horizon_days or AvailabilityController.RULE_HORIZON_DAYS)
+
+        doctors = dict(self.db.session.query(Doctors.id, Doctors.name).filter(Doctors.specialty == specialty).all())
+        if not doctors:
+            return []
+
+        position = func.row_number().over(
+            partition_by=Slots.doctor_id,
+            order_by=(Slots.appointment_date, Slots.start_time)
+        ).label('position')
+        ranked = select(Slots.doctor_id, *self._free_slot_columns(), position).where(
+            Slots.doctor_id.in_(list(doctors)),
+            Slots.is_booked == False,
+            Slots.appointment_date >= date_from,
+            Slots.appointment_date <= date_to,
+            # Horários de hoje que já passaram não são oferecidos
+            or_(Slots.appointment_date > now.date(), Slots.start_time > now.time())
+        ).subquery()
+        rows = self.db.session.execute(
+            select(ranked).where(ranked.c.position <= limit).order_by(
+                ranked.c.doctor_id, ranked.c.appointment_date, ranked.c.start_time
+            )
+        ).all()
+
+        streams = {doctor_id: list(doctor_rows) for doctor_id, doctor_rows in groupby(rows, key=lambda row: row.doctor_id)}
+
+        # Ocorrências das regras entram como um segundo fluxo ordenado por médico
+        rules = AvailabilityController().get_active_rules(list(doctors), date_from, date_to)
+        if rules:
+            rule_doctors = {rule.doctor_id for rule in rules}
+            taken = {
+                (row.doctor_id, row.appointment_date, row.start_time)
+                for row in self.db.session.query(Slots.doctor_id, Slots.appointment_date, Slots.start_time).filter(
+                    Slots.doctor_id.in_(rule_doctors),
+                    Slots.appointment_date >= date_from,
+                    Slots.appointment_date <= date_to
+                )
+            }
+            virtual_rows = [
+                slot for slot in AvailabilityController().expand_rules(rules, date_from, date_to)
+                if (slot.doctor_id, slot.appointment_date, slot.start_time) not in taken
+                and datetime.combine(slot.appointment_date, slot.start_time) > now
+            ]
+            for doctor_id, doctor_rows in groupby(sorted(virtual_rows, key=lambda slot: slot.doctor_id), key=lambda slot: slot.doctor_id):
+                streams[doctor_id] = heapq.merge(
+                    streams.get(doctor_id, []), list(doctor_rows),
+                    key=lambda row: (row.appointment_date, row.start_time)
+                )
+
+        merged = heapq.merge(
+            *streams.values(),
+            key=lambda row: (row.appointment_date, row.start_time, row.doctor_id)
+        )
+        return [{
+            'slot_id': row.slot_id,
+            'doctor_id': row.doctor_id,
+            'doctor_name': doctors[row.doctor_id],
+            'date': row.appointment_date.strftime('%Y-%m-%d'),
+            'formatted_date': row.appointment_date.strftime('%d/%m/%Y'),
+            'day': self.WEEKDAY_NAMES[row.appointment_date.weekday()],
+            'start_time': row.start_time.strftime('%H:%M'),
+            'end_time': row.end_time.strftime('%H:%M'),
+            'appointment_type': row.appointment_type,
+            'price': row.price
+        } for row in islice(merged, limit)]
+
+    def _merge_rule_slots(self, doctor_id, free_rows, date_from, date_to, rules=None):
+        """Mescla os horários livres persistidos com os gerados pelas regras de disponibilidade.
+
+        Qualquer slot persistido (livre ou reservado) no mesmo dia/horário prevalece
+        sobre a ocorrência da regra. Retorna a lista ordenada por data e horário.
+        """
+        if rules is None:
+            rules = AvailabilityController().get_active_rules(doctor_id, date_from, date_to)
+        if not rules or date_from > date_to:
+            return free_rows
+
+        virtual_rows = self._free_rule_occurrences(doctor_id, rules, date_from, date_to)
+        return sorted(list(free_rows) + virtual_rows, key=lambda row: (row.appointment_date, row.start_time))
+
+    def _free_rule_occurrences(self, doctor_id, rules, date_from, date_to):
+        """Ocorrências das regras no intervalo sem slot persistido no mesmo dia/horário"""
+        if date_from > date_to:
+            return []
+        taken = {
+            (row.appointment_date, row.start_time)
+            for row in self.db.session.query(Slots.appointment_date, Slots.start_time).filter(
+                Slots.doctor_id == doctor_id,
+                Slots.appointment_date >= date_from,
+                Slots.appointment_date <= date_to
+            )
+        }
+        return [
+            slot for slot in AvailabilityController().expand_rules(rules, date_from, date_to)
+            if (slot.appointment_date, slot.start_time) not in taken
+        ]
+
+    def _free_slot_columns(self):
+        return (Slots.slot_id, Slots.appointment_date, Slots.start_time, Slots.end_time,
+                Slots.appointment_type, Slots.price, Slots.notes)
+
+    def _group_slots_by_day(self, rows):
+        """Agrupa linhas já ordenadas por data/horário no formato esperado pelos templates"""
         result = []
-        for date_str, slots_list in slot_dict.items():
-            from datetime import datetime
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            weekday_names = ['Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira', 'Sexta-feira', 'Sábado', 'Domingo']
-            weekday_name = weekday_names[date_obj.weekday()]
-            
+        for day, day_rows in groupby(rows, key=lambda row: row.appointment_date):
             result.append({
-                'date': date_str,
-                'day': weekday_name,
-                'formatted_date': date_obj.strftime('%d/%m/%Y'),
-                'slots': slots_list
+                'date': day.strftime('%Y-%m-%d'),
+                'day': self.WEEKDAY_NAMES[day.weekday()],
+                'formatted_date': day.strftime('%d/%m/%Y'),
+                'slots': [{
+                    'slot_id': row.slot_id,
+                    'start_time': row.start_time.strftime('%H:%M'),
+                    'end_time': row.end_time.strftime('%H:%M'),
+                    'appointment_type': row.appointment_type,
+                    'price': row.price,
+                    'notes': row.notes
+                } for row in day_rows]
             })
-        
-        return sorted(result, key=lambda x: x['date'])
+        return result
+
+    def archive_expired_slots(self, before=None, batch_size=1000, archive=True):
+        """Retira da tabela slots os horários vencidos e não reservados.
+
+        Processa lotes de até `batch_size` linhas com data anterior a `before`
+        (padrão: hoje), cada lote em sua própria transação: as linhas são copiadas
+        para slots_archive (se `archive`) e removidas de slots. Pode ser executado
+        periodicamente (ver `flask slots archive-expired`). Retorna um relatório com
+        linhas processadas, lotes, tempo decorrido e linhas por segundo.
+        """
+        from datetime import date, datetime
+        import time
+
+        before = before or date.today()
+        report = {'processed': 0, 'batches': 0, 'elapsed': 0.0, 'rows_per_second': 0.0}
+        started = time.perf_counter()
+
+        while True:
+            rows = self.db.session.execute(
+                select(Slots.slot_id, Slots.doctor_id).where(
+                    Slots.is_booked == False,
+                    Slots.appointment_date < before
+                ).order_by(Slots.appointment_date).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            slot_ids = [row.slot_id for row in rows]
+
+            try:
+                if archive:
+                    self.db.session.execute(
+                        insert(SlotsArchive).from_select(
+                            ['slot_id', 'doctor_id', 'appointment_date', 'start_time', 'end_time',
+                             'appointment_type', 'price', 'notes', 'created_at', 'archived_at'],
+                            select(Slots.slot_id, Slots.doctor_id, Slots.appointment_date, Slots.start_time,
+                                   Slots.end_time, Slots.appointment_type, Slots.price, Slots.notes,
+                                   Slots.created_at, literal(datetime.now())).where(
+                                Slots.slot_id.in_(slot_ids), Slots.is_booked == False
+                            )
+                        )
+                    )
+                removed = self.db.session.execute(
+                    delete(Slots).where(Slots.slot_id.in_(slot_ids), Slots.is_booked == False)
+                ).rowcount
+                bump_availability_version(self.db.session, [row.doctor_id for row in rows])
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+
+            report['processed'] += removed
+            report['batches'] += 1
+            if len(slot_ids) < batch_size:
+                break
+
+        report['elapsed'] = time.perf_counter() - started
+        if report['elapsed'] > 0:
+            report['rows_per_second'] = report['processed'] / report['elapsed']
+        return report
+
+    def get_available_slots_range(self, doctor_id, date_from, date_to):
+        """Horários livres do médico entre date_from e date_to (inclusive), agrupados por dia.
+
+        Uma única consulta por faixa de datas, mesclada às regras de disponibilidade.
+        Retorna um dict ordenado {date: [slots]} apenas com os dias que têm horários.
+        """
+        rows = self.db.session.query(Slots).filter(
+            Slots.doctor_id == doctor_id,
+            Slots.is_booked == False,
+            Slots.appointment_date >= date_from,
+            Slots.appointment_date <= date_to
+        ).order_by(Slots.appointment_date, Slots.start_time).all()
+        rows = self._merge_rule_slots(doctor_id, rows, date_from, date_to)
+        return {day: list(day_rows) for day, day_rows in groupby(rows, key=lambda row: row.appointment_date)}
+
+    def get_availability_version(self, doctor_id):
+        """Versão da disponibilidade do médico, usada como validador HTTP (ETag).
+
+        Parte do contador doctors.availability_version, incrementado na mesma
+        transação de toda alteração de slots e regras (mesmo no mesmo segundo), e o
+        combina com o maior updated_at e a quantidade de slots e de regras, em uma
+        consulta agregada sobre os índices por doctor_id.
+        """
+        version = self.db.session.execute(select(
+            select(Doctors.availability_version).where(Doctors.id == doctor_id).scalar_subquery(),
+            select(func.max(Slots.updated_at)).where(Slots.doctor_id == doctor_id).scalar_subquery(),
+            select(func.count(Slots.slot_id)).where(Slots.doctor_id == doctor_id).scalar_subquery(),
+            select(func.max(AvailabilityRules.updated_at)).where(AvailabilityRules.doctor_id == doctor_id).scalar_subquery(),
+            select(func.count(AvailabilityRules.rule_id)).where(AvailabilityRules.doctor_id == doctor_id).scalar_subquery()
+        )).one()
+        return '|'.join(str(value) for value in version)
 
     def get_slots_by_doctor(self, doctor_id):
         return self.db.session.query(Slots).filter_by(doctor_id=doctor_id).all()
@@ -93,20 +459,77 @@ class SlotsController:
         ).all()
     
     def book_slot(self, slot_id, user_id):
-        slot = self.get_slot_by_id(slot_id)
-        if slot and not slot.is_booked:
-            slot.is_booked = True
+        """Reserva o slot e cria a consulta na mesma transação.
+
+        A reserva é um UPDATE condicional (is_booked = false): entre requisições
+        concorrentes apenas uma altera a linha; as demais recebem (None, None).
+        """
+        if slot_id and slot_id.startswith('rule-'):
+            slot = self.materialize_rule_slot(slot_id)
+            if not slot:
+                return None, None
+            slot_id = slot.slot_id
+
+        try:
+            claimed = self.db.session.execute(
+                update(Slots)
+                .where(Slots.slot_id == slot_id, Slots.is_booked == False)
+                .values(is_booked=True)
+            ).rowcount
+            if claimed != 1:
+                self.db.session.rollback()
+                return None, None
+
+            from datetime import datetime
+            slot = self.get_slot_by_id(slot_id)
+            bump_availability_version(self.db.session, [slot.doctor_id])
             appointment = Appointments(
                 appointment_id=str(uuid.uuid4())[:15],
                 user_id=user_id,
                 doctor_id=slot.doctor_id,
-                appointment_date=slot.appointment_date
+                appointment_date=datetime.combine(slot.appointment_date, slot.start_time)
             )
             self.db.session.add(appointment)
             self.db.session.commit()
             return slot, appointment
-        return None, None
+        except Exception:
+            self.db.session.rollback()
+            raise
     
+    def materialize_rule_slot(self, virtual_slot_id):
+        """Persiste a ocorrência de uma regra de disponibilidade como um slot concreto.
+
+        Se o slot já existir (inclusive criado por uma requisição concorrente),
+        retorna o existente. Retorna None se o id não corresponder a uma ocorrência válida.
+        """
+        parsed = AvailabilityController().parse_virtual_slot_id(virtual_slot_id)
+        if not parsed:
+            return None
+        rule, day, start_time = parsed
+
+        existing = self.get_slot_by_doctor_date_time(rule.doctor_id, day, start_time)
+        if existing:
+            return existing
+
+        from datetime import datetime, timedelta
+        slot = Slots(
+            slot_id=str(uuid.uuid4())[:20],
+            doctor_id=rule.doctor_id,
+            appointment_date=day,
+            start_time=start_time,
+            end_time=(datetime.combine(day, start_time) + timedelta(minutes=rule.duration)).time(),
+            appointment_type=rule.appointment_type,
+            price=rule.price,
+            notes=rule.notes
+        )
+        self.db.session.add(slot)
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            self.db.session.rollback()
+            return self.get_slot_by_doctor_date_time(rule.doctor_id, day, start_time)
+        return slot
+
     def get_slot_by_doctor_date_time(self, doctor_id, appointment_date, start_time):
         """Busca um slot específico por médico, data e horário"""
         return self.db.session.query(Slots).filter_by(
@@ -116,13 +539,15 @@ class SlotsController:
         ).first()
     
     def get_available_slots_by_date(self, doctor_id, appointment_date):
-        """Busca slots disponíveis (não reservados) para uma data específica"""
+        """Busca slots disponíveis (não reservados) para uma data específica,
+        incluindo os horários gerados pelas regras de disponibilidade"""
         from datetime import datetime
         if isinstance(appointment_date, str):
             appointment_date = datetime.strptime(appointment_date, '%Y-%m-%d').date()
         
-        return self.db.session.query(Slots).filter_by(
+        slots = self.db.session.query(Slots).filter_by(
             doctor_id=doctor_id,
             appointment_date=appointment_date,
             is_booked=False
-        ).order_by(Slots.start_time).all()
\ No newline at end of file
+        ).order_by(Slots.start_time).all()
+        return self._merge_rule_slots(doctor_id, slots, appointment_date, appointment_date)
\ No newline at end of file
@@ -0,0 +1,232 @@
+from db import db
+from models.doctor_daily_stats import DoctorDailyStats
+from models.appointments import Appointments
+from models.slots import Slots
+from dashboard_psi.models import Paciente, Evolucao, Agenda
+from sqlalchemy import and_, case, delete, event, func, insert, or_, select, tuple_, union
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from datetime import date, datetime, timedelta
+
+STAT_FIELDS = ('sessions', 'appointments', 'cancellations', 'distinct_patients', 'minutes', 'revenue')
+
+
+class StatsController:
+    """Leitura e manutenção da tabela doctor_daily_stats.
+
+    As linhas afetadas por uma alteração em Evolucao, Agenda, Appointments ou Slots
+    são recalculadas no after_flush da mesma transação (ver maintain_daily_stats);
+    `rebuild` recalcula o histórico inteiro em consultas agrupadas.
+    """
+    CANCELLED_AGENDA_STATUS = ('cancelada',)
+    CANCELLED_APPOINTMENT_STATUS = ('cancelled', 'canceled', 'cancelada')
+
+    def __init__(self, session=None):
+        self.db = db
+        self.session = session or db.session
+
+    def get_period_stats(self, doctor_id, date_from=None, date_to=None):
+        """Soma das métricas diárias do médico no período [date_from, date_to) (sem limites se None)"""
+        query = select(*[func.coalesce(func.sum(getattr(DoctorDailyStats, field)), 0).label(field)
+                         for field in STAT_FIELDS if field != 'distinct_patients']
+                       ).where(DoctorDailyStats.doctor_id == doctor_id)
+        if date_from:
+            query = query.where(DoctorDailyStats.day >= date_from)
+        if date_to:
+            query = query.where(DoctorDailyStats.day < date_to)
+        return dict(self.session.execute(query).one()._mapping)
+
+    def get_daily_stats(self, doctor_id, date_from, date_to):
+        """Linhas diárias do médico no período [date_from, date_to), ordenadas por dia"""
+        return self.session.query(DoctorDailyStats).filter(
+            DoctorDailyStats.doctor_id == doctor_id,
+            DoctorDailyStats.day >= date_from,
+            DoctorDailyStats.day < date_to
+        ).order_by(DoctorDailyStats.day).all()
+
+    def refresh(self, keys):
+        """Recalcula as linhas (doctor_id, day) informadas a partir dos dados de origem.
+
+        As agregações e o DELETE ficam restritos aos dias tocados de cada médico,
+        então o custo acompanha o número de chaves, não a distância entre elas.
+        """
+        keys = {(doctor_id, day) for doctor_id, day in keys if doctor_id and day}
+        if not keys:
+            return 0
+
+        aggregated = self._aggregate(keys=keys)
+        self.session.execute(delete(DoctorDailyStats).where(
+            tuple_(DoctorDailyStats.doctor_id, DoctorDailyStats.day).in_(sorted(keys))
+        ))
+        return self._insert(aggregated)
+
+    def rebuild(self, doctor_id=None):
+        """Recalcula todo o resumo (de um médico ou de todos). Retorna o número de linhas"""
+        doctor_ids = [doctor_id] if doctor_id else None
+        statement = delete(DoctorDailyStats)
+        if doctor_id:
+            statement = statement.where(DoctorDailyStats.doctor_id == doctor_id)
+        self.session.execute(statement)
+        rows = self._insert(self._aggregate(doctor_ids))
+        self.session.commit()
+        return rows
+
+    def _insert(self, aggregated):
+        rows = [
+            {'doctor_id': doctor_id, 'day': day, **values}
+            for (doctor_id, day), values in aggregated.items()
+            if any(values.values())
+        ]
+        if rows:
+            self.session.execute(insert(DoctorDailyStats), rows)
+        return len(rows)
+
+    def _aggregate(self, doctor_ids=None, keys=None):
+        """Métricas por (doctor_id, dia) em uma consulta agrupada por fonte.
+
+        Sem filtros cobre todo o histórico; `doctor_ids` restringe aos médicos e
+        `keys` aos pares (doctor_id, dia) informados.
+        """
+        days_by_doctor = {}
+        for doctor_id, day in keys or ():
+            days_by_doctor.setdefault(doctor_id, set()).add(day)
+
+        def in_range(query, doctor_column, datetime_column):
+            if doctor_ids is not None:
+                query = query.where(doctor_column.in_(doctor_ids))
+            if keys is not None:
+                # Um intervalo semiaberto por dia tocado (usa os índices por médico e data)
+                query = query.where(or_(*[
+                    and_(doctor_column == doctor_id, or_(*[
+                        and_(datetime_column >= datetime.combine(day, datetime.min.time()),
+                             datetime_column < datetime.combine(day + timedelta(days=1), datetime.min.time()))
+                        for day in sorted(days)
+                    ]))
+                    for doctor_id, days in days_by_doctor.items()
+                ]))
+            return query
+
+        result = {}
+
+        def add(doctor_id, day, **values):
+            if isinstance(day, str):
+                day = date.fromisoformat(day[:10])
+            entry = result.setdefault((doctor_id, day), dict.fromkeys(STAT_FIELDS, 0))
+            for field, value in values.items():
+                entry[field] += int(value or 0)
+
+        evolucao_day = func.date(Evolucao.data_sessao)
+        for row in self.session.execute(in_range(
+            select(Paciente.psicologo_id, evolucao_day, func.count(Evolucao.id),
+                   func.sum(Evolucao.duracao_minutos)).join(Paciente, Evolucao.paciente_id == Paciente.id),
+            Paciente.psicologo_id, Evolucao.data_sessao
+        ).group_by(Paciente.psicologo_id, evolucao_day)):
+            add(row[0], row[1], sessions=row[2], minutes=row[3])
+
+        agenda_day = func.date(Agenda.data_hora)
+        agenda_cancelled = Agenda.status.in_(self.CANCELLED_AGENDA_STATUS)
+        for row in self.session.execute(in_range(
+            select(Agenda.psicologo_id, agenda_day,
+                   func.sum(case((agenda_cancelled, 0), else_=1)),
+                   func.sum(case((agenda_cancelled, 1), else_=0))),
+            Agenda.psicologo_id, Agenda.data_hora
+        ).group_by(Agenda.psicologo_id, agenda_day)):
+            add(row[0], row[1], appointments=row[2], cancellations=row[3])
+
+        appointment_day = func.date(Appointments.appointment_date)
+        appointment_cancelled = Appointments.status.in_(self.CANCELLED_APPOINTMENT_STATUS)
+        for row in self.session.execute(in_range(
+            select(Appointments.doctor_id, appointment_day,
+                   func.sum(case((appointment_cancelled, 0), else_=1)),
+                   func.sum(case((appointment_cancelled, 1), else_=0))),
+            Appointments.doctor_id, Appointments.appointment_date
+        ).group_by(Appointments.doctor_id, appointment_day)):
+            add(row[0], row[1], appointments=row[2], cancellations=row[3])
+
+        # Pacientes distintos atendidos ou agendados (sem cancelamentos) no dia
+        attended = union(
+            in_range(select(Paciente.psicologo_id.label('doctor_id'), evolucao_day.label('day'),
+                            Evolucao.paciente_id.label('patient_id')).join(Paciente, Evolucao.paciente_id == Paciente.id),
+                     Paciente.psicologo_id, Evolucao.data_sessao),
+            in_range(select(Agenda.psicologo_id, agenda_day, Agenda.paciente_id).where(~agenda_cancelled),
+                     Agenda.psicologo_id, Agenda.data_hora),
+            in_range(select(Appointments.doctor_id, appointment_day, Appointments.user_id).where(~appointment_cancelled),
+                     Appointments.doctor_id, Appointments.appointment_date)
+        ).subquery()
+        for row in self.session.execute(
+            select(attended.c.doctor_id, attended.c.day, func.count(attended.c.patient_id))
+            .group_by(attended.c.doctor_id, attended.c.day)
+        ):
+            add(row[0], row[1], distinct_patients=row[2])
+
+        slots = select(Slots.doctor_id, Slots.appointment_date, func.sum(Slots.price)).where(Slots.is_booked == True)
+        if doctor_ids is not None:
+            slots = slots.where(Slots.doctor_id.in_(doctor_ids))
+        if keys is not None:
+            slots = slots.where(tuple_(Slots.doctor_id, Slots.appointment_date).in_(sorted(keys)))
+        for row in self.session.execute(slots.group_by(Slots.doctor_id, Slots.appointment_date)):
+            add(row[0], row[1], revenue=row[2])
+
+        return result
+
+
+def _history_values(obj, attribute):
+    """Valores atual e anterior de um atributo (para updates que mudam médico ou data)"""
+    history = get_history(obj, attribute)
+    return [value for value in (*history.added, *history.unchanged, *history.deleted) if value is not None]
+
+
+def _as_day(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Com active_history o valor anterior é carregado mesmo se o atributo estiver expirado,
+# para que mover um registro de dia (ou de médico) recalcule também a linha antiga
+for _attribute in (Evolucao.paciente_id, Evolucao.data_sessao, Agenda.psicologo_id, Agenda.data_hora,
+                   Appointments.doctor_id, Appointments.appointment_date, Slots.doctor_id, Slots.appointment_date):
+    event.listen(_attribute, 'set', _load_previous_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def maintain_daily_stats(session, flush_context):
+    """Recalcula, na mesma transação, as linhas do resumo tocadas pelo flush.
+
+    UPDATE/DELETE em lote executados fora da unidade de trabalho não passam por
+    aqui; quem os executa deve chamar StatsController.refresh (ou `flask stats rebuild`).
+    """
+    keys = set()
+    evolucoes = []
+    psicologos = {}
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Evolucao):
+            evolucoes.append(obj)
+        elif isinstance(obj, Paciente):
+            psicologos[obj.id] = obj.psicologo_id
+        elif isinstance(obj, Agenda):
+            keys.update((doctor_id, _as_day(day)) for doctor_id in _history_values(obj, 'psicologo_id')
+                        for day in _history_values(obj, 'data_hora'))
+        elif isinstance(obj, Appointments):
+            keys.update((doctor_id, _as_day(day)) for doctor_id in _history_values(obj, 'doctor_id')
+                        for day in _history_values(obj, 'appointment_date'))
+        elif isinstance(obj, Slots):
+            keys.update((doctor_id, day) for doctor_id in _history_values(obj, 'doctor_id')
+                        for day in _history_values(obj, 'appointment_date'))
+
+    if evolucoes:
+        paciente_ids = {paciente_id for obj in evolucoes for paciente_id in _history_values(obj, 'paciente_id')}
+        missing = paciente_ids - set(psicologos)
+        if missing:
+            psicologos.update(session.execute(
+                select(Paciente.id, Paciente.psicologo_id).where(Paciente.id.in_(missing))
+            ).all())
+        for obj in evolucoes:
+            keys.update((psicologos.get(paciente_id), _as_day(day))
+                        for paciente_id in _history_values(obj, 'paciente_id')
+                        for day in _history_values(obj, 'data_sessao'))
+
+    if keys:
+        StatsController(session).refresh(keys)
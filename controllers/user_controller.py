@@ -4,8 +4,38 @@ from models.user import User
 from models.doctors import Doctors
 from models.slots import Slots
 from controllers.slot_controller import SlotsController
+from controllers.counters import increment_counter
+from controllers.cache import TTLCache, invalidate_on_commit
+from dashboard_psi.models import Paciente, Evolucao
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm.attributes import get_history
+from datetime import datetime
 import uuid
 
+CANCELLED_APPOINTMENT_STATUS = ('cancelled', 'canceled', 'cancelada')
+
+
+def _patient_summary_tags(obj):
+    """Tags do resumo afetadas por um objeto alterado (valores atuais e anteriores)"""
+    def values(attribute):
+        history = get_history(obj, attribute)
+        return [value for value in (*history.added, *history.unchanged, *history.deleted) if value]
+
+    if isinstance(obj, Appointments):
+        return [('user', user_id) for user_id in values('user_id')]
+    if isinstance(obj, User):
+        return [('user', obj.id)]
+    if isinstance(obj, Evolucao):
+        return [('paciente', paciente_id) for paciente_id in values('paciente_id')]
+    return [('paciente', obj.id)] + [('email', email.lower()) for email in values('email')]
+
+
+# Resumo exibido no modal de agendamento: expira em 60s (a "próxima consulta" muda
+# com o relógio) e é invalidado por paciente quando consultas ou evoluções mudam
+# (só no worker que gravou; os demais podem ficar até 60s defasados)
+patient_summary_cache = TTLCache(ttl=60)
+invalidate_on_commit(patient_summary_cache, Appointments, User, Paciente, Evolucao, tags=_patient_summary_tags)
+
 class UserController:
     def __init__(self):
         self.db = db
@@ -43,14 +73,47 @@ class UserController:
         user = self.db.session.query(User).filter_by(email=email, password=password).first()
         return user if user else None
     
-    def increment_appointment_count(self, user_id):
-        user = self.get_user_by_id(user_id)
-        if user:
-            user.appointment_count += 1
-            self.db.session.commit()
-            return user.appointment_count
-        return None
+    def increment_appointment_count(self, user_id, amount=1):
+        count = increment_counter(self.db.session, User, user_id, amount)
+        self.db.session.commit()
+        return count
     
+    def get_patient_summary(self, user_id, doctor_id):
+        """Resumo do paciente para o médico, calculado só com agregações.
+
+        Retorna {'appointment_count', 'next_appointment', 'last_appointment', 'last_evolution'}
+        ou None se o paciente não existe. Só entram as consultas com este médico; as evoluções são as do prontuário (Paciente) do
+        médico com o mesmo email do usuário.
+        """
+        key = (user_id, doctor_id)
+        summary = patient_summary_cache.get(key)
+        if summary is not None:
+            return summary
+
+        email = self.db.session.execute(select(User.email).where(User.id == user_id)).scalar_one_or_none()
+        if email is None:
+            return None
+        paciente_ids = self.db.session.execute(select(Paciente.id).where(
+            Paciente.psicologo_id == doctor_id,
+            func.lower(Paciente.email) == email.lower()
+        )).scalars().all()
+
+        now = datetime.now()
+        active = ~Appointments.status.in_(CANCELLED_APPOINTMENT_STATUS)
+        last_evolution = (select(func.max(Evolucao.data_sessao))
+                          .where(Evolucao.paciente_id.in_(paciente_ids)).scalar_subquery())
+        row = self.db.session.execute(select(
+            func.count(Appointments.appointment_id).label('appointment_count'),
+            func.min(case((and_(active, Appointments.appointment_date > now), Appointments.appointment_date)))
+                .label('next_appointment'),
+            func.max(case((and_(active, Appointments.appointment_date <= now), Appointments.appointment_date)))
+                .label('last_appointment'),
+            last_evolution.label('last_evolution')
+        ).where(Appointments.user_id == user_id, Appointments.doctor_id == doctor_id)).one()
+
+        tags = [('user', user_id), ('email', email.lower())] + [('paciente', paciente_id) for paciente_id in paciente_ids]
+        return patient_summary_cache.set(key, dict(row._mapping), tags=tags)
+
     def get_user_appointments(self, user_id):
         return self.db.session.query(Appointments).filter_by(user_id=user_id).all()
     
@@ -16,3 +16,8 @@ bp = Blueprint('dashboard_psi', __name__,
 bp.add_app_template_filter(nl2br, 'nl2br')
 
 from . import routes
+
+# Listeners de after_flush que mantêm doctor_daily_stats, o resumo dos pacientes e a
+# versão da disponibilidade dos médicos; todo import de dashboard_psi.models passa
+# por aqui, então ficam sempre ativos
+from controllers import stats_controller, paciente_summary_controller, availability_version  # noqa: E402,F401
@@ -102,7 +102,8 @@ class AgendaForm(FlaskForm):
                             ('agendada', 'Agendada'),
                             ('confirmada', 'Confirmada'),
                             ('cancelada', 'Cancelada'),
-                            ('concluida', 'Concluída')
+                            ('concluida', 'Concluída'),
+                            ('faltou', 'Faltou')
                         ],
                         default='agendada')
     
@@ -138,6 +139,7 @@ class FiltroAgendaForm(FlaskForm):
                             ('agendada', 'Agendada'),
                             ('confirmada', 'Confirmada'),
                             ('cancelada', 'Cancelada'),
-                            ('concluida', 'Concluída')
+                            ('concluida', 'Concluída'),
+                            ('faltou', 'Faltou')
                         ])
     submit = SubmitField('Filtrar')
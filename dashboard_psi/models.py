@@ -5,15 +5,29 @@ Modelos do Dashboard Psicologia adaptados para integração
 
 from db import db
 from models.doctors import Doctors
-from .utils import encrypt_data, decrypt_data, generate_id
+from .utils import encrypt_data, decrypt_data, generate_id, normalizar_busca, tokens_busca
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import validates
 from datetime import datetime
 
+# Caracteres da prévia das evoluções exibida nas listagens
+TAMANHO_PREVIA = 300
+
 
 class Paciente(db.Model):
     __tablename__ = 'pacientes'
+    __table_args__ = (
+        # Listagem por nome (keyset) e busca restrita aos pacientes do psicólogo
+        db.Index('ix_pacientes_psicologo_nome_busca', 'psicologo_id', 'nome_busca'),
+        # No Postgres, LIKE '%termo%' em nome_busca usa o índice de trigramas (pg_trgm)
+        db.Index('ix_pacientes_nome_busca_trgm', 'nome_busca', postgresql_using='gin',
+                 postgresql_ops={'nome_busca': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.String(20), primary_key=True, default=generate_id)
     nome_completo = db.Column(db.String(150), nullable=False)
+    # nome_completo normalizado para busca (ver normalizar_busca), mantido pelo validador abaixo
+    nome_busca = db.Column(db.String(150), nullable=False, default='', server_default='')
     data_nascimento = db.Column(db.Date, nullable=True)
     telefone = db.Column(db.String(20), nullable=True)
     email = db.Column(db.String(120), nullable=True)
@@ -29,6 +43,13 @@ class Paciente(db.Model):
     # Relacionamentos
     evolucoes = db.relationship('Evolucao', backref='paciente', lazy='dynamic', cascade="all, delete-orphan")
     
+    # Resumo desnormalizado, mantido pelos eventos de Evolucao/Agenda
+    # (controllers/paciente_summary_controller.py)
+    total_sessoes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    total_minutos = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    ultima_sessao = db.Column(db.DateTime, nullable=True)
+    proxima_consulta = db.Column(db.DateTime, nullable=True)
+    
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
@@ -40,24 +61,51 @@ class Paciente(db.Model):
     def __repr__(self):
         return f'<Paciente {self.nome_completo}>'
     
+    @validates('nome_completo')
+    def _atualizar_nome_busca(self, key, value):
+        self.nome_busca = normalizar_busca(value)
+        return value
+    
+    @property
+    def proxima_consulta_futura(self):
+        """proxima_consulta, se ainda não passou (a coluna só é recalculada nas escritas)"""
+        if self.proxima_consulta and self.proxima_consulta >= datetime.now():
+            return self.proxima_consulta
+        return None
+    
     @property
     def ultima_evolucao(self):
         """Retorna a última evolução do paciente"""
         return self.evolucoes.order_by(Evolucao.data_sessao.desc()).first()
 
 
+event.listen(Paciente.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+
 class Evolucao(db.Model):
     __tablename__ = 'evolucoes'
+    __table_args__ = (
+        # Contagem e última sessão por paciente (resumo em Paciente) sem ler a tabela
+        db.Index('ix_evolucoes_paciente_data', 'paciente_id', 'data_sessao'),
+    )
     
     id = db.Column(db.String(20), primary_key=True, default=generate_id)
     data_sessao = db.Column(db.DateTime, nullable=False, index=True, default=datetime.utcnow)
-    conteudo_criptografado = db.Column(db.LargeBinary, nullable=False)
+    # Conteúdo completo só é lido quando acessado (ver_evolucao, edição, PDF);
+    # as listagens usam a prévia, criptografada à parte
+    conteudo_criptografado = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    previa_criptografada = db.Column(db.LargeBinary, nullable=True)
+    total_palavras = db.Column(db.Integer, nullable=True)
     tipo_sessao = db.Column(db.String(50), nullable=True)  # Individual, Grupo, etc.
     duracao_minutos = db.Column(db.Integer, nullable=True)
     
     # Chave estrangeira para ligar a evolução ao paciente
     paciente_id = db.Column(db.String(20), db.ForeignKey('pacientes.id'), nullable=False)
     
+    # Índice cego de busca, mantido por set_conteudo
+    tokens = db.relationship('EvolucaoToken', cascade='all, delete-orphan')
+    
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
@@ -67,8 +115,41 @@ class Evolucao(db.Model):
         super(Evolucao, self).__init__(**kwargs)
 
     def set_conteudo(self, conteudo_texto):
-        """Criptografa e armazena o conteúdo da evolução"""
+        """Criptografa e armazena o conteúdo da evolução e atualiza seus tokens de busca"""
         self.conteudo_criptografado = encrypt_data(conteudo_texto)
+        self.set_previa(conteudo_texto)
+        self.indexar_conteudo(conteudo_texto)
+
+    def set_previa(self, conteudo_texto):
+        """Criptografa e armazena o início do conteúdo e a contagem de palavras"""
+        for key, value in self.calcular_previa(conteudo_texto).items():
+            setattr(self, key, value)
+
+    @staticmethod
+    def calcular_previa(conteudo_texto):
+        """Valores de previa_criptografada e total_palavras para o texto informado"""
+        conteudo_texto = conteudo_texto or ''
+        return {
+            # Um caractere além do tamanho da prévia indica que o texto foi cortado
+            'previa_criptografada': encrypt_data(conteudo_texto[:TAMANHO_PREVIA + 1]),
+            'total_palavras': len(conteudo_texto.split()),
+        }
+
+    def get_previa(self, tamanho=TAMANHO_PREVIA):
+        """Início do conteúdo (com '...' se cortado), sem carregar o conteúdo completo"""
+        if self.previa_criptografada is None:
+            # Evolução gravada antes da prévia (ver `flask evolucoes rebuild-previews`)
+            texto = self.get_conteudo()
+        else:
+            texto = decrypt_data(self.previa_criptografada)
+        if len(texto) > tamanho:
+            return texto[:tamanho] + '...'
+        return texto
+
+    def indexar_conteudo(self, conteudo_texto):
+        """Substitui os tokens do índice cego pelos do texto informado (em claro)"""
+        atuais = {token.token: token for token in self.tokens}
+        self.tokens = [atuais.get(token) or EvolucaoToken(token=token) for token in tokens_busca(conteudo_texto)]
 
     def get_conteudo(self):
         """Descriptografa e retorna o conteúdo da evolução"""
@@ -88,6 +169,22 @@ class Evolucao(db.Model):
 
     def __repr__(self):
         return f'<Evolucao {self.id} - {self.data_sessao}>'
+
+
+class EvolucaoToken(db.Model):
+    """Índice cego de busca das evoluções.
+
+    Um token (HMAC da palavra normalizada, ver tokens_busca) por palavra distinta
+    de cada evolução: a busca compara tokens sem guardar nem decifrar o texto.
+    """
+    __tablename__ = 'evolucao_tokens'
+    
+    token = db.Column(db.String(32), primary_key=True)
+    evolucao_id = db.Column(db.String(20), db.ForeignKey('evolucoes.id', ondelete='CASCADE'),
+                            primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<EvolucaoToken {self.evolucao_id}>'
     
 class Agenda(db.Model):
     __tablename__ = 'agenda'
@@ -101,7 +198,7 @@ class Agenda(db.Model):
     observacoes = db.Column(db.Text, nullable=True)  # Observações adicionais
     
     # Status da consulta
-    status = db.Column(db.String(50), default='agendada')  # agendada, confirmada, cancelada, concluída
+    status = db.Column(db.String(50), default='agendada')  # agendada, confirmada, cancelada, concluída, faltou
     
     # Campos para recorrência
     recorrente = db.Column(db.Boolean, default=False)  # Se é agendamento recorrente
@@ -132,7 +229,8 @@ class Agenda(db.Model):
             'agendada': 'primary',
             'confirmada': 'success',
             'cancelada': 'danger',
-            'concluida': 'secondary'
+            'concluida': 'secondary',
+            'faltou': 'warning'
         }
         return colors.get(self.status, 'primary')
 
@@ -143,7 +241,8 @@ class Agenda(db.Model):
             'agendada': 'Agendada',
             'confirmada': 'Confirmada',
             'cancelada': 'Cancelada',
-            'concluida': 'Concluída'
+            'concluida': 'Concluída',
+            'faltou': 'Faltou'
         }
         return texts.get(self.status, 'Agendada')
     
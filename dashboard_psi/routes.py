@@ -9,10 +9,14 @@ from . import bp
 from .models import Paciente, Evolucao
 from .forms import PacienteForm, EvolucaoForm, PesquisaForm
 from .utils import generate_id
+from controllers.stats_controller import StatsController
+from controllers.paciente_search_controller import PacienteSearchController
+from controllers.evolucao_search_controller import EvolucaoSearchController
 from db import db
 from functools import wraps
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from sqlalchemy.orm import undefer
 
 def psicologo_required(f):
     """Decorator para verificar se o usuário é psicólogo"""
@@ -36,37 +40,29 @@ def psicologo_required(f):
 def dashboard():
     """Dashboard principal do módulo"""
     try:
-        # Buscar pacientes do psicólogo atual
-        pacientes = Paciente.query.filter_by(psicologo_id=current_user.id).all()
+        # Pacientes do psicólogo; total de sessões e última sessão vêm das colunas de resumo
+        pacientes = (Paciente.query
+                     .filter_by(psicologo_id=current_user.id)
+                     .order_by(Paciente.nome_completo)
+                     .all())
         
         # Estatísticas
         total_pacientes = len(pacientes)
-        total_evolucoes = sum(len(p.evolucoes.all()) for p in pacientes)
+        total_evolucoes = sum(paciente.total_sessoes for paciente in pacientes)
+        pacientes_ativos = sum(1 for paciente in pacientes if paciente.total_sessoes)
         
-        # Últimas evoluções
-        ultimas_evolucoes = (Evolucao.query
-                            .join(Paciente)
-                            .filter(Paciente.psicologo_id == current_user.id)
-                            .order_by(Evolucao.data_sessao.desc())
-                            .limit(5)
-                            .all())
-        
-        # Estatísticas por período
+        # Estatísticas por período (resumo diário mantido em doctor_daily_stats)
         hoje = datetime.now().date()
         inicio_mes = hoje.replace(day=1)
-        evolucoes_mes = (Evolucao.query
-                        .join(Paciente)
-                        .filter(Paciente.psicologo_id == current_user.id)
-                        .filter(Evolucao.data_sessao >= inicio_mes)
-                        .count())
+        evolucoes_mes = StatsController().get_period_stats(current_user.id, date_from=inicio_mes)['sessions']
         
         return render_template('dashboard_psi/dashboard.html',
                              title='Pecci Cuidado Integrado',
                              pacientes=pacientes,
                              total_pacientes=total_pacientes,
                              total_evolucoes=total_evolucoes,
-                             evolucoes_mes=evolucoes_mes,
-                             ultimas_evolucoes=ultimas_evolucoes)
+                             pacientes_ativos=pacientes_ativos,
+                             evolucoes_mes=evolucoes_mes)
     except Exception as e:
         flash(f'Erro ao carregar dashboard: {str(e)}', 'error')
         return redirect(url_for('p_login'))
@@ -79,17 +75,21 @@ def listar_pacientes():
     try:
         form = PesquisaForm()
         search = request.args.get('search', '')
+        cursor = request.args.get('cursor')
         
-        query = Paciente.query.filter_by(psicologo_id=current_user.id)
-        
-        if search:
-            query = query.filter(Paciente.nome_completo.ilike(f'%{search}%'))
-        
-        pacientes = query.order_by(Paciente.nome_completo).all()
+        # Busca sem acentos sobre nome_busca, paginada por cursor
+        try:
+            page = PacienteSearchController().search_page(current_user.id, search, cursor=cursor)
+        except ValueError:
+            return redirect(url_for('dashboard_psi.listar_pacientes', search=search or None))
+        total_pacientes = Paciente.query.filter_by(psicologo_id=current_user.id).count()
         
         return render_template('dashboard_psi/listar_pacientes.html',
                              title='Pacientes',
-                             pacientes=pacientes,
+                             pacientes=page['items'],
+                             next_cursor=page['next_cursor'],
+                             cursor=cursor,
+                             total_pacientes=total_pacientes,
                              form=form,
                              search=search)
     except Exception as e:
@@ -312,26 +312,43 @@ def api_estatisticas():
         inicio_semana = hoje - timedelta(days=hoje.weekday())
         inicio_mes = hoje.replace(day=1)
         
-        pacientes = Paciente.query.filter_by(psicologo_id=current_user.id).all()
+        stats_controller = StatsController()
         
         stats = {
-            'total_pacientes': len(pacientes),
-            'sessoes_semana': (Evolucao.query
-                              .join(Paciente)
-                              .filter(Paciente.psicologo_id == current_user.id)
-                              .filter(Evolucao.data_sessao >= inicio_semana)
-                              .count()),
-            'sessoes_mes': (Evolucao.query
-                           .join(Paciente)
-                           .filter(Paciente.psicologo_id == current_user.id)
-                           .filter(Evolucao.data_sessao >= inicio_mes)
-                           .count()),
+            'total_pacientes': Paciente.query.filter_by(psicologo_id=current_user.id).count(),
+            'sessoes_semana': stats_controller.get_period_stats(current_user.id, date_from=inicio_semana)['sessions'],
+            'sessoes_mes': stats_controller.get_period_stats(current_user.id, date_from=inicio_mes)['sessions'],
         }
         
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/pacientes/busca')
+@psicologo_required
+def api_buscar_pacientes():
+    """API de busca incremental de pacientes (sugestões, limitada a TYPEAHEAD_LIMIT)"""
+    try:
+        pacientes = PacienteSearchController().typeahead(current_user.id, request.args.get('q', ''))
+        return jsonify({'results': [{
+            'id': paciente.id,
+            'nome_completo': paciente.nome_completo,
+            'url': url_for('dashboard_psi.perfil_paciente', id=paciente.id),
+            'total_sessoes': paciente.total_sessoes,
+            'ultima_sessao': paciente.ultima_sessao.isoformat() if paciente.ultima_sessao else None,
+        } for paciente in pacientes]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/pacientes/busca/ids')
+@psicologo_required
+def api_filtrar_pacientes():
+    """API com os ids de todos os pacientes que casam com a busca (filtro da lista do dashboard)"""
+    try:
+        return jsonify({'ids': PacienteSearchController().matching_ids(current_user.id, request.args.get('q', ''))})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/pacientes/<paciente_id>/evolucoes')
 @psicologo_required
 def evolucoes_paciente(paciente_id):
@@ -353,7 +370,8 @@ def evolucoes_paciente(paciente_id):
         
         # Aplicar filtros
         if search:
-            query = query.filter(Evolucao.conteudo_criptografado.contains(search))
+            # Busca pelo índice cego: só as evoluções encontradas são decifradas na página
+            query = query.filter(EvolucaoSearchController().search_criteria(search))
         
         if start_date:
             try:
@@ -416,10 +434,16 @@ def configuracoes():
     perfil_form.especialidade.data = getattr(current_user, 'specialty', '')
     perfil_form.bio.data = getattr(current_user, 'description', '')
     
+    # URL do feed .ics da agenda (o token é gerado na primeira solicitação)
+    feed_url = None
+    if current_user.calendar_token:
+        feed_url = url_for('dashboard_psi.agenda_feed', token=current_user.calendar_token, _external=True)
+    
     return render_template('dashboard_psi/configuracoes.html',
                          title='Configurações do Perfil',
                          perfil_form=perfil_form,
-                         senha_form=senha_form)
+                         senha_form=senha_form,
+                         feed_url=feed_url)
 
 @bp.route('/configuracoes/perfil', methods=['POST'])
 @psicologo_required
@@ -565,6 +589,21 @@ def alterar_senha():
     
     return redirect(url_for('dashboard_psi.configuracoes'))
 
+@bp.route('/configuracoes/agenda-feed', methods=['POST'])
+@psicologo_required
+def gerar_link_agenda():
+    """Gera (ou regenera, revogando o anterior) o link do feed .ics da agenda"""
+    from controllers.calendar_feed_controller import CalendarFeedController
+    
+    try:
+        CalendarFeedController().regenerate_token(current_user.id)
+        flash('Link da agenda gerado. Links anteriores deixaram de funcionar.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Erro ao gerar link da agenda: {str(e)}', 'error')
+    
+    return redirect(url_for('dashboard_psi.configuracoes'))
+
 # --- Rotas de Agenda ---
 @bp.route('/agenda')
 @psicologo_required
@@ -652,7 +691,8 @@ def novo_agendamento():
     """Criar novo agendamento"""
     from .forms import AgendaForm
     from .models import Agenda, Paciente
-    from .utils import criar_agendamentos_recorrentes
+    from .utils import criar_agendamentos_recorrentes, calcular_agendamentos_recorrentes
+    from controllers.freebusy_controller import FreeBusyController
     from datetime import datetime
     
     form = AgendaForm()
@@ -666,15 +706,22 @@ def novo_agendamento():
             # Combinar data e hora
             data_hora = datetime.combine(form.data_consulta.data, form.hora_consulta.data)
             
-            # Verificar se já existe agendamento no mesmo horário
-            conflito = Agenda.query.filter(
-                Agenda.psicologo_id == current_user.id,
-                Agenda.data_hora == data_hora,
-                Agenda.status.in_(['agendada', 'confirmada'])
-            ).first()
+            # Verificar sobreposição com agendamentos, consultas e horários reservados,
+            # validando a série recorrente inteira de uma só vez
+            if form.recorrente.data:
+                datas = calcular_agendamentos_recorrentes(
+                    data_hora, form.recorrencia_tipo.data, form.recorrencia_periodo.data
+                )
+            else:
+                datas = [data_hora]
+            freebusy = FreeBusyController().build(current_user.id, datas[0].date(), datas[-1].date())
+            conflitos = [inicio for inicio, livre in freebusy.validate_series(datas) if not livre]
             
-            if conflito:
-                flash('Já existe um agendamento confirmado neste horário.', 'error')
+            if conflitos:
+                if len(datas) == 1:
+                    flash('Já existe um agendamento confirmado neste horário.', 'error')
+                else:
+                    flash('Conflito de horário em ' + ', '.join(c.strftime('%d/%m/%Y %H:%M') for c in conflitos), 'error')
                 return render_template('dashboard_psi/form_agendamento.html',
                                      title='Novo Agendamento',
                                      form=form)
@@ -755,6 +802,7 @@ def editar_agendamento(agendamento_id):
     """Editar agendamento"""
     from .forms import AgendaForm
     from .models import Agenda, Paciente
+    from controllers.freebusy_controller import FreeBusyController
     from datetime import datetime
     
     agendamento = Agenda.query.filter_by(
@@ -780,14 +828,12 @@ def editar_agendamento(agendamento_id):
             
             # Verificar conflitos (exceto o próprio agendamento)
             if nova_data_hora != agendamento.data_hora:
-                conflito = Agenda.query.filter(
-                    Agenda.psicologo_id == current_user.id,
-                    Agenda.data_hora == nova_data_hora,
-                    Agenda.status.in_(['agendada', 'confirmada']),
-                    Agenda.id != agendamento.id
-                ).first()
+                freebusy = FreeBusyController().build(
+                    current_user.id, nova_data_hora.date(), nova_data_hora.date(),
+                    exclude_agenda_ids=[agendamento.id]
+                )
                 
-                if conflito:
+                if freebusy.overlaps(nova_data_hora):
                     flash('Já existe um agendamento confirmado neste horário.', 'error')
                     return render_template('dashboard_psi/form_agendamento.html',
                                          title='Editar Agendamento',
@@ -850,7 +896,7 @@ def alterar_status_agendamento(agendamento_id):
     
     novo_status = request.json.get('status')
     
-    if novo_status not in ['agendada', 'confirmada', 'cancelada', 'concluida']:
+    if novo_status not in ['agendada', 'confirmada', 'cancelada', 'concluida', 'faltou']:
         return {'success': False, 'message': 'Status inválido'}, 400
     
     try:
@@ -861,6 +907,52 @@ def alterar_status_agendamento(agendamento_id):
         db.session.rollback()
         return {'success': False, 'message': str(e)}, 500
 
+@bp.route('/agenda/feed/<token>.ics')
+def agenda_feed(token):
+    """Feed iCalendar da agenda para aplicativos de calendário.
+
+    Não exige login: o token secreto da URL identifica o psicólogo. O corpo é gerado
+    em fluxo; clientes que revalidam com If-None-Match/If-Modified-Since recebem 304
+    enquanto nenhum evento da janela mudar.
+    """
+    from flask import Response, stream_with_context
+    from datetime import timezone
+    from controllers.calendar_feed_controller import CalendarFeedController, FEED_PAST_DAYS, FEED_DAYS
+    import hashlib
+    
+    controller = CalendarFeedController()
+    doctor_id = controller.get_doctor_id_by_token(token)
+    if doctor_id is None:
+        abort(404)
+    
+    # Janela configurável: ?passado=<dias anteriores>&dias=<dias seguintes>
+    start, end = controller.feed_window(
+        past_days=request.args.get('passado', FEED_PAST_DAYS, type=int),
+        days=request.args.get('dias', FEED_DAYS, type=int)
+    )
+    last_modified, signature = controller.get_feed_version(doctor_id, start, end)
+    etag = hashlib.sha1(signature.encode('utf-8')).hexdigest()
+    if last_modified is not None:
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    
+    # If-None-Match tem precedência sobre If-Modified-Since (RFC 9110)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(last_modified and request.if_modified_since and request.if_modified_since >= last_modified)
+    
+    if not_modified:
+        response = Response(status=304)
+    else:
+        response = Response(stream_with_context(controller.iter_ics(doctor_id, start, end)),
+                            mimetype='text/calendar')
+        response.headers['Content-Disposition'] = 'inline; filename="agenda.ics"'
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @bp.route('/agenda/preview-recorrencia', methods=['POST'])
 @psicologo_required
 def preview_recorrencia():
@@ -1000,10 +1092,10 @@ def exportar_paciente_completo_pdf(id):
             psicologo_id=current_user.id
         ).first_or_404()
         
-        # Buscar todas as evoluções do paciente
+        # Buscar todas as evoluções do paciente (com o conteúdo completo, que é adiado por padrão)
         evolucoes = Evolucao.query.filter_by(
             paciente_id=paciente.id
-        ).order_by(Evolucao.data_sessao.asc()).all()
+        ).options(undefer(Evolucao.conteudo_criptografado)).order_by(Evolucao.data_sessao.asc()).all()
         
         # Importar PDF generator
         from .pdf_utils import pdf_generator
@@ -82,27 +82,55 @@ const DashboardPsi = {
         }
     },
 
-    // Busca de pacientes
+    // Busca de pacientes (no servidor, sem diferenciar acentos: "joao" encontra "João");
+    // a API devolve os ids de todos os pacientes que casam, sem o limite das sugestões
     searchPatients: function(searchTerm) {
+        const input = document.getElementById('searchPatients');
         const patientItems = document.querySelectorAll('.patient-item');
-        let visibleCount = 0;
-        
-        patientItems.forEach(item => {
-            const patientName = item.getAttribute('data-name') || '';
-            const patientCard = item.querySelector('.card-title')?.textContent.toLowerCase() || '';
-            
-            if (patientName.includes(searchTerm) || patientCard.includes(searchTerm)) {
-                item.style.display = 'block';
-                item.classList.add('fade-in');
-                visibleCount++;
-            } else {
-                item.style.display = 'none';
-                item.classList.remove('fade-in');
-            }
-        });
+        const showItems = (ids) => {
+            let visibleCount = 0;
+            patientItems.forEach(item => {
+                if (ids === null || ids.has(item.dataset.id)) {
+                    item.style.display = 'block';
+                    item.classList.add('fade-in');
+                    visibleCount++;
+                } else {
+                    item.style.display = 'none';
+                    item.classList.remove('fade-in');
+                }
+            });
+            // Mostrar mensagem se nenhum resultado
+            this.toggleNoResultsMessage('patients', visibleCount === 0 && ids !== null);
+        };
 
-        // Mostrar mensagem se nenhum resultado
-        this.toggleNoResultsMessage('patients', visibleCount === 0 && searchTerm.length > 0);
+        // Descarta a resposta de uma busca anterior que ainda esteja pendente
+        if (this.patientSearchRequest) {
+            this.patientSearchRequest.abort();
+            this.patientSearchRequest = null;
+        }
+        if (!searchTerm.trim() || !input || !input.dataset.searchUrl) {
+            showItems(null);
+            return;
+        }
+
+        this.patientSearchRequest = new AbortController();
+        const url = `${input.dataset.searchUrl}?q=${encodeURIComponent(searchTerm.trim())}`;
+        fetch(url, { signal: this.patientSearchRequest.signal, headers: { 'Accept': 'application/json' } })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                this.patientSearchRequest = null;
+                showItems(new Set(data.ids));
+            })
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Erro na busca de pacientes:', error);
+                }
+            });
     },
 
     // Busca de evoluções
@@ -1,7 +1,14 @@
 from cryptography.fernet import Fernet
 from flask import current_app
+import hashlib
+import hmac
 import os
+import re
 import secrets
+import unicodedata
+
+# Palavras mais curtas que isso não entram no índice cego de busca das evoluções
+TAMANHO_MINIMO_TOKEN = 2
 
 def get_or_create_encryption_key():
     """Gera ou recupera a chave de criptografia do .env ou arquivo"""
@@ -72,6 +79,42 @@ def generate_id():
     """Gera um ID único para os registros"""
     return secrets.token_urlsafe(16)[:20]
 
+def normalizar_busca(texto):
+    """Chave de busca: minúsculas, sem acentos e com espaços simples ("João  Silva" -> "joao silva")"""
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+def get_search_index_key():
+    """Chave HMAC do índice cego de busca das evoluções.
+
+    Usa SEARCH_INDEX_KEY, se configurada; senão deriva uma chave própria da
+    ENCRYPTION_KEY, para que os tokens nunca sejam calculados com a chave da cifra.
+    Trocar a chave exige `flask evolucoes rebuild-index`.
+    """
+    if current_app.config.get('SEARCH_INDEX_KEY'):
+        return current_app.config['SEARCH_INDEX_KEY'].encode('utf-8')
+    if current_app.config.get('ENCRYPTION_KEY'):
+        base = current_app.config['ENCRYPTION_KEY'].encode('utf-8')
+    else:
+        # Mesma chave padrão de desenvolvimento de encrypt_data
+        base = b'ZmDfcTF7_60GrrY167zsiPd67pEvs0aGOv2oasOM1Pg='
+    return hmac.new(base, b'indice-de-busca-das-evolucoes', hashlib.sha256).digest()
+
+def tokens_busca(texto, key=None):
+    """Tokens do índice cego: HMAC-SHA256 (128 bits, em hex) de cada palavra distinta do texto.
+
+    As palavras são normalizadas como em normalizar_busca, então "Ansiedade" e
+    "ansiedade" geram o mesmo token. Retorna uma lista ordenada.
+    """
+    key = key or get_search_index_key()
+    palavras = {palavra for palavra in re.findall(r'\w+', normalizar_busca(texto))
+                if len(palavra) >= TAMANHO_MINIMO_TOKEN}
+    return sorted(hmac.new(key, palavra.encode('utf-8'), hashlib.sha256).hexdigest()[:32]
+                  for palavra in palavras)
+
 def nl2br(text):
     """Converte quebras de linha em tags <br>"""
     if not text:
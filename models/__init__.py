@@ -7,9 +7,12 @@ from .user import User
 from .doctors import Doctors
 from .appointments import Appointments
 from .slots import Slots
+from .availability_rules import AvailabilityRules
+from .slots_archive import SlotsArchive
+from .doctor_daily_stats import DoctorDailyStats
 try:
     from .blog_model import BlogModel
 except ImportError:
     pass
 
-__all__ = ['User', 'Doctors', 'Appointments', 'Slots', 'BlogModel']
+__all__ = ['User', 'Doctors', 'Appointments', 'Slots', 'AvailabilityRules', 'SlotsArchive', 'DoctorDailyStats', 'BlogModel']
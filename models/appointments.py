@@ -2,6 +2,11 @@ from db import db
 
 class Appointments(db.Model):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        # Consultas por médico/paciente filtradas por intervalo de datas (ver controllers/date_ranges.py)
+        db.Index('ix_appointments_doctor_date', 'doctor_id', 'appointment_date'),
+        db.Index('ix_appointments_user_date', 'user_id', 'appointment_date'),
+    )
 
     appointment_id = db.Column(db.String(15), primary_key=True, nullable=False)
     user_id = db.Column(db.String(20), db.ForeignKey('users.id'), nullable=False)
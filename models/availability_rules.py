@@ -0,0 +1,56 @@
+from db import db
+from datetime import datetime, timedelta
+
+class AvailabilityRules(db.Model):
+    """Disponibilidade semanal recorrente de um médico.
+
+    Uma única linha descreve todos os horários gerados pela regra; as ocorrências
+    são expandidas sob demanda para a janela consultada (ver AvailabilityController).
+    """
+    __tablename__ = 'availability_rules'
+
+    rule_id = db.Column(db.String(20), primary_key=True, nullable=False)
+    doctor_id = db.Column(db.String(20), db.ForeignKey('doctors.id'), nullable=False, index=True)
+    weekdays = db.Column(db.String(20), nullable=False)  # dias da semana separados por vírgula (0 = segunda)
+    start_times = db.Column(db.String(500), nullable=False)  # horários de início "HH:MM" separados por vírgula
+    duration = db.Column(db.Integer, default=50, nullable=False)  # minutos
+    appointment_type = db.Column(db.String(50), nullable=True)  # individual, couple, family, group
+    price = db.Column(db.Integer, nullable=True)
+    notes = db.Column(db.Text, nullable=True)
+    valid_from = db.Column(db.Date, nullable=False)
+    valid_until = db.Column(db.Date, nullable=True)  # None = sem data de término
+    exception_dates = db.Column(db.Text, nullable=True)  # datas "YYYY-MM-DD" sem atendimento, separadas por vírgula
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    @property
+    def weekday_list(self):
+        return sorted({int(day) for day in self.weekdays.split(',') if day.strip()})
+
+    @property
+    def time_list(self):
+        return sorted({datetime.strptime(value.strip(), '%H:%M').time() for value in self.start_times.split(',') if value.strip()})
+
+    @property
+    def exception_set(self):
+        if not self.exception_dates:
+            return set()
+        return {datetime.strptime(value.strip(), '%Y-%m-%d').date() for value in self.exception_dates.split(',') if value.strip()}
+
+    def days(self, date_from, date_to):
+        """Datas da janela [date_from, date_to] em que a regra gera horários"""
+        start = max(date_from, self.valid_from)
+        end = min(date_to, self.valid_until) if self.valid_until else date_to
+        weekdays = set(self.weekday_list)
+        exceptions = self.exception_set
+        current = start
+        while current <= end:
+            if current.weekday() in weekdays and current not in exceptions:
+                yield current
+            current += timedelta(days=1)
+
+    def occurs_at(self, day, start_time):
+        return start_time in self.time_list and any(self.days(day, day))
+
+    def virtual_slot_id(self, day, start_time):
+        return f"rule-{self.rule_id}-{day.strftime('%Y%m%d')}-{start_time.strftime('%H%M')}"
\ No newline at end of file
@@ -0,0 +1,20 @@
+from db import db
+
+class DoctorDailyStats(db.Model):
+    """Resumo diário por médico, mantido incrementalmente a partir de
+    evoluções, agenda, consultas e slots (ver StatsController).
+
+    Sem chave estrangeira para doctors: o resumo é derivado e pode ser
+    reconstruído a qualquer momento com `flask stats rebuild`.
+    """
+    __tablename__ = 'doctor_daily_stats'
+
+    doctor_id = db.Column(db.String(20), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    sessions = db.Column(db.Integer, default=0, nullable=False)  # evoluções registradas
+    appointments = db.Column(db.Integer, default=0, nullable=False)  # agenda + consultas não canceladas
+    cancellations = db.Column(db.Integer, default=0, nullable=False)
+    distinct_patients = db.Column(db.Integer, default=0, nullable=False)
+    minutes = db.Column(db.Integer, default=0, nullable=False)  # soma da duração das evoluções
+    revenue = db.Column(db.Integer, default=0, nullable=False)  # centavos dos slots reservados
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
@@ -16,6 +16,10 @@ class Doctors(UserMixin, db.Model):
     address = db.Column(db.String(200), nullable=True)
     specialty = db.Column(db.String(50), nullable=False)
     crm = db.Column(db.String(20), nullable=True)
+    # Token secreto da URL do feed .ics da agenda (ver CalendarFeedController)
+    calendar_token = db.Column(db.String(64), nullable=True, unique=True, index=True)
+    # Incrementado a cada alteração de slots ou regras do médico (ver controllers/availability_version.py)
+    availability_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
 
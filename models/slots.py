@@ -2,6 +2,13 @@ from db import db
 
 class Slots(db.Model):
     __tablename__ = 'slots'
+    __table_args__ = (
+        # Um médico não pode ter dois horários começando no mesmo instante;
+        # a constraint também serve de índice para buscas por médico/data/horário
+        db.UniqueConstraint('doctor_id', 'appointment_date', 'start_time', name='uq_slots_doctor_date_start'),
+        # Listagens de horários livres (por médico, filtrando is_booked e ordenando por data/horário)
+        db.Index('ix_slots_doctor_booked_date_start', 'doctor_id', 'is_booked', 'appointment_date', 'start_time'),
+    )
 
     slot_id = db.Column(db.String(20), primary_key=True, nullable=False)
     doctor_id = db.Column(db.String(20), db.ForeignKey('doctors.id'), nullable=False)
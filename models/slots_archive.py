@@ -0,0 +1,20 @@
+from db import db
+
+class SlotsArchive(db.Model):
+    """Horários vencidos e não reservados retirados da tabela slots.
+
+    Mantém as mesmas colunas de Slots para consulta histórica; a tabela quente
+    fica restrita ao horizonte futuro (ver SlotsController.archive_expired_slots).
+    """
+    __tablename__ = 'slots_archive'
+
+    slot_id = db.Column(db.String(20), primary_key=True, nullable=False)
+    doctor_id = db.Column(db.String(20), nullable=False, index=True)
+    appointment_date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    appointment_type = db.Column(db.String(50), nullable=True)
+    price = db.Column(db.Integer, nullable=True)
+    notes = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, server_default=db.func.now())
@@ -0,0 +1,63 @@
+"""
+Fixtures compartilhadas pelos testes da aplicação principal
+
+Monta uma aplicação Flask mínima sobre um SQLite temporário com os mesmos
+modelos e controladores de app.py, sem depender do .env nem do banco local.
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import pytest
+from cryptography.fernet import Fernet
+from flask import Flask
+
+from db import db
+from models.user import User
+from models.doctors import Doctors
+from models.appointments import Appointments
+from models.slots import Slots
+from models.availability_rules import AvailabilityRules
+from models.slots_archive import SlotsArchive
+from models.doctor_daily_stats import DoctorDailyStats
+from models.blog_model import BlogModel
+from dashboard_psi.models import Paciente, Evolucao, Agenda
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__, root_path=ROOT_DIR)
+    app.config.update(
+        TESTING=True,
+        SECRET_KEY='test-secret',
+        ENCRYPTION_KEY=Fernet.generate_key().decode('utf-8'),
+        SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'test.db'),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def doctor(app):
+    doctor = Doctors(id='doc-1', email='doc@teste.com', name='Dra. Teste',
+                     password='x', specialty='Psicologia Clínica')
+    db.session.add(doctor)
+    db.session.commit()
+    return doctor
+
+
+@pytest.fixture
+def user(app):
+    user = User(id='user-1', email='paciente@teste.com', name='Paciente Teste', password='x')
+    db.session.add(user)
+    db.session.commit()
+    return user
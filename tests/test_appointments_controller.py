@@ -0,0 +1,139 @@
+from datetime import date, datetime, time, timedelta
+
+from db import db
+from models.user import User
+from models.doctors import Doctors
+from models.appointments import Appointments
+from models.slots import Slots
+from controllers.appointments_controller import AppointmentsController
+
+
+def add_appointment(appointment_id, user_id, doctor_id, when, status='scheduled'):
+    db.session.add(Appointments(appointment_id=appointment_id, user_id=user_id, doctor_id=doctor_id,
+                                appointment_date=when, status=status))
+
+
+def test_batch_creates_series_in_one_transaction(app, doctor, user):
+    start = datetime.combine(date.today() + timedelta(days=1), time(14))
+    add_appointment('a-busy', 'user-1', doctor.id, start + timedelta(weeks=2))
+    db.session.commit()
+    series = [start + timedelta(weeks=i) for i in range(4)] + [start + timedelta(minutes=30)]
+
+    results = AppointmentsController().create_appointments_batch(user.id, doctor.id, series)
+
+    assert [result['status'] for result in results] == ['created', 'created', 'conflict', 'created', 'conflict']
+    assert [result['appointment_date'] for result in results] == series
+    created = {result['appointment_id'] for result in results if result['appointment_id']}
+    assert {a.appointment_id for a in Appointments.query.filter(Appointments.appointment_id.in_(created))} == created
+    assert db.session.get(User, user.id).appointment_count == 3
+    assert db.session.get(Doctors, doctor.id).appointment_count == 3
+
+
+def test_monthly_stats_single_query(app, doctor, user):
+    today = date.today()
+    month_start = datetime.combine(today.replace(day=1), time())
+    veteran = User(id='user-2', email='antigo@teste.com', name='Antigo', password='x')
+    db.session.add(veteran)
+    add_appointment('a-old', veteran.id, doctor.id, month_start - timedelta(days=40), 'completed')
+    add_appointment('a-1', veteran.id, doctor.id, month_start + timedelta(hours=9), 'completed')
+    add_appointment('a-2', user.id, doctor.id, month_start + timedelta(hours=10), 'no_show')
+    add_appointment('a-3', user.id, doctor.id, datetime.combine(today, time(23, 59)), 'completed')
+    add_appointment('a-next', user.id, doctor.id, (month_start + timedelta(days=32)).replace(day=1), 'completed')
+    next_month = (month_start + timedelta(days=32)).replace(day=1).date()
+    db.session.add_all([
+        Slots(slot_id='s-1', doctor_id=doctor.id, appointment_date=today, start_time=time(23, 59),
+              end_time=time(23, 59), price=15000, is_booked=True),
+        Slots(slot_id='s-2', doctor_id=doctor.id, appointment_date=today, start_time=time(23, 0),
+              end_time=time(23, 50), price=15000),
+        Slots(slot_id='s-3', doctor_id=doctor.id, appointment_date=next_month, start_time=time(9),
+              end_time=time(9, 50), price=15000),
+    ])
+    db.session.commit()
+
+    stats = AppointmentsController().get_monthly_stats(doctor.id)
+
+    assert stats['total_appointments_month'] == 3
+    assert stats['appointments_today'] == (3 if today.day == 1 else 1)
+    assert stats['active_patients'] == 2
+    assert stats['new_patients_month'] == 1
+    assert stats['available_slots'] == 1
+    assert stats['attendance_rate'] == 67
+    assert stats['earnings_month'] == 150.0
+
+
+def test_date_filters_match_whole_days(app, doctor, user):
+    day = date(2030, 1, 7)
+    for hour, offset in ((0, 0), (9, 0), (23, 0), (0, 1), (12, -1)):
+        add_appointment(f'a-{hour}-{offset}', user.id, doctor.id,
+                        datetime.combine(day + timedelta(days=offset), time(hour)))
+    db.session.commit()
+    controller = AppointmentsController()
+
+    def ids(appointments):
+        return sorted(a.appointment_id for a in appointments)
+
+    assert ids(controller.get_appointments_by_doctor_and_date(doctor.id, day)) == ['a-0-0', 'a-23-0', 'a-9-0']
+    assert ids(controller.get_appointments_by_date(datetime.combine(day, time(9)))) == ['a-9-0']
+    # Limites em datas valem como 00:00 (mesmo resultado da comparação direta com a coluna)
+    assert ids(controller.get_appointments_by_user_and_date_range(user.id, day - timedelta(days=1), day)) == \
+        ['a-0-0', 'a-12--1']
+    assert ids(controller.get_appointments_by_doctor_and_date_range(
+        doctor.id, datetime.combine(day, time(9)), datetime.combine(day, time(23)))) == ['a-23-0', 'a-9-0']
+
+
+def test_appointments_page_walks_history_with_cursor(app, doctor, user):
+    start = datetime(2030, 1, 7, 9)
+    for i in range(7):
+        # Dois horários iguais testam o desempate por appointment_id
+        add_appointment(f'p-{i}', user.id, doctor.id, start + timedelta(days=i // 2),
+                        'cancelled' if i == 3 else 'scheduled')
+    db.session.commit()
+    controller = AppointmentsController()
+
+    seen, cursor = [], None
+    while True:
+        page = controller.get_appointments_page(page_size=2, cursor=cursor, doctor_id=doctor.id,
+                                                status='scheduled', descending=True,
+                                                columns=[Appointments.appointment_id])
+        seen.extend(row.appointment_id for row in page['items'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert seen == ['p-6', 'p-5', 'p-4', 'p-2', 'p-1', 'p-0']
+    assert [a.appointment_id for a in controller.query_appointments(
+        user_id=user.id, day=date(2030, 1, 8))] == ['p-2', 'p-3']
+
+
+def test_patients_roster_pages_with_sql_age(app, doctor):
+    today = date.today()
+    for i, name in enumerate(['Carla', 'Ana', 'Bruno', 'Diego']):
+        db.session.add(User(id=f'u-{i}', email=f'{i}@teste.com', name=name, password='x',
+                            birth_date=date(today.year - 30, 1, 1) if i == 0 else None))
+        for session in range(i + 1):
+            add_appointment(f'r-{i}-{session}', f'u-{i}', doctor.id, datetime(2030, 1, 1 + i, 9 + session))
+    # Aniversário amanhã: ainda não completou a idade deste ano
+    tomorrow = today + timedelta(days=1)
+    if tomorrow.year == today.year:
+        db.session.get(User, 'u-1').birth_date = tomorrow.replace(year=today.year - 20)
+    db.session.commit()
+    controller = AppointmentsController()
+
+    first = controller.get_doctors_patients_page(doctor.id, page_size=3)
+    second = controller.get_doctors_patients_page(doctor.id, page_size=3, cursor=first['next_cursor'])
+    assert [p['name'] for p in first['patients'] + second['patients']] == ['Ana', 'Bruno', 'Carla', 'Diego']
+    assert second['next_cursor'] is None
+    assert first['total_estimate'] == 4
+
+    carla = first['patients'][2]
+    assert (carla['age'], carla['phone'], carla['last_appointment']) == (30, 'Não informado', '01/01/2030')
+    if tomorrow.year == today.year:
+        assert first['patients'][0]['age'] == 19
+
+    by_sessions = controller.get_doctors_patients_page(doctor.id, sort='total_sessions', descending=True, page_size=2)
+    assert [p['total_sessions'] for p in by_sessions['patients']] == [4, 3]
+    by_last = controller.get_doctors_patients_page(doctor.id, sort='last_appointment', page_size=2)
+    by_last_next = controller.get_doctors_patients_page(doctor.id, sort='last_appointment', page_size=2,
+                                                        cursor=by_last['next_cursor'])
+    assert [p['name'] for p in by_last['patients'] + by_last_next['patients']] == ['Carla', 'Ana', 'Bruno', 'Diego']
+    assert len(controller.get_doctors_patients(doctor.id)) == 4
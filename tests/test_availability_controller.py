@@ -0,0 +1,62 @@
+from datetime import date, time, timedelta
+
+from models.slots import Slots
+from controllers.availability_controller import AvailabilityController
+from controllers.slot_controller import SlotsController
+
+
+def next_weekday(weekday):
+    today = date.today()
+    return today + timedelta(days=(weekday - today.weekday()) % 7 or 7)
+
+
+def test_rule_expands_lazily_and_merges_with_concrete_slots(app, doctor, user):
+    monday = next_weekday(0)
+    rule = AvailabilityController().create_rule(
+        doctor.id, weekdays=[0], start_times=[time(9), time(10)],
+        valid_from=monday, valid_until=monday + timedelta(weeks=3),
+        exception_dates=[monday + timedelta(weeks=1)], price=15000
+    )
+    controller = SlotsController()
+    controller.book_slot(rule.virtual_slot_id(monday, time(10)), user.id)
+
+    available = controller.get_available_slots_by_date(doctor.id, monday)
+    assert [slot.start_time for slot in available] == [time(9)]
+    assert available[0].slot_id == rule.virtual_slot_id(monday, time(9))
+    assert controller.get_available_slots_by_date(doctor.id, monday + timedelta(weeks=1)) == []
+
+    days = controller.get_free_slots_window(doctor.id, page_size=10)
+    assert [day['date'] for day in days] == [str(monday + timedelta(weeks=w)) for w in (0, 2, 3)]
+    assert len(controller.get_free_slots_by_doctor(doctor.id)) == 3
+    assert Slots.query.count() == 1
+
+
+def test_free_slots_window_skips_days_whose_occurrences_are_taken(app, doctor, user):
+    monday = next_weekday(0)
+    rule = AvailabilityController().create_rule(
+        doctor.id, weekdays=[0], start_times=[time(9)],
+        valid_from=monday, valid_until=monday + timedelta(weeks=3)
+    )
+    controller = SlotsController()
+    controller.book_slot(rule.virtual_slot_id(monday, time(9)), user.id)
+
+    first_page = controller.get_free_slots_window(doctor.id, page_size=1)
+    second_page = controller.get_free_slots_window(doctor.id, page_size=1, page=2)
+
+    assert [day['date'] for day in first_page] == [str(monday + timedelta(weeks=1))]
+    assert [day['date'] for day in second_page] == [str(monday + timedelta(weeks=2))]
+
+
+def test_booking_virtual_slot_materializes_it_once(app, doctor, user):
+    monday = next_weekday(0)
+    rule = AvailabilityController().create_rule(doctor.id, weekdays=[0], start_times=[time(9)], valid_from=monday)
+    controller = SlotsController()
+    virtual_id = rule.virtual_slot_id(monday, time(9))
+
+    slot, appointment = controller.book_slot(virtual_id, user.id)
+
+    assert slot.is_booked and slot.slot_id != virtual_id
+    assert slot.end_time == time(9, 50)
+    assert controller.book_slot(virtual_id, user.id) == (None, None)
+    assert controller.book_slot(rule.virtual_slot_id(monday + timedelta(days=1), time(9)), user.id) == (None, None)
+    assert controller.get_available_slots_by_date(doctor.id, monday) == []
@@ -0,0 +1,32 @@
+from controllers import cache as cache_module
+from controllers.cache import TTLCache
+
+
+def test_expired_keys_and_tag_references_are_pruned(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    cache = TTLCache(ttl=60)
+    for i in range(10):
+        cache.set(('doctor', i), i, tags=[('doctor', i), 'todos'])
+    assert len(cache) == 10 and len(cache._tags) == 11
+
+    # Expirada, a chave sai na leitura junto com as referências nas tags
+    now[0] += 61
+    assert cache.get(('doctor', 0)) is None
+    assert ('doctor', 0) not in cache._tags and ('doctor', 0) not in cache._tags['todos']
+
+    # A próxima escrita varre as demais expiradas
+    cache.set('novo', 1)
+    assert len(cache) == 1 and cache._tags == {} and cache._key_tags == {}
+
+
+def test_max_size_evicts_oldest_keys():
+    cache = TTLCache(ttl=None, max_size=3)
+    for i in range(5):
+        cache.set(i, i, tags=[('k', i)])
+    assert len(cache) == 3
+    assert [cache.get(i) for i in range(5)] == [None, None, 2, 3, 4]
+    assert set(cache._tags) == {('k', 2), ('k', 3), ('k', 4)}
+
+    cache.invalidate_tags([('k', 3)])
+    assert cache.get(3) is None and ('k', 3) not in cache._tags
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from db import db
+from models.appointments import Appointments
+from dashboard_psi.models import Paciente, Agenda
+from controllers.calendar_feed_controller import CalendarFeedController
+
+
+def test_feed_merges_agenda_and_appointments_in_order(app, doctor, user):
+    now = datetime(2030, 3, 10, 12)
+    paciente = Paciente(nome_completo='Maria da Silva', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    db.session.add_all([
+        Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=now + timedelta(days=2),
+               local='Consultório, sala 3', status='confirmada'),
+        Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=now + timedelta(days=400)),
+        Appointments(appointment_id='a-1', user_id=user.id, doctor_id=doctor.id, appointment_date=now + timedelta(days=1)),
+        Appointments(appointment_id='a-2', user_id=user.id, doctor_id=doctor.id,
+                     appointment_date=now + timedelta(days=3), status='cancelled'),
+    ])
+    db.session.commit()
+
+    controller = CalendarFeedController()
+    start, end = controller.feed_window(now=now)
+    chunks = list(controller.iter_ics(doctor.id, start, end, yield_per=1))
+    ics = b''.join(chunks).decode('utf-8')
+
+    assert len(chunks) == 5
+    assert ics.startswith('BEGIN:VCALENDAR\r\n') and ics.endswith('END:VCALENDAR\r\n')
+    assert ics.count('BEGIN:VEVENT') == 3
+    assert ics.index('UID:appointment-a-1@') < ics.index('UID:agenda-') < ics.index('UID:appointment-a-2@')
+    assert 'SUMMARY:Sessão - M.D.S.\r\n' in ics and 'Maria' not in ics
+    assert 'LOCATION:Consultório\\, sala 3\r\n' in ics
+    assert 'DTSTART:20300312T120000\r\nDTEND:20300312T125000\r\n' in ics
+    assert 'STATUS:CANCELLED' in ics and 'STATUS:CONFIRMED' in ics
+
+
+def test_feed_version_changes_with_window_events(app, doctor, user):
+    now = datetime(2030, 3, 10, 12)
+    controller = CalendarFeedController()
+    start, end = controller.feed_window(now=now)
+    assert controller.get_feed_version(doctor.id, start, end)[0] is None
+
+    db.session.add(Appointments(appointment_id='a-1', user_id=user.id, doctor_id=doctor.id, appointment_date=now))
+    db.session.commit()
+    last_modified, signature = controller.get_feed_version(doctor.id, start, end)
+    assert last_modified is not None
+    assert controller.get_feed_version(doctor.id, start, end)[1] == signature
+
+    db.session.delete(db.session.get(Appointments, 'a-1'))
+    db.session.commit()
+    assert controller.get_feed_version(doctor.id, start, end)[1] != signature
+
+
+def test_token_lookup_and_line_folding(app, doctor):
+    controller = CalendarFeedController()
+    token = controller.get_or_create_token(doctor.id)
+    assert controller.get_or_create_token(doctor.id) == token
+    assert controller.get_doctor_id_by_token(token) == doctor.id
+    assert controller.regenerate_token(doctor.id) != token
+    assert controller.get_doctor_id_by_token(token) is None
+
+    folded = CalendarFeedController._lines('LOCATION:' + 'ç' * 80)
+    assert all(len(line) <= 75 for line in folded.split(b'\r\n'))
+    assert folded.replace(b'\r\n ', b'').decode('utf-8') == 'LOCATION:' + 'ç' * 80 + '\r\n'
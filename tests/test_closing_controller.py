@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import db
+from models.appointments import Appointments
+from dashboard_psi.models import Paciente, Agenda
+from controllers.closing_controller import ClosingController
+
+CUTOFF = datetime(2030, 1, 10)
+
+
+def test_close_past_due_in_batches(app, doctor, user):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    for i, status in enumerate(['agendada', 'confirmada', 'cancelada', 'agendada', 'agendada']):
+        db.session.add(Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, status=status,
+                              data_hora=CUTOFF - timedelta(days=5 - i)))
+    db.session.add(Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=CUTOFF + timedelta(hours=9)))
+    for i, status in enumerate(['scheduled', 'cancelled', 'scheduled']):
+        db.session.add(Appointments(appointment_id=f'a-{i}', user_id=user.id, doctor_id=doctor.id,
+                                    appointment_date=CUTOFF - timedelta(days=i + 1), status=status))
+    db.session.add(Appointments(appointment_id='a-future', user_id=user.id, doctor_id=doctor.id,
+                                appointment_date=CUTOFF + timedelta(days=1)))
+    db.session.commit()
+
+    report = ClosingController().close_past_due(before=CUTOFF, agenda_status='faltou',
+                                                appointment_status='no_show', batch_size=2)
+
+    assert (report['agenda'], report['appointments'], report['batches']) == (4, 2, 3)
+    db.session.expire_all()
+    statuses = sorted(status for (status,) in db.session.query(Agenda.status))
+    assert statuses == ['agendada', 'cancelada', 'faltou', 'faltou', 'faltou', 'faltou']
+    assert {a.appointment_id: a.status for a in Appointments.query} == {
+        'a-0': 'no_show', 'a-1': 'cancelled', 'a-2': 'no_show', 'a-future': 'scheduled'
+    }
+    assert ClosingController().close_past_due(before=CUTOFF)['batches'] == 0
+
+
+def test_close_past_due_rejects_open_status(app):
+    with pytest.raises(ValueError):
+        ClosingController().close_past_due(agenda_status='agendada')
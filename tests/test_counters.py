@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from db import db
+from models.user import User
+from models.doctors import Doctors
+from models.appointments import Appointments
+from controllers.counters import increment_counter, reconcile_counters
+from controllers.user_controller import UserController
+
+
+def test_interleaved_increments_are_not_lost(app, doctor, user):
+    # As duas sessões leem o contador antes de qualquer gravação: lendo e gravando
+    # o valor lido (+1), a segunda sobrescreveria a primeira e o total ficaria 1
+    for model, object_id in ((User, user.id), (Doctors, doctor.id)):
+        with Session(db.engine) as first, Session(db.engine) as second:
+            read_first, read_second = first.get(model, object_id), second.get(model, object_id)
+            assert read_first.appointment_count == read_second.appointment_count == 0
+            assert increment_counter(first, model, object_id) == 1
+            first.commit()
+            assert increment_counter(second, model, object_id) == 2
+            second.commit()
+        db.session.expire_all()
+        assert db.session.get(model, object_id).appointment_count == 2
+    assert UserController().increment_appointment_count('missing') is None
+
+
+def test_reconcile_recomputes_from_appointments(app, doctor, user):
+    db.session.add_all([
+        Appointments(appointment_id=f'a-{i}', user_id=user.id, doctor_id=doctor.id,
+                     appointment_date=datetime(2030, 1, 1 + i, 9))
+        for i in range(3)
+    ])
+    db.session.add(User(id='user-2', email='outro@teste.com', name='Outro', password='x', appointment_count=7))
+    db.session.commit()
+
+    assert reconcile_counters(db.session) == {'users': 2, 'doctors': 1}
+    assert db.session.get(User, user.id).appointment_count == 3
+    assert db.session.get(User, 'user-2').appointment_count == 0
+    assert db.session.get(Doctors, doctor.id).appointment_count == 3
+    assert reconcile_counters(db.session) == {'users': 0, 'doctors': 0}
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask_login import LoginManager
+from sqlalchemy import event
+
+from db import db
+from models.doctors import Doctors
+from dashboard_psi import bp as dashboard_psi_bp
+from dashboard_psi.models import Paciente, Evolucao
+from controllers.paciente_search_controller import TYPEAHEAD_LIMIT
+
+
+@pytest.fixture
+def client(app, doctor):
+    """Cliente logado como o psicólogo, com o blueprint do dashboard registrado"""
+    login_manager = LoginManager(app)
+
+    @login_manager.user_loader
+    def load_user(user_id):
+        loaded = db.session.get(Doctors, user_id)
+        if loaded:
+            loaded.user_type = 'doctor'
+        return loaded
+
+    app.register_blueprint(dashboard_psi_bp)
+    # Rotas da aplicação principal referenciadas pelos templates do dashboard
+    for endpoint in ('logout', 'p_login', 'psychologist_dashboard'):
+        app.add_url_rule(f'/{endpoint}', endpoint, lambda: '')
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = doctor.id
+        session['_fresh'] = True
+    return client
+
+
+def add_pacientes(doctor_id, total, start=0):
+    for i in range(start, start + total):
+        paciente = Paciente(nome_completo=f'Paciente {i:03d}', psicologo_id=doctor_id)
+        db.session.add(paciente)
+        db.session.flush()
+        for day in range(i % 3):
+            db.session.add(Evolucao(paciente_id=paciente.id, conteudo_criptografado=b'x',
+                                    data_sessao=datetime(2030, 1, 1) + timedelta(days=day)))
+    db.session.commit()
+
+
+def capture_queries(client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    return statements, response.get_data(as_text=True)
+
+
+def count_queries(client, url):
+    statements, html = capture_queries(client, url)
+    return len(statements), html
+
+
+def test_dashboard_query_count_does_not_grow_with_patients(client, doctor):
+    add_pacientes(doctor.id, 3)
+    few, html = count_queries(client, '/dashboard-psicologia/')
+    assert '2 evolução(ões) registrada(s)' in html
+    assert 'Última sessão: 02/01/2030' in html
+
+    add_pacientes(doctor.id, 60, start=3)
+    many, html = count_queries(client, '/dashboard-psicologia/')
+    assert many == few
+    assert html.count('mb-3 patient-item') == 63
+
+
+def test_listar_pacientes_is_paginated_and_accent_insensitive(client, doctor):
+    add_pacientes(doctor.id, 30)
+    db.session.add(Paciente(nome_completo='João Ávila', psicologo_id=doctor.id))
+    db.session.commit()
+
+    html = client.get('/dashboard-psicologia/pacientes').get_data(as_text=True)
+    assert html.count('patient-card h-100') == 24
+    assert 'Próxima página' in html
+
+    html = client.get('/dashboard-psicologia/pacientes?search=joao avila').get_data(as_text=True)
+    assert 'João Ávila' in html and 'Próxima página' not in html
+
+    results = client.get('/dashboard-psicologia/api/pacientes/busca?q=AVILA').get_json()['results']
+    assert [paciente['nome_completo'] for paciente in results] == ['João Ávila']
+
+
+def test_dashboard_filter_returns_every_matching_patient(client, doctor):
+    add_pacientes(doctor.id, 12)
+
+    results = client.get('/dashboard-psicologia/api/pacientes/busca?q=paciente').get_json()['results']
+    ids = client.get('/dashboard-psicologia/api/pacientes/busca/ids?q=paciente').get_json()['ids']
+    assert len(results) == TYPEAHEAD_LIMIT
+    assert len(ids) == 12
+    assert client.get('/dashboard-psicologia/api/pacientes/busca/ids?q=').get_json()['ids'] == []
+
+
+def test_evolucoes_paciente_searches_the_blind_index(client, doctor):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    for dia, conteudo in ((7, 'Relatou insônia.'), (14, 'Falou sobre o trabalho.')):
+        evolucao = Evolucao(paciente_id=paciente.id, data_sessao=datetime(2030, 1, dia, 9))
+        evolucao.set_conteudo(conteudo)
+        db.session.add(evolucao)
+    db.session.commit()
+
+    html = client.get(f'/dashboard-psicologia/pacientes/{paciente.id}/evolucoes?search=Insonia').get_data(as_text=True)
+    assert 'Relatou insônia.' in html
+    assert 'Falou sobre o trabalho.' not in html
+
+
+def test_evolucoes_paciente_lists_previews_without_loading_notes(client, doctor):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    for dia in range(1, 4):
+        evolucao = Evolucao(paciente_id=paciente.id, data_sessao=datetime(2030, 1, dia, 9))
+        evolucao.set_conteudo(f'Sessão {dia}: ' + 'relato ' * 200)
+        db.session.add(evolucao)
+    db.session.commit()
+    paciente_id = paciente.id
+    db.session.expunge_all()
+
+    statements, html = capture_queries(client, f'/dashboard-psicologia/pacientes/{paciente_id}/evolucoes')
+    assert 'Sessão 3: relato' in html and '202 palavras' in html
+    assert not any('conteudo_criptografado' in statement for statement in statements)
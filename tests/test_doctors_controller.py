@@ -0,0 +1,32 @@
+from datetime import date, datetime, time, timedelta
+
+from db import db
+from models.doctors import Doctors
+from controllers.availability_controller import AvailabilityController
+from controllers.doctors_controller import DoctorsController, availability_summary_cache
+from controllers.slot_controller import SlotsController
+
+
+def test_availability_summary_is_cached_until_slots_change(app, doctor, user):
+    availability_summary_cache.invalidate()
+    other = Doctors(id='doc-2', email='doc2@teste.com', name='Dr. Outro', password='x', specialty='Neuropsicologia')
+    db.session.add(other)
+    db.session.commit()
+    tomorrow = date.today() + timedelta(days=1)
+    slots = SlotsController()
+    slots.create_slots_bulk(doctor.id, [tomorrow, tomorrow + timedelta(days=30)], [time(9), time(14)], 50)
+    AvailabilityController().create_rule(other.id, weekdays=[tomorrow.weekday()], start_times=[time(8)], valid_from=tomorrow)
+
+    controller = DoctorsController()
+    summary = controller.get_availability_summary()
+    assert summary[doctor.id] == {'next_slot': datetime.combine(tomorrow, time(9)), 'open_slots': 2}
+    assert summary[other.id] == {'next_slot': datetime.combine(tomorrow, time(8)), 'open_slots': 2}
+    assert controller.get_availability_summary() is summary
+
+    first = slots.get_slot_by_doctor_date_time(doctor.id, tomorrow, time(9))
+    slots.book_slot(first.slot_id, user.id)
+    summary = controller.get_availability_summary()
+    assert summary[doctor.id] == {'next_slot': datetime.combine(tomorrow, time(14)), 'open_slots': 1}
+
+    slots.create_slots_bulk(doctor.id, [tomorrow], [time(7)], 50)
+    assert controller.get_availability_summary()[doctor.id]['open_slots'] == 2
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from db import db
+from dashboard_psi.models import Paciente, Evolucao
+from controllers.evolucao_preview_controller import EvolucaoPreviewController
+
+
+def add_evolucao(doctor_id, conteudo):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor_id)
+    db.session.add(paciente)
+    db.session.flush()
+    evolucao = Evolucao(paciente_id=paciente.id, data_sessao=datetime(2030, 1, 7, 9))
+    evolucao.set_conteudo(conteudo)
+    db.session.add(evolucao)
+    db.session.commit()
+    evolucao_id = evolucao.id
+    db.session.expunge_all()
+    return evolucao_id
+
+
+def test_preview_is_read_without_the_full_content(app, doctor):
+    conteudo = 'palavra ' * 100
+    evolucao = db.session.get(Evolucao, add_evolucao(doctor.id, conteudo))
+
+    assert evolucao.get_previa() == conteudo[:300] + '...'
+    assert evolucao.get_previa(16) == 'palavra palavra ...'
+    assert evolucao.total_palavras == 100
+    assert 'conteudo_criptografado' not in evolucao.__dict__
+
+    assert evolucao.get_conteudo() == conteudo
+    evolucao.set_conteudo('Sessão curta.')
+    db.session.commit()
+    assert (evolucao.get_previa(), evolucao.total_palavras) == ('Sessão curta.', 2)
+
+
+def test_rebuild_fills_missing_previews(app, doctor):
+    evolucao_id = add_evolucao(doctor.id, 'Relatou ansiedade no trabalho.')
+    db.session.execute(Evolucao.__table__.update().values(previa_criptografada=None, total_palavras=None))
+    db.session.commit()
+    evolucao = db.session.get(Evolucao, evolucao_id)
+    updated_at = evolucao.updated_at
+    # Sem prévia, cai no conteúdo completo
+    assert evolucao.get_previa() == 'Relatou ansiedade no trabalho.'
+
+    report = EvolucaoPreviewController().rebuild(batch_size=1)
+    assert (report['evolucoes'], report['batches']) == (1, 1)
+    db.session.expire_all()
+    evolucao = db.session.get(Evolucao, evolucao_id)
+    assert evolucao.previa_criptografada is not None and evolucao.total_palavras == 4
+    assert evolucao.updated_at == updated_at
+    assert EvolucaoPreviewController().rebuild()['evolucoes'] == 0
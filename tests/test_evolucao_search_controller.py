@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from db import db
+from dashboard_psi.models import Paciente, Evolucao, EvolucaoToken
+from controllers.evolucao_search_controller import EvolucaoSearchController
+
+
+def add_evolucao(paciente_id, dia, conteudo):
+    evolucao = Evolucao(paciente_id=paciente_id, data_sessao=datetime(2030, 1, dia, 9))
+    evolucao.set_conteudo(conteudo)
+    db.session.add(evolucao)
+    db.session.commit()
+    return evolucao
+
+
+def test_search_matches_whole_words_without_decrypting(app, doctor):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    outro = Paciente(nome_completo='João', psicologo_id=doctor.id)
+    db.session.add_all([paciente, outro])
+    db.session.commit()
+    primeira = add_evolucao(paciente.id, 7, 'Relatou ansiedade no trabalho.')
+    segunda = add_evolucao(paciente.id, 14, 'Ansiedade menor; falou sobre a família e o trabalho.')
+    add_evolucao(outro.id, 14, 'Ansiedade e trabalho.')
+    controller = EvolucaoSearchController()
+
+    assert controller.search(paciente.id, 'ANSIEDADE') == [segunda, primeira]
+    assert controller.search(paciente.id, 'familia trabalho') == [segunda]
+    assert controller.search(paciente.id, 'ansiedade férias') == []
+    assert controller.search(paciente.id, 'ansie') == []
+    assert controller.search(paciente.id, 'a') == []
+
+    # Os tokens não guardam o texto
+    tokens = {token for (token,) in db.session.query(EvolucaoToken.token)}
+    assert all(len(token) == 32 and 'ansiedade' not in token for token in tokens)
+
+    # Editar o conteúdo substitui os tokens; excluir a evolução os remove
+    primeira.set_conteudo('Sessão sobre o sono.')
+    db.session.commit()
+    assert controller.search(paciente.id, 'trabalho') == [segunda]
+    assert controller.search(paciente.id, 'sono') == [primeira]
+    db.session.delete(segunda)
+    db.session.commit()
+    assert db.session.query(EvolucaoToken).filter_by(evolucao_id=segunda.id).count() == 0
+
+
+def test_rebuild_restores_missing_tokens(app, doctor):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.commit()
+    evolucoes = [add_evolucao(paciente.id, dia, f'Sessão {dia} sobre ansiedade') for dia in range(1, 6)]
+    db.session.query(EvolucaoToken).delete()
+    db.session.commit()
+    assert EvolucaoSearchController().search(paciente.id, 'ansiedade') == []
+
+    report = EvolucaoSearchController().rebuild(batch_size=2)
+    assert (report['evolucoes'], report['batches']) == (5, 3)
+    assert EvolucaoSearchController().search(paciente.id, 'ansiedade') == evolucoes[::-1]
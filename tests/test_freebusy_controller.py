@@ -0,0 +1,77 @@
+from datetime import date, datetime, time, timedelta
+
+from db import db
+from models.appointments import Appointments
+from dashboard_psi.models import Paciente, Agenda
+from controllers.availability_controller import AvailabilityController
+from controllers.freebusy_controller import FreeBusyController, FreeBusyMap
+from controllers.slot_controller import SlotsController
+
+DAY = date(2030, 1, 7)
+
+
+def at(hour, minute=0, day=DAY):
+    return datetime.combine(day, time(hour, minute))
+
+
+def test_overlap_and_free_windows():
+    freebusy = FreeBusyMap(DAY, DAY)
+    freebusy.mark(at(9), at(9, 50))
+    freebusy.mark(at(23, 30), at(0, 20, DAY + timedelta(days=1)))
+
+    assert freebusy.overlaps(at(9, 45))
+    assert freebusy.overlaps(at(8, 30))
+    assert freebusy.is_free(at(8, 10))
+    assert freebusy.is_free(at(9, 50))
+    assert freebusy.overlaps(at(0, 0, DAY + timedelta(days=1)), 10)
+    assert freebusy.free_windows(DAY, 50, day_start=time(8), day_end=time(12)) == [
+        (at(8), at(9)), (at(9, 50), at(12))
+    ]
+
+
+def test_validate_series_rejects_self_overlap():
+    freebusy = FreeBusyMap(DAY, DAY)
+    results = freebusy.validate_series([at(9), at(9, 30), at(10)])
+    assert [ok for _, ok in results] == [True, False, True]
+
+
+def test_build_uses_slots_agenda_and_appointments(app, doctor, user):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    db.session.add(Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=at(14), status='agendada'))
+    db.session.add(Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=at(16), status='cancelada'))
+    db.session.add(Appointments(appointment_id='apt-1', user_id=user.id, doctor_id=doctor.id, appointment_date=at(11)))
+    db.session.commit()
+    SlotsController().create_slots_bulk(doctor.id, [DAY], [time(8)], 50)
+
+    freebusy = FreeBusyController().build(doctor.id, DAY, DAY)
+
+    assert freebusy.overlaps(at(14, 30))
+    assert freebusy.overlaps(at(10, 30))
+    assert freebusy.is_free(at(16))
+    assert freebusy.is_free(at(8, 20))
+    assert freebusy.overlaps(at(8, 20), include_offered=True)
+
+
+def test_create_slots_bulk_skips_overlapping_times(app, doctor):
+    controller = SlotsController()
+    controller.create_slots_bulk(doctor.id, [DAY], [time(9)], 50)
+    report = controller.create_slots_bulk(doctor.id, [DAY], [time(9, 30), time(10), time(10, 30)], 50)
+    assert report['created'] == [(DAY, time(10))]
+    assert report['skipped'] == [(DAY, time(9, 30)), (DAY, time(10, 30))]
+
+
+def test_create_slots_bulk_skips_times_offered_by_rules(app, doctor):
+    AvailabilityController().create_rule(
+        doctor.id, weekdays=[DAY.weekday()], start_times=[time(9)], valid_from=DAY,
+        valid_until=DAY + timedelta(weeks=1), exception_dates=[DAY + timedelta(weeks=1)]
+    )
+    controller = SlotsController()
+
+    report = controller.create_slots_bulk(doctor.id, [DAY, DAY + timedelta(weeks=1)], [time(9, 30)], 50)
+
+    assert report['created'] == [(DAY + timedelta(weeks=1), time(9, 30))]
+    freebusy = FreeBusyController().build(doctor.id, DAY, DAY)
+    assert freebusy.overlaps(at(9, 30), include_offered=True)
+    assert freebusy.is_free(at(9, 30))
@@ -0,0 +1,51 @@
+import pytest
+
+from db import db
+from dashboard_psi.models import Paciente
+from controllers.paciente_search_controller import PacienteSearchController
+
+
+def add_pacientes(doctor_id, *nomes):
+    db.session.add_all([Paciente(nome_completo=nome, psicologo_id=doctor_id) for nome in nomes])
+    db.session.commit()
+
+
+def nomes(pacientes):
+    return [paciente.nome_completo for paciente in pacientes]
+
+
+def test_search_ignores_accents_and_case(app, doctor):
+    add_pacientes(doctor.id, 'João Ávila', 'Maria Conceição', 'Joana Silva', 'Ana 100% Teste')
+    controller = PacienteSearchController()
+
+    assert nomes(controller.search_page(doctor.id, 'joao')['items']) == ['João Ávila']
+    assert nomes(controller.search_page(doctor.id, 'CONCEICAO  maria')['items']) == ['Maria Conceição']
+    assert nomes(controller.search_page(doctor.id, '100%')['items']) == ['Ana 100% Teste']
+    assert controller.search_page(doctor.id, '_')['items'] == []
+
+    paciente = Paciente.query.filter_by(nome_completo='Joana Silva').one()
+    paciente.nome_completo = 'Joana Sílvia'
+    db.session.commit()
+    assert paciente.nome_busca == 'joana silvia'
+
+
+def test_search_pages_and_typeahead(app, doctor):
+    add_pacientes(doctor.id, *[f'Paciente {i:02d}' for i in range(5)], 'Ana Paciente')
+    controller = PacienteSearchController()
+
+    first = controller.search_page(doctor.id, 'paciente', page_size=4)
+    second = controller.search_page(doctor.id, 'paciente', page_size=4, cursor=first['next_cursor'])
+    assert nomes(first['items']) == ['Ana Paciente', 'Paciente 00', 'Paciente 01', 'Paciente 02']
+    assert nomes(second['items']) == ['Paciente 03', 'Paciente 04']
+    assert second['next_cursor'] is None
+
+    # Nomes que começam pelo termo vêm antes
+    assert nomes(controller.typeahead(doctor.id, 'pac', limit=2)) == ['Paciente 00', 'Paciente 01']
+    assert controller.typeahead(doctor.id, '  ') == []
+
+
+def test_malformed_cursor_raises_value_error(app, doctor):
+    controller = PacienteSearchController()
+    for cursor in ('sem-separador', '|joao', 'a' * 21 + '|joao', 'abc$%|joao', 'abc|João', 42):
+        with pytest.raises(ValueError):
+            controller.search_page(doctor.id, cursor=cursor)
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from db import db
+from dashboard_psi.models import Paciente, Evolucao, Agenda
+from controllers.paciente_summary_controller import PacienteSummaryController
+
+
+def summary(paciente_id):
+    paciente = db.session.get(Paciente, paciente_id)
+    db.session.refresh(paciente)
+    return paciente.total_sessoes, paciente.total_minutos, paciente.ultima_sessao, paciente.proxima_consulta
+
+
+def test_summary_follows_evolucao_and_agenda_writes(app, doctor):
+    maria = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    joao = Paciente(nome_completo='João', psicologo_id=doctor.id)
+    db.session.add_all([maria, joao])
+    db.session.commit()
+    assert summary(maria.id) == (0, 0, None, None)
+
+    primeira = Evolucao(paciente_id=maria.id, data_sessao=datetime(2030, 1, 7, 9), duracao_minutos=50,
+                        conteudo_criptografado=b'x')
+    segunda = Evolucao(paciente_id=maria.id, data_sessao=datetime(2030, 1, 14, 9), duracao_minutos=40,
+                       conteudo_criptografado=b'x')
+    consulta = Agenda(paciente_id=maria.id, psicologo_id=doctor.id, data_hora=datetime(2030, 1, 21, 9))
+    db.session.add_all([primeira, segunda, consulta,
+                        Agenda(paciente_id=maria.id, psicologo_id=doctor.id, data_hora=datetime(2030, 1, 20, 9),
+                               status='cancelada')])
+    db.session.commit()
+    assert summary(maria.id) == (2, 90, datetime(2030, 1, 14, 9), datetime(2030, 1, 21, 9))
+
+    # Mover registros de paciente recalcula o antigo e o novo
+    segunda = db.session.get(Evolucao, segunda.id)
+    segunda.paciente_id = joao.id
+    consulta = db.session.get(Agenda, consulta.id)
+    consulta.paciente_id = joao.id
+    db.session.commit()
+    assert summary(maria.id) == (1, 50, datetime(2030, 1, 7, 9), None)
+    assert summary(joao.id) == (1, 40, datetime(2030, 1, 14, 9), datetime(2030, 1, 21, 9))
+
+    db.session.get(Agenda, consulta.id).status = 'concluida'
+    db.session.delete(db.session.get(Evolucao, primeira.id))
+    db.session.commit()
+    assert summary(maria.id) == (0, 0, None, None)
+    assert summary(joao.id)[3] is None
+
+
+def test_rebuild_repairs_drifted_rows(app, doctor):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    db.session.add(Evolucao(paciente_id=paciente.id, data_sessao=datetime(2030, 1, 7, 9), duracao_minutos=50,
+                            conteudo_criptografado=b'x'))
+    db.session.commit()
+    db.session.execute(Paciente.__table__.update().values(total_sessoes=99, ultima_sessao=None))
+    db.session.commit()
+
+    assert PacienteSummaryController().rebuild(psicologo_id=doctor.id) == 1
+    assert summary(paciente.id) == (1, 50, datetime(2030, 1, 7, 9), None)
+
+
+def test_proxima_consulta_skips_past_open_entries(app, doctor):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    agora = datetime.now().replace(microsecond=0)
+    db.session.add_all([
+        # Ainda 'agendada', mas já passou (close-past ainda não rodou)
+        Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=agora - timedelta(hours=2)),
+        Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=agora + timedelta(days=7)),
+    ])
+    db.session.commit()
+    assert summary(paciente.id)[3] == agora + timedelta(days=7)
+
+    # Um valor que envelheceu desde o último recálculo não é exibido
+    db.session.execute(Paciente.__table__.update().values(proxima_consulta=agora - timedelta(hours=2)))
+    db.session.commit()
+    paciente = db.session.get(Paciente, paciente.id)
+    db.session.refresh(paciente)
+    assert paciente.proxima_consulta_futura is None
@@ -0,0 +1,165 @@
+import threading
+from datetime import date, time, timedelta
+
+from db import db
+from models.appointments import Appointments
+from models.doctors import Doctors
+from models.slots import Slots
+from models.slots_archive import SlotsArchive
+from controllers.availability_controller import AvailabilityController
+from controllers.slot_controller import SlotsController
+
+
+def test_create_slots_bulk_skips_existing(app, doctor):
+    controller = SlotsController()
+    dates = [date(2030, 1, 7) + timedelta(weeks=w) for w in range(4)]
+    times = [time(9), time(10)]
+
+    first = controller.create_slots_bulk(doctor.id, dates[:1], times, 50)
+    report = controller.create_slots_bulk(doctor.id, dates, times, 50, appointment_type='individual')
+
+    assert len(first['created']) == 2
+    assert len(report['created']) == 6
+    assert report['skipped'] == [(dates[0], time(9)), (dates[0], time(10))]
+    assert Slots.query.count() == 8
+    assert Slots.query.filter_by(start_time=time(9)).first().end_time == time(9, 50)
+
+
+def test_create_recurring_slots_keeps_free_times_on_conflicting_dates(app, doctor):
+    controller = SlotsController()
+    dates = [date(2030, 1, 7) + timedelta(weeks=w) for w in range(3)]
+    controller.create_slots_bulk(doctor.id, [dates[1]], [time(9, 30)], 50)
+
+    report = controller.create_recurring_slots(doctor.id, dates[0], [time(9), time(14)], 3, 50)
+
+    assert report['skipped'] == [(dates[1], time(9))]
+    assert report['created'] == [(day, start) for day in dates for start in (time(9), time(14))
+                                 if (day, start) != (dates[1], time(9))]
+    assert report['rule'].exception_set == {dates[1]}
+    assert [slot.start_time for slot in controller.get_available_slots_by_date(doctor.id, dates[1])] == [
+        time(9, 30), time(14)
+    ]
+
+
+def test_book_slot_has_exactly_one_winner_under_contention(app, doctor, user):
+    controller = SlotsController()
+    controller.create_slots_bulk(doctor.id, [date(2030, 1, 7)], [time(9), time(10), time(11)], 50)
+    slot_ids = [slot.slot_id for slot in Slots.query.all()]
+    user_id = user.id
+    db.session.remove()
+
+    wins = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        with app.app_context():
+            barrier.wait()
+            for slot_id in slot_ids:
+                slot, appointment = SlotsController().book_slot(slot_id, user_id)
+                if appointment:
+                    wins.append(slot_id)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(wins) == sorted(slot_ids)
+    assert Appointments.query.count() == len(slot_ids)
+    assert Slots.query.filter_by(is_booked=False).count() == 0
+
+
+def test_book_slot_rejects_booked_slot(app, doctor, user):
+    controller = SlotsController()
+    controller.create_slots_bulk(doctor.id, [date(2030, 1, 7)], [time(9)], 50)
+    slot_id = Slots.query.first().slot_id
+
+    slot, appointment = controller.book_slot(slot_id, user.id)
+    assert appointment.appointment_date.time() == time(9)
+    assert controller.book_slot(slot_id, user.id) == (None, None)
+
+
+def test_get_free_slots_window_pages_future_days(app, doctor):
+    controller = SlotsController()
+    today = date.today()
+    dates = [today + timedelta(days=d) for d in range(-3, 6)]
+    controller.create_slots_bulk(doctor.id, dates, [time(14), time(9)], 50)
+    booked = Slots.query.filter_by(appointment_date=dates[4], start_time=time(9)).first()
+    booked.is_booked = True
+    db.session.commit()
+
+    first_page = controller.get_free_slots_window(doctor.id, page_size=2)
+    second_page = controller.get_free_slots_window(doctor.id, page_size=2, page=2)
+    bounded = controller.get_free_slots_window(doctor.id, date_to=today + timedelta(days=1), page_size=10)
+
+    assert [day['date'] for day in first_page] == [str(today), str(today + timedelta(days=1))]
+    assert [slot['start_time'] for slot in first_page[0]['slots']] == ['09:00', '14:00']
+    assert first_page[1]['slots'][0]['start_time'] == '14:00'
+    assert second_page[0]['date'] == str(today + timedelta(days=2))
+    assert second_page[0]['day'] == SlotsController.WEEKDAY_NAMES[(today + timedelta(days=2)).weekday()]
+    assert len(bounded) == 2
+    assert len(controller.get_free_slots_by_doctor(doctor.id)) == 9
+
+
+def test_earliest_free_slots_merges_doctors_of_specialty(app, doctor):
+    other = Doctors(id='doc-2', email='doc2@teste.com', name='Dr. Outro', password='x', specialty=doctor.specialty)
+    elsewhere = Doctors(id='doc-3', email='doc3@teste.com', name='Dr. Longe', password='x', specialty='Neuropsicologia')
+    db.session.add_all([other, elsewhere])
+    db.session.commit()
+    tomorrow = date.today() + timedelta(days=1)
+    controller = SlotsController()
+    controller.create_slots_bulk(doctor.id, [tomorrow, tomorrow + timedelta(days=1)], [time(9), time(14)], 50)
+    controller.create_slots_bulk(elsewhere.id, [tomorrow], [time(7)], 50)
+    AvailabilityController().create_rule(other.id, weekdays=[tomorrow.weekday()], start_times=[time(10)], valid_from=tomorrow)
+
+    slots = controller.get_earliest_free_slots(doctor.specialty, limit=3)
+
+    assert [(slot['doctor_id'], slot['date'], slot['start_time']) for slot in slots] == [
+        ('doc-1', str(tomorrow), '09:00'),
+        ('doc-2', str(tomorrow), '10:00'),
+        ('doc-1', str(tomorrow), '14:00'),
+    ]
+    assert slots[1]['slot_id'].startswith('rule-')
+    assert controller.get_earliest_free_slots('Inexistente') == []
+
+
+def test_archive_expired_slots_moves_only_past_free_slots(app, doctor):
+    controller = SlotsController()
+    today = date.today()
+    past = [today - timedelta(days=d) for d in range(1, 4)]
+    controller.create_slots_bulk(doctor.id, past + [today], [time(9), time(10)], 50)
+    Slots.query.filter_by(appointment_date=past[0], start_time=time(9)).update({'is_booked': True})
+    db.session.commit()
+
+    report = controller.archive_expired_slots(batch_size=2)
+
+    assert report['processed'] == 5
+    assert report['batches'] == 3
+    assert SlotsArchive.query.count() == 5
+    assert Slots.query.count() == 3
+    assert Slots.query.filter(Slots.appointment_date < today, Slots.is_booked == False).count() == 0
+    assert controller.archive_expired_slots(archive=False)['processed'] == 0
+
+
+def test_available_slots_range_and_version(app, doctor, user):
+    controller = SlotsController()
+    days = [date(2030, 1, 7), date(2030, 1, 8), date(2030, 2, 1)]
+    controller.create_slots_bulk(doctor.id, days, [time(9), time(10)], 50)
+
+    version = controller.get_availability_version(doctor.id)
+    assert controller.get_availability_version(doctor.id) == version
+
+    january = controller.get_available_slots_range(doctor.id, date(2030, 1, 1), date(2030, 1, 31))
+    assert list(january) == days[:2]
+    assert [slot.start_time for slot in january[days[0]]] == [time(9), time(10)]
+
+    # Reservar no mesmo segundo da criação (updated_at e contagem inalterados) muda a versão
+    booked, _ = controller.book_slot(january[days[0]][1].slot_id, user.id)
+    assert booked is not None
+    assert controller.get_availability_version(doctor.id) != version
+    version = controller.get_availability_version(doctor.id)
+
+    slot = january[days[0]][0]
+    controller.delete_slot(slot.slot_id)
+    assert controller.get_availability_version(doctor.id) != version
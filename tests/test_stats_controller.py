@@ -0,0 +1,77 @@
+from datetime import date, datetime, time, timedelta
+
+from db import db
+from models.appointments import Appointments
+from models.doctor_daily_stats import DoctorDailyStats
+from dashboard_psi.models import Paciente, Evolucao, Agenda
+from controllers.slot_controller import SlotsController
+from controllers.stats_controller import StatsController
+
+DAY = date(2030, 1, 7)
+
+
+def at(hour, day=DAY):
+    return datetime.combine(day, time(hour))
+
+
+def rows_by_day(doctor_id):
+    return {row.day: row for row in DoctorDailyStats.query.filter_by(doctor_id=doctor_id)}
+
+
+def test_daily_stats_follow_writes_and_match_rebuild(app, doctor, user):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    evolucao = Evolucao(paciente_id=paciente.id, data_sessao=at(9), duracao_minutos=50,
+                        conteudo_criptografado=b'x')
+    agenda = Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=at(9), status='agendada')
+    db.session.add_all([evolucao, agenda])
+    db.session.add(Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=at(15), status='cancelada'))
+    db.session.commit()
+
+    slots = SlotsController()
+    slots.create_slots_bulk(doctor.id, [DAY], [time(11)], 50, price=20000)
+    slots.book_slot(slots.get_slot_by_doctor_date_time(doctor.id, DAY, time(11)).slot_id, user.id)
+
+    row = rows_by_day(doctor.id)[DAY]
+    assert (row.sessions, row.appointments, row.cancellations, row.distinct_patients, row.minutes, row.revenue) == \
+        (1, 2, 1, 2, 50, 20000)
+
+    # Mover o agendamento e a evolução para outro dia atualiza as duas linhas
+    agenda.data_hora = at(9, DAY + timedelta(days=1))
+    evolucao.data_sessao = at(9, DAY + timedelta(days=1))
+    db.session.commit()
+    rows = rows_by_day(doctor.id)
+    assert (rows[DAY].sessions, rows[DAY].appointments) == (0, 1)
+    assert (rows[DAY + timedelta(days=1)].sessions, rows[DAY + timedelta(days=1)].appointments) == (1, 1)
+
+    db.session.delete(evolucao)
+    db.session.commit()
+    incremental = {day: (r.sessions, r.appointments, r.cancellations, r.distinct_patients, r.minutes, r.revenue)
+                   for day, r in rows_by_day(doctor.id).items()}
+
+    assert StatsController().rebuild() == len(incremental)
+    rebuilt = {day: (r.sessions, r.appointments, r.cancellations, r.distinct_patients, r.minutes, r.revenue)
+               for day, r in rows_by_day(doctor.id).items()}
+    assert rebuilt == incremental
+    assert StatsController().get_period_stats(doctor.id, DAY, DAY + timedelta(days=7))['appointments'] == 2
+
+
+def test_refresh_only_rewrites_touched_days(app, doctor):
+    paciente = Paciente(nome_completo='Maria', psicologo_id=doctor.id)
+    db.session.add(paciente)
+    db.session.flush()
+    between = DAY + timedelta(days=100)
+    db.session.add(DoctorDailyStats(doctor_id=doctor.id, day=between, sessions=7))
+    db.session.commit()
+
+    # Dois dias distantes tocados no mesmo flush não reescrevem os dias entre eles
+    db.session.add_all([
+        Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=at(9)),
+        Agenda(paciente_id=paciente.id, psicologo_id=doctor.id, data_hora=at(9, DAY + timedelta(days=200))),
+    ])
+    db.session.commit()
+
+    rows = rows_by_day(doctor.id)
+    assert rows[between].sessions == 7
+    assert rows[DAY].appointments == rows[DAY + timedelta(days=200)].appointments == 1
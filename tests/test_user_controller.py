@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from db import db
+from models.user import User
+from models.doctors import Doctors
+from models.appointments import Appointments
+from dashboard_psi.models import Paciente, Evolucao
+from controllers.user_controller import UserController, patient_summary_cache
+
+
+def test_patient_summary_aggregates_and_invalidates_per_patient(app, doctor, user):
+    patient_summary_cache.invalidate()
+    now = datetime.now().replace(microsecond=0)
+    other = User(id='user-2', email='outro@teste.com', name='Outro', password='x')
+    paciente = Paciente(nome_completo='Paciente Teste', email='PACIENTE@teste.com', psicologo_id=doctor.id)
+    db.session.add_all([other, paciente])
+    db.session.flush()
+    db.session.add_all([
+        Appointments(appointment_id='a-past', user_id=user.id, doctor_id=doctor.id, appointment_date=now - timedelta(days=7)),
+        Appointments(appointment_id='a-next', user_id=user.id, doctor_id=doctor.id, appointment_date=now + timedelta(days=7)),
+        Appointments(appointment_id='a-cancel', user_id=user.id, doctor_id=doctor.id,
+                     appointment_date=now + timedelta(days=1), status='cancelled'),
+        Evolucao(paciente_id=paciente.id, data_sessao=now - timedelta(days=7), conteudo_criptografado=b'x'),
+    ])
+    db.session.commit()
+
+    controller = UserController()
+    summary = controller.get_patient_summary(user.id, doctor.id)
+    assert summary == {
+        'appointment_count': 3,
+        'next_appointment': now + timedelta(days=7),
+        'last_appointment': now - timedelta(days=7),
+        'last_evolution': now - timedelta(days=7),
+    }
+    other_summary = controller.get_patient_summary(other.id, doctor.id)
+    assert other_summary['appointment_count'] == 0 and other_summary['last_evolution'] is None
+    assert controller.get_patient_summary(user.id, doctor.id) is summary
+    assert controller.get_patient_summary('missing', doctor.id) is None
+
+    db.session.add(Evolucao(paciente_id=paciente.id, data_sessao=now - timedelta(days=1), conteudo_criptografado=b'x'))
+    db.session.commit()
+    assert controller.get_patient_summary(other.id, doctor.id) is other_summary
+    assert controller.get_patient_summary(user.id, doctor.id)['last_evolution'] == now - timedelta(days=1)
+
+    db.session.add(Appointments(appointment_id='a-soon', user_id=user.id, doctor_id=doctor.id,
+                                appointment_date=now + timedelta(days=2)))
+    db.session.commit()
+    summary = controller.get_patient_summary(user.id, doctor.id)
+    assert summary['appointment_count'] == 4
+    assert summary['next_appointment'] == now + timedelta(days=2)
+
+
+def test_patient_summary_ignores_other_doctors_appointments(app, doctor, user):
+    patient_summary_cache.invalidate()
+    now = datetime.now().replace(microsecond=0)
+    other_doctor = Doctors(id='doc-2', email='doc2@teste.com', name='Dr. Outro', password='x',
+                           specialty='Psiquiatria')
+    db.session.add(other_doctor)
+    db.session.add_all([
+        Appointments(appointment_id='a-mine', user_id=user.id, doctor_id=doctor.id,
+                     appointment_date=now + timedelta(days=14)),
+        Appointments(appointment_id='a-other-next', user_id=user.id, doctor_id=other_doctor.id,
+                     appointment_date=now + timedelta(days=1)),
+        Appointments(appointment_id='a-other-past', user_id=user.id, doctor_id=other_doctor.id,
+                     appointment_date=now - timedelta(days=1)),
+    ])
+    db.session.commit()
+
+    summary = UserController().get_patient_summary(user.id, doctor.id)
+    assert summary['appointment_count'] == 1
+    assert summary['next_appointment'] == now + timedelta(days=14)
+    assert summary['last_appointment'] is None